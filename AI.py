@@ -5,53 +5,91 @@ from graph import *
 from message.map_message import *
 from message.possible_base_message import *
 from message.support_cell_message import *
+from message.id_message import encode_id
+from message.registry import ChatRouter
 from tsp_generator import get_limit, get_number_of_object
 from state import *
 from BT import *
+from deadline import NO_DEADLINE
+from geometry import get_geometry
 
 
 class AI:
-    game_round = -1
-    life_cycle = 1
-    map = None
-    w, h = -1, -1
-    id = 0
-    ids = {}
-    latest_pos = {}
-    found_history = set()
-    worker_state = WorkerState.Null
-    soldier_state = SoldierState.Null
-    soldier_init_random_dir = None
-    last_name_of_object = None
-    possible_base_cells = []
-    soldier_targets = []
-    prev_round_resource = 0
-    soldier_path_neighbors_history = []
-    own_cells_history = []
-    latest_map = None
-    cell_target = None
-    attack_dir = None
-    out_file = None
     output_path = "/media/mh/New Volume/AIC21-Client-Python/output/"
     debug = False
-    born_game_round = -1
-    prev_hp = 0
-    prev_es = 0
-    shot_once = False
-    # NEW SHIT
-    chosen_near_base_cell_BK = None
-    chosen_near_base_cell_BU = None
-    near_base_safe_cells = []
-    shot_default_dir = None
-    first_id = -1
-    exploration_target = None
-    sup_cells = []
-    attack_random_target = None
-
-    def __init__(self):
+
+    def __init__(self, seed=None, graph_class=Graph):
         # Current Game State
         self.game: Game = None
-
+        # Graph or ArrayGraph, every map of the ant is built with it
+        self.graph_class = graph_class
+        # every random choice of the ant goes through this, a fixed seed replays a game move for move
+        self.rng = random.Random(seed)
+        self.deadline = NO_DEADLINE
+        # sent by the controller's watchdog when the next turn is not decided in time
+        self.fallback_direction = Direction.CENTER.value
+
+        # Persistent state, kept for the whole life of the ant
+        self.game_round = -1
+        # game round minus the controller's turn number, a dropped turn still moves the round on
+        self.round_offset = None
+        self.life_cycle = 1
+        self.map = None
+        self.geometry = None
+        self.w, self.h = -1, -1
+        self.id = 0
+        self.ids = {}
+        self.latest_pos = {}
+        self.found_history = set()
+        self.worker_state = WorkerState.Null
+        self.soldier_state = SoldierState.Null
+        self.soldier_init_random_dir = None
+        self.last_name_of_object = None
+        self.possible_base_cells = []
+        self.soldier_targets = []
+        self.prev_round_resource = 0
+        self.soldier_path_neighbors_history = []
+        self.own_cells_history = []
+        self.latest_map = None
+        self.chat_router = None
+        # chat box length when each kind of chat was last read, and the round each cell was last seen by this ant
+        self.chats_read = {}
+        self.seen_at = {}
+        self.cell_target = None
+        self.attack_dir = None
+        self.out_file = None
+        self.born_game_round = -1
+        self.prev_hp = 0
+        self.prev_es = 0
+        self.shot_once = False
+        # NEW SHIT
+        self.chosen_near_base_cell_BK = None
+        self.chosen_near_base_cell_BU = None
+        self.near_base_safe_cells = []
+        self.shot_default_dir = None
+        self.first_id = -1
+        self.exploration_target = None
+        self.sup_cells = []
+        self.attack_random_target = None
+
+        self.reset_turn()
+
+    def init_game(self, game_config):
+        self.game = Game()
+        self.game.initGameConfig(game_config)
+        # map-size tables and the maps are built here so the first turn does not pay for them
+        self.w, self.h = self.game.mapWidth, self.game.mapHeight
+        self.geometry = get_geometry(self.w, self.h)
+        self.geometry.precompute(views={3, 4, 6, BASE_RANGE, BASE_RANGE + 1, self.game.viewDistance})
+        self.map = self.graph_class((self.w, self.h), (self.game.baseX, self.game.baseY))
+        self.latest_map = self.graph_class((self.w, self.h), (self.game.baseX, self.game.baseY))
+        self.chat_router = ChatRouter(self.w, self.h, self.game.viewDistance)
+
+    def set_current_state(self, current_state):
+        self.game.setCurrentState(current_state)
+        self.reset_turn()
+
+    def reset_turn(self):
         # Answer
         self.message: str = None
         self.direction: int = None
@@ -70,71 +108,56 @@ class AI:
 
     # @time_measure
     def search_neighbors(self):
-        # TODO improve by creating the list of indices instead of all the cells
-        ant = self.game.ant
-        cells = ant.visibleMap.cells
-        neighbor_cells = [j for sub in cells for j in sub if j is not None]
+        cells = self.game.ant.visibleMap.cells
+        geometry = self.map.geometry
         neighbor_nodes = []
-        for n in neighbor_cells:
-            w = n.type == CellType.WALL.value
-            s = n.type == CellType.SWAMP.value
-            t = n.type == CellType.TRAP.value
-            if w:
-                neighbor_nodes.append(Node((n.x, n.y), True, True))
-            elif s:
-                neighbor_nodes.append(Node((n.x, n.y), True, False, swamp=True))
-            elif t:
-                neighbor_nodes.append(Node((n.x, n.y), True, False, trap=True))
+        for i in range(len(cells)):
+            pos = geometry.cells[(cells.x[i], cells.y[i])]
+            cell_type = cells.type[i]
+            if cell_type == CellType.WALL.value:
+                neighbor_nodes.append(Node(pos, True, True))
+            elif cell_type == CellType.SWAMP.value:
+                neighbor_nodes.append(Node(pos, True, False, swamp=True))
+            elif cell_type == CellType.TRAP.value:
+                neighbor_nodes.append(Node(pos, True, False, trap=True))
             else:
-                b = n.resource_value if \
-                    n.resource_type == ResourceType.BREAD.value else 0
-                g = n.resource_value if \
-                    n.resource_type == ResourceType.GRASS.value else 0
-
-                if b > 0 and manhattan_dist(self.pos, (n.x, n.y), *AI.map.dim) <= 3:
-                    self.visible_bread.append({'number': b, 'pos': (n.x, n.y)})
-
-                if g > 0 and manhattan_dist(self.pos, (n.x, n.y), *AI.map.dim) <= 3:
-                    self.visible_grass.append({'number': g, 'pos': (n.x, n.y)})
-
-                aw, ally_s, ew, es = [0] * 4
-                for a in n.ants:
-                    if a.antTeam == AntTeam.ALLIED.value:
-                        if a.antType == AntType.KARGAR.value:
-                            aw += 1
-                        elif a.antType == AntType.SARBAAZ.value:
-                            ally_s += 1
-                    else:
-                        if a.antType == AntType.KARGAR.value:
-                            ew += 1
-                        elif a.antType == AntType.SARBAAZ.value:
-                            es += 1
-                neighbor_nodes.append(Node((n.x, n.y), True, False,
+                b = cells.resource_value[i] if \
+                    cells.resource_type[i] == ResourceType.BREAD.value else 0
+                g = cells.resource_value[i] if \
+                    cells.resource_type[i] == ResourceType.GRASS.value else 0
+
+                if b > 0 and geometry.distance(self.pos, pos) <= 3:
+                    self.visible_bread.append({'number': b, 'pos': pos})
+
+                if g > 0 and geometry.distance(self.pos, pos) <= 3:
+                    self.visible_grass.append({'number': g, 'pos': pos})
+
+                neighbor_nodes.append(Node(pos, True, False,
                                            bread=b,
                                            grass=g,
-                                           ally_workers=aw,
-                                           ally_soldiers=ally_s,
-                                           enemy_workers=ew,
-                                           enemy_soldiers=es))
+                                           ally_workers=cells.ally_workers[i],
+                                           ally_soldiers=cells.ally_soldiers[i],
+                                           enemy_workers=cells.enemy_workers[i],
+                                           enemy_soldiers=cells.enemy_soldiers[i]))
 
         self.all_neighbors = {n.pos: n for n in neighbor_nodes}
         self.new_neighbors = {n.pos: n for n in neighbor_nodes if
-                              AI.map.nodes[n.pos] != n}
-        if AI.life_cycle > 1:
-            self.value = self.determine_value(neighbor_cells, neighbor_nodes)
-        AI.found_history.update(set(self.new_neighbors.keys()))
+                              self.map.nodes[n.pos] != n}
+        if self.life_cycle > 1:
+            self.value = self.determine_value(cells, neighbor_nodes)
+        self.found_history.update(set(self.new_neighbors.keys()))
 
     # @time_measure
-    def determine_value(self, neighbor_cells, neighbor_nodes):
-        for n in neighbor_cells:
-            if n.type == CellType.BASE.value and (n.x, n.y) != AI.map.base_pos and \
-                    AI.map.enemy_base_pos is None:
-                AI.map.enemy_base_pos = (n.x, n.y)
+    def determine_value(self, cells, neighbor_nodes):
+        for i in range(len(cells)):
+            if cells.type[i] == CellType.BASE.value and (cells.x[i], cells.y[i]) != self.map.base_pos and \
+                    self.map.enemy_base_pos is None:
+                self.map.enemy_base_pos = (cells.x[i], cells.y[i])
                 return VALUES["enemy_base"]
 
         sum_bg = 0
         for n in neighbor_nodes:
-            if not AI.map.nodes[n.pos].discovered and \
+            if not self.map.nodes[n.pos].discovered and \
                     (n.bread > 0 or n.grass > 0):
                 sum_bg += n.bread
                 sum_bg += n.grass
@@ -143,14 +166,14 @@ class AI:
 
         total_disc = 0
         for n in neighbor_nodes:
-            if not AI.map.nodes[n.pos].discovered:
+            if not self.map.nodes[n.pos].discovered:
                 total_disc += 1
         if total_disc >= 3:
             return VALUES["disc_gt_3"] + total_disc
 
         total_soldiers = 0
         for n in neighbor_nodes:
-            if AI.map.nodes[n.pos].enemy_soldiers < n.enemy_soldiers:
+            if self.map.nodes[n.pos].enemy_soldiers < n.enemy_soldiers:
                 total_soldiers += 1
         if total_soldiers > 0:
             return VALUES["es"] + total_soldiers
@@ -159,123 +182,114 @@ class AI:
             return VALUES["disc_lt_3"] + total_disc
 
         if self.pos in self.new_neighbors.keys():
-            if self.new_neighbors[self.pos].bread > AI.map.nodes[self.pos].bread \
-                    or self.new_neighbors[self.pos].grass > AI.map.nodes[self.pos].grass:
-                return VALUES["bg_add"] + abs(self.new_neighbors[self.pos].bread - AI.map.nodes[self.pos].bread) + \
-                       abs(self.new_neighbors[self.pos].grass - AI.map.nodes[self.pos].grass)
+            if self.new_neighbors[self.pos].bread > self.map.nodes[self.pos].bread \
+                    or self.new_neighbors[self.pos].grass > self.map.nodes[self.pos].grass:
+                return VALUES["bg_add"] + abs(self.new_neighbors[self.pos].bread - self.map.nodes[self.pos].bread) + \
+                       abs(self.new_neighbors[self.pos].grass - self.map.nodes[self.pos].grass)
 
         if self.game.ant.antType == AntType.KARGAR.value and self.pos in self.new_neighbors.keys():
-            if self.new_neighbors[self.pos].bread < AI.map.nodes[self.pos].bread \
-                    or self.new_neighbors[self.pos].grass < AI.map.nodes[self.pos].grass:
-                if self.game.ant.currentResource.value > AI.prev_round_resource:
-                    return VALUES["bg_sub"] + abs(self.new_neighbors[self.pos].bread - AI.map.nodes[self.pos].bread) + \
-                           abs(self.new_neighbors[self.pos].grass - AI.map.nodes[self.pos].grass)
+            if self.new_neighbors[self.pos].bread < self.map.nodes[self.pos].bread \
+                    or self.new_neighbors[self.pos].grass < self.map.nodes[self.pos].grass:
+                if self.game.ant.currentResource.value > self.prev_round_resource:
+                    return VALUES["bg_sub"] + abs(self.new_neighbors[self.pos].bread - self.map.nodes[self.pos].bread) + \
+                           abs(self.new_neighbors[self.pos].grass - self.map.nodes[self.pos].grass)
 
         return VALUES["none"]
 
     # @time_measure
     def update_map_from_neighbors(self):
         for pos, n in self.all_neighbors.items():
-            AI.map.nodes[pos] = copy.deepcopy(n)
+            self.map.update_node(pos, copy.deepcopy(n))
+            self.seen_at[pos] = self.game_round
         # if not self.new_neighbors:
         #     return
         # # just in case. not really needed
         # for pos, n in self.new_neighbors.items():
-        #     AI.map.nodes[pos] = copy.deepcopy(n)
+        #     self.map.nodes[pos] = copy.deepcopy(n)
 
     # @time_measure
+    def dispatch_chats(self, kind, turn=None, last=None):
+        self.chat_router.route(self.game.chatBox)
+        self.chat_router.dispatch(self.game.chatBox, self, kind, turn, last)
+        self.chats_read[kind] = self.chat_router.seen
+
+    def dispatch_new_chats(self, kind):
+        # the chats of this kind since it was last read: the last round's, or more when rounds were dropped or skipped
+        self.chat_router.route(self.game.chatBox)
+        self.chat_router.dispatch(self.game.chatBox, self, kind, since=self.chats_read.get(kind))
+        self.chats_read[kind] = self.chat_router.seen
+
     def update_map_from_chat_box(self):
-        maps = [msg for msg in
-                self.game.chatBox.allChats[-MAX_MESSAGES_PER_TURN:] if '!' in
-                msg.text and not msg.text.startswith("sc") and not msg.text.startswith("sh") and msg.turn == AI.game_round - 1]
-        if AI.life_cycle == 1:
-            if AI.born_game_round > MAX_MESSAGES_INIT:
-                maps = [msg for msg in self.game.chatBox.allChats[-MAX_MESSAGES_INIT * MAX_MESSAGES_PER_TURN:] if '!' in
-                        msg.text and not msg.text.startswith("sc") and not msg.text.startswith("sh")]
+        if self.life_cycle == 1:
+            if self.born_game_round > MAX_MESSAGES_INIT:
+                self.dispatch_chats("map", last=MAX_MESSAGES_INIT * MAX_MESSAGES_PER_TURN)
             else:
-                maps = [msg for msg in self.game.chatBox.allChats if '!' in
-                        msg.text]
-
-        for m in maps:
-            ant_id, ant_pos, ant_dir, \
-            ant_shot, \
-            nodes, enemy_base_pos = decode_nodes(m.text,
-                                                 AI.w, AI.h,
-                                                 self.game.ant.viewDistance)
-            AI.latest_pos[ant_id] = (ant_pos, m.turn)
-            for pos, n in nodes.items():
-                if n != AI.map.nodes[pos]:
-                    AI.map.nodes[pos] = copy.deepcopy(n)
-
-            if enemy_base_pos is not None:
-                AI.map.enemy_base_pos = enemy_base_pos
-
-            if ant_shot:
-                target = add_pos_dir(ant_pos, ant_dir, AI.w, AI.h)
-                AI.soldier_targets.append(target)
+                self.dispatch_chats("map")
+        else:
+            self.dispatch_new_chats("map")
+
+    def on_map_message(self, chat, payload):
+        ant_id, ant_pos, ant_dir, ant_shot, nodes, enemy_base_pos = payload
+        self.latest_pos[ant_id] = (ant_pos, chat.turn)
+        for pos, n in nodes.items():
+            # chats read late must not undo what the ant has seen itself since
+            if self.seen_at.get(pos, -1) > chat.turn:
+                continue
+            if n != self.map.nodes[pos]:
+                self.map.update_node(pos, copy.deepcopy(n))
+
+        if enemy_base_pos is not None:
+            self.map.enemy_base_pos = enemy_base_pos
+
+        if ant_shot:
+            target = add_pos_dir(ant_pos, ant_dir, self.w, self.h)
+            self.soldier_targets.append(target)
 
     # @time_measure
     def update_ids_from_chat_box(self):
-        id_msgs = [msg.text for msg in
-                   self.game.chatBox.allChats[-MAX_MESSAGES_PER_TURN:] if
-                   msg.text.startswith("id") and msg.turn == AI.game_round - 1]
-        if AI.life_cycle <= 3:
-            AI.ids[AntType.SARBAAZ.value] = []
-            AI.ids[AntType.KARGAR.value] = []
-            id_msgs = [msg.text for msg in self.game.chatBox.allChats if
-                       msg.text.startswith("id")]
-
-        for m in id_msgs:
-            msg_type = int(m[2])
-            msg_id = int(m[3:])
-            if msg_id not in AI.ids[0] and msg_id not in AI.ids[1]:
-                AI.ids[msg_type].append(msg_id)
+        if self.life_cycle <= 3:
+            self.ids[AntType.SARBAAZ.value] = []
+            self.ids[AntType.KARGAR.value] = []
+            self.dispatch_chats("id")
+        else:
+            self.dispatch_new_chats("id")
+
+    def on_id_message(self, chat, payload):
+        msg_type, msg_id = payload
+        if msg_id not in self.ids[0] and msg_id not in self.ids[1]:
+            self.ids[msg_type].append(msg_id)
 
     def send_id(self):
-        self.message = "id" + str(self.game.ant.antType) + str(AI.id)
+        self.message = encode_id(self.game.ant.antType, self.id)
         self.value = VALUES["id"]
 
     def make_id(self, min_id=1, max_id=220):
-        all_ids = AI.ids[0] + AI.ids[1] if AI.ids else []
-        iid = random.randint(min_id, max_id)
+        all_ids = self.ids[0] + self.ids[1] if self.ids else []
+        iid = self.rng.randint(min_id, max_id)
         while iid in all_ids:
-            iid = random.randint(min_id, max_id)
-        AI.id = iid
+            iid = self.rng.randint(min_id, max_id)
+        self.id = iid
 
     def update_support_cells_from_chat_box(self):
-        sup_msgs = [msg.text for msg in
-                   self.game.chatBox.allChats[-MAX_MESSAGES_PER_TURN:] if
-                   msg.text.startswith("sc") and msg.turn == AI.game_round - 1]
-        if AI.life_cycle <= 3:
-            sup_msgs = [msg.text for msg in self.game.chatBox.allChats if
-                       msg.text.startswith("sc")]
+        if self.life_cycle <= 3:
+            self.dispatch_chats("sc")
+        else:
+            self.dispatch_new_chats("sc")
 
-        for m in sup_msgs:
-            ant_id, ant_pos, resource_count = decode_support_cell(m, AI.w, AI.h)
-            if ant_pos not in AI.sup_cells:
-                AI.sup_cells.append(ant_pos)
+    def on_support_cell_message(self, chat, payload):
+        ant_id, ant_pos, resource_count = payload
+        if ant_pos not in self.sup_cells:
+            self.sup_cells.append(ant_pos)
 
 
 
     def get_next_pos(self, cur_pos, move):
-        if move == 1:
-            next_pos = (cur_pos[0] + 1, cur_pos[1])
-        elif move == 2:
-            next_pos = (cur_pos[0], cur_pos[1] - 1)
-        elif move == 3:
-            next_pos = (cur_pos[0] - 1, cur_pos[1])
-        elif move == 4:
-            next_pos = (cur_pos[0], cur_pos[1] + 1)
-        else:
+        if move not in (1, 2, 3, 4):
             return -1, -1
-
-        next_pos = ((next_pos[0] + self.game.mapWidth) % self.game.mapWidth,
-                    (next_pos[1] + self.game.mapHeight) % self.game.mapHeight)
-        return next_pos
+        return self.geometry.move(cur_pos, move)
 
     def fix_pos(self, pos):
-        return ((pos[0] + self.game.mapWidth) % self.game.mapWidth,
-                (pos[1] + self.game.mapHeight) % self.game.mapHeight)
+        return self.geometry.fix(pos[0], pos[1])
 
     def is_road_to_wall(self, move: int):
         for i in [1, 2]:
@@ -289,7 +303,7 @@ class AI:
                     p = (self.pos[0] - i, self.pos[1] + j)
                 else:
                     p = (self.pos[0] + j, self.pos[1] + i)
-                node = AI.map.nodes[self.fix_pos(pos=p)]
+                node = self.map.nodes[self.fix_pos(pos=p)]
                 if not node.wall:
                     tf = False
             if tf:
@@ -299,7 +313,7 @@ class AI:
     # @time_measure
     def get_init_ants_next_move(self, preferred_moves, map) -> int:
         for m in preferred_moves:
-            if (not self.is_road_to_wall(m)) and (self.get_next_pos(self.pos, m) != AI.latest_pos[AI.id][0]):
+            if (not self.is_road_to_wall(m)) and (self.get_next_pos(self.pos, m) != self.latest_pos[self.id][0]):
                 for j in [0, 1, -1]:
                     if m == 1:
                         p = (self.pos[0] + 2, self.pos[1] + j)
@@ -309,84 +323,85 @@ class AI:
                         p = (self.pos[0] - 2, self.pos[1] + j)
                     else:
                         p = (self.pos[0] + j, self.pos[1] + 2)
-                    path = map.get_path_with_max_length(map.nodes[self.pos], map.nodes[self.fix_pos(p)], 2)
+                    path = map.get_path_with_max_length(map.nodes[self.pos], map.nodes[self.fix_pos(p)], 2,
+                                                        self.deadline)
                     if path is not None:
                         return Direction.get_value(map.step(self.pos, path[0].pos))
-        print_with_debug("error on get_init_ants_next_move", f=AI.out_file)
-        return Direction.get_random_direction()
+        print_with_debug("error on get_init_ants_next_move", f=self.out_file)
+        return Direction.get_random_direction(self.rng)
 
     def get_init_ant_explore_move(self):
-        AI.worker_state = WorkerState.InitCollecting
-        if AI.id <= Utils.INIT_ANTS_NUM:
-            if AI.id == Utils.GRASS_ONLY_ID:
-                m = self.get_init_ants_next_move(Utils.INIT_STRAIGHT_ANTS_MOVES[AI.id - 1],
-                                                 AI.map.convert_bread_cells_to_wall())
+        self.worker_state = WorkerState.InitCollecting
+        if self.id <= Utils.INIT_ANTS_NUM:
+            if self.id == Utils.GRASS_ONLY_ID:
+                m = self.get_init_ants_next_move(Utils.INIT_STRAIGHT_ANTS_MOVES[self.id - 1],
+                                                 self.map.convert_bread_cells_to_wall())
             else:
-                m = self.get_init_ants_next_move(Utils.INIT_STRAIGHT_ANTS_MOVES[AI.id - 1], AI.map)
+                m = self.get_init_ants_next_move(Utils.INIT_STRAIGHT_ANTS_MOVES[self.id - 1], self.map)
         else:
-            m = self.get_init_ants_next_move(Utils.INIT_STRAIGHT_ANTS_MOVES[AI.id % 4], AI.map)
+            m = self.get_init_ants_next_move(Utils.INIT_STRAIGHT_ANTS_MOVES[self.id % 4], self.map)
 
         if m < 5:
             return m
         else:
-            print_with_debug("something went wrong, init ants move :", m, "from id:", AI.id, f=AI.out_file)
-            return Direction.get_random_direction()
+            print_with_debug("something went wrong, init ants move :", m, "from id:", self.id, f=self.out_file)
+            return Direction.get_random_direction(self.rng)
 
     # @time_measure
     def get_new_ant_collect_move(self, own_discovered_search=False):
         if own_discovered_search:
-            search_map = Graph((AI.w, AI.h), (self.game.baseX, self.game.baseY))
+            search_map = self.graph_class((self.w, self.h), (self.game.baseX, self.game.baseY))
             for p in self.found_history:
-                search_map.nodes[p] = AI.map.nodes[p]
+                search_map.update_node(p, self.map.nodes[p])
         else:
-            search_map = AI.map
-        if len(AI.possible_base_cells) > 0:
-            search_map = search_map.convert_base_possible_cells_to_wall(AI.near_base_safe_cells)
+            search_map = self.map
+        if len(self.possible_base_cells) > 0:
+            search_map = search_map.convert_base_possible_cells_to_wall(self.near_base_safe_cells)
 
         if self.has_resource_in_map(2, 1) is None:
             m = self.get_init_ant_explore_move()
         elif self.game.ant.currentResource.type == ResourceType.BREAD.value:
-            print_with_debug("ANT is holding bread", f=AI.out_file)
+            print_with_debug("ANT is holding bread", f=self.out_file)
             if self.has_resource_in_map(ResourceType.BREAD.value,
                                         WORKER_MAX_CARRYING_RESOURCE_AMOUNT - self.game.ant.currentResource.value) \
                     == ResourceType.BREAD.value:
-                print_with_debug("state has bread res to find", f=AI.out_file)
-                m, AI.last_name_of_object, d = search_map.get_resource_best_move(
+                print_with_debug("state has bread res to find", f=self.out_file)
+                m, self.last_name_of_object, d = search_map.get_resource_best_move(
                     src_pos=self.pos,
-                    dest_pos=AI.map.base_pos,
+                    dest_pos=self.map.base_pos,
                     name_of_object='bread',
                     limit=get_limit(
                         bread_min=WORKER_MAX_CARRYING_RESOURCE_AMOUNT,
                         grass_min=math.inf
                     ),
                     number_of_object=get_number_of_object(self.game.ant.currentResource),
+                    deadline=self.deadline,
                 )
             else:
-                print_with_debug("state has not other res", f=AI.out_file)
-                path = AI.map.get_path(AI.map.nodes[self.pos], AI.map.nodes[AI.map.base_pos])
-                m = Direction.get_value(AI.map.step(self.pos, path[0].pos))
+                print_with_debug("state has not other res", f=self.out_file)
+                m = self.get_move_to_base()
         elif self.game.ant.currentResource.type == ResourceType.GRASS.value:
-            print_with_debug("ANT is holding grass", f=AI.out_file)
+            print_with_debug("ANT is holding grass", f=self.out_file)
             if self.has_resource_in_map(ResourceType.GRASS.value,
                                         WORKER_MAX_CARRYING_RESOURCE_AMOUNT - self.game.ant.currentResource.value) \
                     == ResourceType.GRASS.value:
-                print_with_debug("state has grass res to find", f=AI.out_file)
-                m, AI.last_name_of_object, d = search_map.get_resource_best_move(
+                print_with_debug("state has grass res to find", f=self.out_file)
+                m, self.last_name_of_object, d = search_map.get_resource_best_move(
                     src_pos=self.pos,
-                    dest_pos=AI.map.base_pos,
+                    dest_pos=self.map.base_pos,
                     name_of_object='grass',
                     limit=get_limit(
                         bread_min=math.inf,
                         grass_min=WORKER_MAX_CARRYING_RESOURCE_AMOUNT
                     ),
                     number_of_object=get_number_of_object(self.game.ant.currentResource),
+                    deadline=self.deadline,
                 )
             else:
-                print_with_debug("state has not to find", f=AI.out_file)
-                path = AI.map.get_path(AI.map.nodes[self.pos], AI.map.nodes[AI.map.base_pos])
-                m = Direction.get_value(AI.map.step(self.pos, path[0].pos))
+                print_with_debug("state has not to find", f=self.out_file)
+                m = self.get_move_to_base()
         else:
-            print_with_debug("ANT isn't hold anything", f=AI.out_file)
+            print_with_debug("ANT isn't hold anything", f=self.out_file)
             grass_dir = None
             grass_dis = math.inf
             bread_dir = None
@@ -395,23 +410,24 @@ class AI:
                                         1,
                                         own_discovered_search) \
                     == ResourceType.GRASS.value:
-                grass_dir, AI.last_name_of_object, grass_dis = search_map.get_resource_best_move(
+                grass_dir, self.last_name_of_object, grass_dis = search_map.get_resource_best_move(
                     src_pos=self.pos,
-                    dest_pos=AI.map.base_pos,
+                    dest_pos=self.map.base_pos,
                     name_of_object='grass',
                     limit=get_limit(
                         bread_min=math.inf,
                         grass_min=WORKER_MAX_CARRYING_RESOURCE_AMOUNT
                     ),
                     number_of_object=get_number_of_object(self.game.ant.currentResource),
+                    deadline=self.deadline,
                 )
             if self.has_resource_in_map(ResourceType.BREAD.value,
                                         1,
                                         own_discovered_search) \
                     == ResourceType.BREAD.value:
-                bread_dir, AI.last_name_of_object, bread_dis = search_map.get_resource_best_move(
+                bread_dir, self.last_name_of_object, bread_dis = search_map.get_resource_best_move(
                     src_pos=self.pos,
-                    dest_pos=AI.map.base_pos,
+                    dest_pos=self.map.base_pos,
                     name_of_object='bread',
                     limit=get_limit(
                         bread_min=WORKER_MAX_CARRYING_RESOURCE_AMOUNT,
@@ -419,13 +435,14 @@ class AI:
                     ),
                     number_of_object=get_number_of_object(
                         self.game.ant.currentResource),
+                    deadline=self.deadline,
                 )
-            print_with_debug("grass_dir:", grass_dir, f=AI.out_file)
-            print_with_debug("grass_dis:", grass_dis, f=AI.out_file)
-            print_with_debug("bread_dir:", bread_dir, f=AI.out_file)
-            print_with_debug("bread_dis:", bread_dis, f=AI.out_file)
+            print_with_debug("grass_dir:", grass_dir, f=self.out_file)
+            print_with_debug("grass_dis:", grass_dis, f=self.out_file)
+            print_with_debug("bread_dir:", bread_dir, f=self.out_file)
+            print_with_debug("bread_dis:", bread_dis, f=self.out_file)
             if (grass_dis <= bread_dis
-                or ((AI.id % Utils.NEW_GRASS_PRIORITY_PER_ROUND) == 0 and grass_dis - Utils.PRIORITY_GAP <= bread_dis)) \
+                or ((self.id % Utils.NEW_GRASS_PRIORITY_PER_ROUND) == 0 and grass_dis - Utils.PRIORITY_GAP <= bread_dis)) \
                     and grass_dis != math.inf:
                 m = grass_dir
             elif bread_dir is not None:
@@ -437,57 +454,56 @@ class AI:
     # @time_measure
     def get_init_ant_collect_move(self, own_discovered_search=False):
         if own_discovered_search:
-            search_map = Graph((AI.w, AI.h), (self.game.baseX, self.game.baseY))
+            search_map = self.graph_class((self.w, self.h), (self.game.baseX, self.game.baseY))
             for p in self.found_history:
-                search_map.nodes[p] = AI.map.nodes[p]
+                search_map.update_node(p, self.map.nodes[p])
         else:
-            search_map = AI.map
-        if len(AI.possible_base_cells) > 0:
-            search_map = search_map.convert_base_possible_cells_to_wall(AI.near_base_safe_cells)
+            search_map = self.map
+        if len(self.possible_base_cells) > 0:
+            search_map = search_map.convert_base_possible_cells_to_wall(self.near_base_safe_cells)
 
         if self.game.ant.currentResource.type == ResourceType.BREAD.value:
             if self.has_resource_in_map(ResourceType.BREAD.value,
                                         WORKER_MAX_CARRYING_RESOURCE_AMOUNT - self.game.ant.currentResource.value,
                                         own_discovered_search) \
                     == ResourceType.BREAD.value:
-                print_with_debug("state has res to find", f=AI.out_file)
-                m, AI.last_name_of_object, d = search_map.get_resource_best_move(
+                print_with_debug("state has res to find", f=self.out_file)
+                m, self.last_name_of_object, d = search_map.get_resource_best_move(
                     src_pos=self.pos,
-                    dest_pos=AI.map.base_pos,
+                    dest_pos=self.map.base_pos,
                     name_of_object='bread',
                     limit=get_limit(
                         bread_min=WORKER_MAX_CARRYING_RESOURCE_AMOUNT,
                         grass_min=math.inf
                     ),
                     number_of_object=get_number_of_object(self.game.ant.currentResource),
+                    deadline=self.deadline,
                 )
             else:
-                print_with_debug("state has not other res", f=AI.out_file)
-                path = AI.map.get_path(AI.map.nodes[self.pos], AI.map.nodes[AI.map.base_pos])
-                return Direction.get_value(AI.map.step(self.pos, path[0].pos))
+                print_with_debug("state has not other res", f=self.out_file)
+                return self.get_move_to_base()
         elif self.game.ant.currentResource.type == ResourceType.GRASS.value:
             if self.game.ant.currentResource.value == WORKER_MAX_CARRYING_RESOURCE_AMOUNT:
-                path = AI.map.get_path(AI.map.nodes[self.pos], AI.map.nodes[AI.map.base_pos])
-                return Direction.get_value(AI.map.step(self.pos, path[0].pos))
+                return self.get_move_to_base()
             if self.has_resource_in_map(ResourceType.GRASS.value,
                                         WORKER_MAX_CARRYING_RESOURCE_AMOUNT - self.game.ant.currentResource.value,
                                         own_discovered_search) \
                     == ResourceType.GRASS.value:
-                print_with_debug("state has res to find", f=AI.out_file)
-                m, AI.last_name_of_object, d = search_map.get_resource_best_move(
+                print_with_debug("state has res to find", f=self.out_file)
+                m, self.last_name_of_object, d = search_map.get_resource_best_move(
                     src_pos=self.pos,
-                    dest_pos=AI.map.base_pos,
+                    dest_pos=self.map.base_pos,
                     name_of_object='grass',
                     limit=get_limit(
                         bread_min=math.inf,
                         grass_min=WORKER_MAX_CARRYING_RESOURCE_AMOUNT
                     ),
                     number_of_object=get_number_of_object(self.game.ant.currentResource),
+                    deadline=self.deadline,
                 )
             else:
-                print_with_debug("state has not to find", f=AI.out_file)
-                path = AI.map.get_path(AI.map.nodes[self.pos], AI.map.nodes[AI.map.base_pos])
-                return Direction.get_value(AI.map.step(self.pos, path[0].pos))
+                print_with_debug("state has not to find", f=self.out_file)
+                return self.get_move_to_base()
         else:
             grass_dir = None
             grass_dis = math.inf
@@ -498,24 +514,25 @@ class AI:
                                         1,
                                         own_discovered_search) \
                     == ResourceType.GRASS.value:
-                grass_dir, AI.last_name_of_object, grass_dis = search_map.get_resource_best_move(
+                grass_dir, self.last_name_of_object, grass_dis = search_map.get_resource_best_move(
                     src_pos=self.pos,
-                    dest_pos=AI.map.base_pos,
+                    dest_pos=self.map.base_pos,
                     name_of_object='grass',
                     limit=get_limit(
                         bread_min=math.inf,
                         grass_min=WORKER_MAX_CARRYING_RESOURCE_AMOUNT
                     ),
                     number_of_object=get_number_of_object(self.game.ant.currentResource),
+                    deadline=self.deadline,
                 )
             if self.has_resource_in_map(ResourceType.BREAD.value,
                                         1,
                                         own_discovered_search) \
                     == ResourceType.BREAD.value \
-                    and AI.id != Utils.GRASS_ONLY_ID:
-                bread_dir, AI.last_name_of_object, bread_dis = search_map.get_resource_best_move(
+                    and self.id != Utils.GRASS_ONLY_ID:
+                bread_dir, self.last_name_of_object, bread_dis = search_map.get_resource_best_move(
                     src_pos=self.pos,
-                    dest_pos=AI.map.base_pos,
+                    dest_pos=self.map.base_pos,
                     name_of_object='bread',
                     limit=get_limit(
                         bread_min=WORKER_MAX_CARRYING_RESOURCE_AMOUNT,
@@ -523,14 +540,15 @@ class AI:
                     ),
                     number_of_object=get_number_of_object(
                         self.game.ant.currentResource),
+                    deadline=self.deadline,
                 )
-            print_with_debug("grass_dir:", grass_dir, f=AI.out_file)
-            print_with_debug("grass_dis:", grass_dis, f=AI.out_file)
-            print_with_debug("bread_dir:", bread_dir, f=AI.out_file)
-            print_with_debug("bread_dis:", bread_dis, f=AI.out_file)
-            if ((grass_dis <= bread_dis and AI.id != BREAD_PRIORITY_ID)
-                or ((AI.id == GRASS_PRIORITY_ID1 or AI.id == GRASS_PRIORITY_ID2) and grass_dis - PRIORITY_GAP <= bread_dis)
-                or (AI.id == BREAD_PRIORITY_ID and grass_dis + PRIORITY_GAP < bread_dis)) \
+            print_with_debug("grass_dir:", grass_dir, f=self.out_file)
+            print_with_debug("grass_dis:", grass_dis, f=self.out_file)
+            print_with_debug("bread_dir:", bread_dir, f=self.out_file)
+            print_with_debug("bread_dis:", bread_dis, f=self.out_file)
+            if ((grass_dis <= bread_dis and self.id != BREAD_PRIORITY_ID)
+                or ((self.id == GRASS_PRIORITY_ID1 or self.id == GRASS_PRIORITY_ID2) and grass_dis - PRIORITY_GAP <= bread_dis)
+                or (self.id == BREAD_PRIORITY_ID and grass_dis + PRIORITY_GAP < bread_dis)) \
                     and grass_dis != math.inf:
                 m = grass_dir
             elif bread_dir is not None:
@@ -539,25 +557,40 @@ class AI:
                 m = self.get_init_ant_explore_move()
         return m
 
+    def get_field_move(self, pos):
+        # home when carrying, else toward the nearest resource, read off the map's fields without a search of its own
+        src = self.map.nodes[pos]
+        number_of_object = get_number_of_object(self.game.ant.currentResource)
+        if any(number_of_object.values()):
+            return self.map.get_first_move_to_base(src, number_of_object)
+        names = ('grass',) if self.id == Utils.GRASS_ONLY_ID else ('grass', 'bread')
+        moves = [self.map.get_move_to_nearest_resource(src, name, number_of_object) for name in names]
+        return min(moves, key=lambda m: m[2])[0]
+
+    def get_move_to_base(self):
+        move = self.map.get_first_move_to_base(self.map.nodes[self.pos],
+                                               get_number_of_object(self.game.ant.currentResource), self.deadline)
+        return Direction.CENTER.value if move is None else move
+
     def has_resource_in_map(self, res_type: int, res_num=10, own_discovered_search=False):
         if own_discovered_search:
-            own_map = Graph((AI.w, AI.h), (self.game.baseX, self.game.baseY))
+            own_map = self.graph_class((self.w, self.h), (self.game.baseX, self.game.baseY))
             for p in self.found_history:
-                own_map.nodes[p] = AI.map
+                own_map.update_node(p, self.map.nodes[p])
         else:
-            own_map = AI.map
+            own_map = self.map
 
-        print_with_debug("total bread num:", own_map.total_bread_number(), f=AI.out_file)
-        print_with_debug("total grass num:", own_map.total_grass_number(), f=AI.out_file)
+        print_with_debug("total bread num:", own_map.total_bread_number(), f=self.out_file)
+        print_with_debug("total grass num:", own_map.total_grass_number(), f=self.out_file)
         if res_type == ResourceType.BREAD.value:
-            if AI.map.total_bread_number() >= res_num:
+            if self.map.total_bread_number() >= res_num:
                 return res_type
         elif res_type == ResourceType.GRASS.value:
-            if AI.map.total_grass_number() >= res_num:
+            if self.map.total_grass_number() >= res_num:
                 return res_type
-        elif AI.map.total_grass_number() >= res_num:
+        elif self.map.total_grass_number() >= res_num:
             return ResourceType.BREAD.value
-        elif AI.map.total_bread_number() >= res_num:
+        elif self.map.total_bread_number() >= res_num:
             return ResourceType.GRASS.value
         else:
             return None
@@ -565,29 +598,35 @@ class AI:
     # @handle_exception
     # @time_measure
     @handle_exception
-    def turn(self) -> (str, int, int):
-        if AI.debug and AI.life_cycle > 2 and (AI.ids and (AI.id in AI.ids[0] or AI.id in AI.ids[1])):
+    def turn(self, deadline=None, turn=None) -> (str, int, int):
+        self.deadline = deadline or NO_DEADLINE
+        if turn is not None and self.round_offset is not None:
+            self.game_round = turn + self.round_offset
+        if self.debug and self.life_cycle > 2 and (self.ids and (self.id in self.ids[0] or self.id in self.ids[1])):
             t = "soldier" if self.game.ant.antType == AntType.SARBAAZ.value else "worker"
-            AI.out_file = open(AI.output_path + t + '_' + str(AI.born_game_round) + '_' + str(AI.first_id) + ".txt", "a+")
+            self.out_file = open(self.output_path + t + '_' + str(self.born_game_round) + '_' + str(self.first_id) + ".txt", "a+")
 
         self.round_initialization()
+        if turn is not None and self.round_offset is None:
+            self.round_offset = self.game_round - turn
 
-        if AI.game_round == 1:
-            AI.worker_state = WorkerState.InitExploring if self.game.ant.antType == AntType.KARGAR.value else WorkerState.Null
+        if self.game_round == 1:
+            self.worker_state = WorkerState.InitExploring if self.game.ant.antType == AntType.KARGAR.value else WorkerState.Null
             self.direction = self.get_new_ant_collect_move()
 
         # *************************************************************************************************************************
         # ########################################################KAARGAAAR########################################################
         # *************************************************************************************************************************
         elif self.game.ant.antType == AntType.KARGAR.value:
-            # print_map(AI.map, self.pos)
+            # print_map(self.map, self.pos)
             if self.game.ant.currentResource.value is not None \
                     and self.game.ant.currentResource.value >= (WORKER_MAX_CARRYING_RESOURCE_AMOUNT / 2):
                 print_with_debug("worker has >= (max carrying resources amount / 2) => back to base with bfs",
-                                 f=AI.out_file)
+                                 f=self.out_file)
 
-                dir = AI.map.get_first_move_to_base(AI.map.nodes[self.pos],
-                                                    get_number_of_object(self.game.ant.currentResource))
+                dir = self.map.get_first_move_to_base(self.map.nodes[self.pos],
+                                                    get_number_of_object(self.game.ant.currentResource),
+                                                    self.deadline)
                 if dir is None:
                     self.direction = Direction.CENTER.value
                 else:
@@ -595,75 +634,76 @@ class AI:
                 print_with_debug("bfs dir:", self.direction)
             elif self.game_round > MAX_TURN_COUNT - 10:
                 print_with_debug("last rounds => back to base with bfs",
-                                 f=AI.out_file)
-                if self.pos == AI.map.base_pos:
+                                 f=self.out_file)
+                if self.pos == self.map.base_pos:
                     self.direction = Direction.CENTER.value
                 else:
-                    dir = AI.map.get_first_move_to_base(AI.map.nodes[self.pos],
-                                                        get_number_of_object(self.game.ant.currentResource))
+                    dir = self.map.get_first_move_to_base(self.map.nodes[self.pos],
+                                                        get_number_of_object(self.game.ant.currentResource),
+                                                        self.deadline)
                     if dir is None:
                         self.direction = Direction.CENTER.value
                     else:
                         self.direction = dir
                 print_with_debug("bfs dir:", self.direction)
             else:
-                if AI.id <= Utils.INIT_ANTS_NUM:
-                    print_with_debug("INIT ANT", f=AI.out_file)
-                    if AI.worker_state == WorkerState.InitExploring:
+                if self.id <= Utils.INIT_ANTS_NUM:
+                    print_with_debug("INIT ANT", f=self.out_file)
+                    if self.worker_state == WorkerState.InitExploring:
                         self.direction = self.get_init_ant_explore_move()
-                    elif AI.worker_state == WorkerState.Null or AI.worker_state == WorkerState.InitCollecting:
+                    elif self.worker_state == WorkerState.Null or self.worker_state == WorkerState.InitCollecting:
                         self.direction = self.get_init_ant_collect_move()
                 else:
-                    print_with_debug("NEW ANT", f=AI.out_file)
-                    if AI.worker_state == WorkerState.Null:
+                    print_with_debug("NEW ANT", f=self.out_file)
+                    if self.worker_state == WorkerState.Null:
                         self.determine_worker_state()
 
                     self.direction = self.get_new_ant_collect_move()
                     if self.direction == 0 or self.direction is None:
-                        print_with_debug("new ants at the end:", self.direction, f=AI.out_file)
-                        print_with_debug("=> move like init ant explore", f=AI.out_file)
+                        print_with_debug("new ants at the end:", self.direction, f=self.out_file)
+                        print_with_debug("=> move like init ant explore", f=self.out_file)
                         self.direction = self.get_init_ant_explore_move()
 
         # *************************************************************************************************************************
         # ########################################################SAARBAAAZ########################################################
         # *************************************************************************************************************************
         elif self.game.ant.antType == AntType.SARBAAZ.value:
-            # print_map(AI.map, self.pos, f=AI.out_file)
-            if AI.life_cycle == 1:
+            # print_map(self.map, self.pos, f=self.out_file)
+            if self.life_cycle == 1:
                 self.direction = self.random_valid_dir()
             else:
-                if AI.born_game_round < EXPLORER_SUPPORT_MAX_ROUND:
-                    AI.soldier_state = SoldierState.Explorer_Supporter
+                if self.born_game_round < EXPLORER_SUPPORT_MAX_ROUND:
+                    self.soldier_state = SoldierState.Explorer_Supporter
                 else:
-                    AI.exploration_target = None if AI.soldier_state != SoldierState.Null else AI.exploration_target
-                    AI.soldier_state = SoldierState.Null
+                    self.exploration_target = None if self.soldier_state != SoldierState.Null else self.exploration_target
+                    self.soldier_state = SoldierState.Null
                 
-                if AI.game_round > ATTACKING_SOLDIERS_ROUND:
-                    AI.soldier_state = SoldierState.AllInAttack
+                if self.game_round > ATTACKING_SOLDIERS_ROUND:
+                    self.soldier_state = SoldierState.AllInAttack
 
-                if AI.soldier_state == SoldierState.Explorer_Supporter:
+                if self.soldier_state == SoldierState.Explorer_Supporter:
                     self.direction = self.get_first_move_to_go()
-                elif AI.soldier_state == SoldierState.AllInAttack:
-                    if AI.map.enemy_base_pos is not None:
-                        self.direction = self.get_first_move_to_target(self.pos, AI.map.enemy_base_pos)
-                    elif AI.possible_base_cells:
-                        if AI.attack_random_target is None:
-                            AI.attack_random_target = random.choice(AI.possible_base_cells)
-                        if self.pos == AI.attack_random_target:
-                            AI.attack_random_target = random.choice(AI.possible_base_cells)
-                        self.direction = self.get_first_move_to_target(self.pos, AI.attack_random_target)
+                elif self.soldier_state == SoldierState.AllInAttack:
+                    if self.map.enemy_base_pos is not None:
+                        self.direction = self.get_first_move_to_target(self.pos, self.map.enemy_base_pos)
+                    elif self.possible_base_cells:
+                        if self.attack_random_target is None:
+                            self.attack_random_target = self.rng.choice(self.possible_base_cells)
+                        if self.pos == self.attack_random_target:
+                            self.attack_random_target = self.rng.choice(self.possible_base_cells)
+                        self.direction = self.get_first_move_to_target(self.pos, self.attack_random_target)
                     else:
-                        AI.exploration_target = None if AI.soldier_state != SoldierState.Null else AI.exploration_target
-                        AI.soldier_state = SoldierState.Null
+                        self.exploration_target = None if self.soldier_state != SoldierState.Null else self.exploration_target
+                        self.soldier_state = SoldierState.Null
                 else:
-                    AI.exploration_target = None if AI.soldier_state != SoldierState.Null else AI.exploration_target
-                    AI.soldier_state = SoldierState.Null
+                    self.exploration_target = None if self.soldier_state != SoldierState.Null else self.exploration_target
+                    self.soldier_state = SoldierState.Null
                 # else:
                 #     self.handle_base()
                 #     self.handle_shot()
 
                 # ############### DEFAULT SECTION ###############
-                if AI.soldier_state == SoldierState.Null:
+                if self.soldier_state == SoldierState.Null:
                     self.direction = self.discover_wrapper()
 
         self.send_msg()
@@ -674,173 +714,194 @@ class AI:
             self.message = ""
             self.value = -100000
 
+        if self.direction is None and self.game.ant.antType == AntType.KARGAR.value:
+            self.direction = self.get_field_move(self.pos)
         if self.direction is None:
             self.direction = self.random_valid_dir()
             if self.direction is None or self.direction == Direction.CENTER.value:
-                self.direction = Direction.get_random_direction()
+                self.direction = Direction.get_random_direction(self.rng)
+        self.fallback_direction = self.get_fallback_direction()
 
-        print_with_debug("turn", AI.game_round, "id", AI.id, "pos", self.pos,
-                         "worker state", AI.worker_state,
-                         "soldier state", AI.soldier_state,
+        print_with_debug("turn", self.game_round, "id", self.id, "pos", self.pos,
+                         "worker state", self.worker_state,
+                         "soldier state", self.soldier_state,
                          "dir", Direction.get_string(self.direction),
-                         "map value", self.value, f=AI.out_file)
+                         "map value", self.value, f=self.out_file)
 
         return self.message, self.value, self.direction
 
+    def get_fallback_direction(self):
+        # a worker follows the flow fields from where this turn's move takes it, otherwise
+        # one step further along this turn's move, if that cell is not known to block the ant
+        if self.direction not in [d.value for d in Direction] or self.direction == Direction.CENTER.value:
+            return Direction.CENTER.value
+        if self.game.ant.antType == AntType.KARGAR.value:
+            pos = self.get_next_pos(self.pos, self.direction)
+            node = self.map.nodes.get(pos)
+            move = self.get_field_move(self.pos if node is None or node.wall else pos)
+            if move is not None:
+                return move
+        next_pos = self.get_next_pos(self.get_next_pos(self.pos, self.direction), self.direction)
+        node = self.map.nodes.get(next_pos)
+        if node is None or node.wall or node.swamp:
+            return Direction.CENTER.value
+        return self.direction
+
     def random_valid_dir(self):
-        d = [(1, 0), (0, -1), (-1, 0), (0, 1)]
         nears = []
-        for i, dd in enumerate(d):
-            pos = tuple(map(sum, zip(self.pos, dd)))
-            pos = fix(pos, AI.w, AI.h)
-            if not AI.map.nodes[pos].swamp and not AI.map.nodes[pos].wall:
+        for direction in (1, 2, 3, 4):
+            pos = self.geometry.move(self.pos, direction)
+            if not self.map.nodes[pos].swamp and not self.map.nodes[pos].wall:
                 nears.append(pos)
-        t = random.choice(nears)
-        return Direction.get_value(AI.map.step(self.pos, t))
+        t = self.rng.choice(nears)
+        return Direction.get_value(self.map.step(self.pos, t))
 
     # @time_measure
     def round_initialization(self):
-        print_with_debug("************************************************************************", f=AI.out_file)
-        print_with_debug("************************************************************************", f=AI.out_file)
-        print_with_debug("************************************************************************", f=AI.out_file)
-        print_with_debug("ROUND START!", f=AI.out_file)
-        if AI.id == Utils.GRASS_ONLY_ID:
-            print_with_debug("Grass only ant", f=AI.out_file)
-
-        print_with_debug(AI.found_history, f=AI.out_file)
-        self.update_ids_from_chat_box()
-
-        if AI.game_round == 2:
-            prev_id = AI.id
-            AI.id = sorted(AI.ids[self.game.ant.antType]).index(AI.id) + 1
-            AI.ids[0] = [x for x in range(1, len(AI.ids[0]) + 1)]
-            AI.ids[1] = [x for x in range(1, len(AI.ids[1]) + 1)]
-            AI.latest_pos[AI.id] = AI.latest_pos[prev_id]
-
-        if AI.life_cycle > 1 and AI.id not in AI.ids[0] and \
-                AI.id not in AI.ids[1]:
+        print_with_debug("************************************************************************", f=self.out_file)
+        print_with_debug("************************************************************************", f=self.out_file)
+        print_with_debug("************************************************************************", f=self.out_file)
+        print_with_debug("ROUND START!", f=self.out_file)
+        if self.id == Utils.GRASS_ONLY_ID:
+            print_with_debug("Grass only ant", f=self.out_file)
+
+        print_with_debug(self.found_history, f=self.out_file)
+        # a worker walking its load home only needs its own view, it reads the chats it skips once it plans again
+        read_chats = not self.heading_home()
+        if read_chats:
+            self.update_ids_from_chat_box()
+
+        if self.game_round == 2:
+            prev_id = self.id
+            self.id = sorted(self.ids[self.game.ant.antType]).index(self.id) + 1
+            self.ids[0] = [x for x in range(1, len(self.ids[0]) + 1)]
+            self.ids[1] = [x for x in range(1, len(self.ids[1]) + 1)]
+            self.latest_pos[self.id] = self.latest_pos[prev_id]
+
+        if self.life_cycle > 1 and self.id not in self.ids[0] and \
+                self.id not in self.ids[1]:
             self.send_id()
 
-        if AI.game_round == -1:
+        if self.game_round == -1:
             if not self.game.chatBox.allChats:
-                AI.game_round = 1
+                self.game_round = 1
             else:
-                AI.game_round = self.game.chatBox.allChats[-1].turn + 1
+                self.game_round = self.game.chatBox.allChats[-1].turn + 1
 
-        if AI.life_cycle == 1:
-            AI.w, AI.h = self.game.mapWidth, self.game.mapHeight
-            AI.map = Graph((AI.w, AI.h), (self.game.baseX, self.game.baseY))
-            AI.latest_map = Graph((AI.w, AI.h), (self.game.baseX, self.game.baseY))
-            if AI.game_round > 2:
+        if self.life_cycle == 1:
+            if self.game_round > 2:
                 self.make_id(min_id=INIT_ANTS_NUM + 1)
-            elif AI.game_round == 1:
+            elif self.game_round == 1:
                 self.make_id()
-                AI.first_id = AI.id
+                self.first_id = self.id
             self.send_id()
-            AI.latest_pos[AI.id] = ((-1, -1), -1)
-            AI.born_game_round = AI.game_round - 1
-
-        for k, v in AI.map.nodes.items():
-            AI.latest_map.nodes[k].wall = v.wall
-            AI.latest_map.nodes[k].bread = v.bread
-            AI.latest_map.nodes[k].discovered = v.discovered
-            AI.latest_map.nodes[k].swamp = v.swamp
-            AI.latest_map.nodes[k].trap = v.trap
-            AI.latest_map.nodes[k].grass = v.grass
-            AI.latest_map.nodes[k].enemy_soldiers = v.enemy_soldiers
+            self.latest_pos[self.id] = ((-1, -1), -1)
+            self.born_game_round = self.game_round - 1
+
+        self.latest_map.update_from(self.map)
 
         self.pos = (self.game.ant.currentX, self.game.ant.currentY)
-        print_with_debug("ROUND:", self.game_round, f=AI.out_file)
-        print_with_debug("POS:", self.pos, f=AI.out_file)
+        print_with_debug("ROUND:", self.game_round, f=self.out_file)
+        print_with_debug("POS:", self.pos, f=self.out_file)
         self.search_neighbors()
-        self.update_map_from_chat_box()
+        if read_chats:
+            self.update_map_from_chat_box()
         self.update_map_from_neighbors()
 
-        if AI.game_round > 5 and not AI.shot_once:
+        if self.game_round > 5 and not self.shot_once:
             self.check_for_base()
         if self.game.ant.antType == AntType.SARBAAZ.value:
             self.update_support_cells_from_chat_box()
             self.soldier_update_history()
-            print_with_debug("soldier history", AI.soldier_path_neighbors_history, f=AI.out_file)
+            print_with_debug("soldier history", self.soldier_path_neighbors_history, f=self.out_file)
+
+        if read_chats:
+            self.check_for_possible_base_cells()
+        self.own_cells_history.append(self.pos)
 
-        self.check_for_possible_base_cells()
-        AI.own_cells_history.append(self.pos)
+        if self.out_file is not None:
+            print_with_debug("known cells", [k for k, v in self.map.nodes.items() if v.discovered], f=self.out_file)
+        print_with_debug("found history", self.found_history, f=self.out_file)
 
-        print_with_debug("known cells", [k for k, v in AI.map.nodes.items() if v.discovered], f=AI.out_file)
-        print_with_debug("found history", AI.found_history, f=AI.out_file)
+    def heading_home(self):
+        # the worker turns below that only walk to base, past the first turns where all the chats are read
+        if self.game.ant.antType != AntType.KARGAR.value or self.life_cycle <= 3:
+            return False
+        resource = self.game.ant.currentResource.value
+        return (resource is not None and resource >= (WORKER_MAX_CARRYING_RESOURCE_AMOUNT / 2)) \
+            or self.game_round > MAX_TURN_COUNT - 10
 
     # @time_measure
     def end_round(self):
-        AI.latest_pos[AI.id] = (self.pos, AI.game_round)
-        AI.game_round += 1
-        AI.life_cycle += 1
-        AI.prev_round_resource = self.game.ant.currentResource.value
-        AI.prev_hp = self.game.ant.health
-        AI.prev_es = sum([AI.map.nodes[v].enemy_soldiers for v in
-                          get_view_distance_neighbors(self.pos, AI.w, AI.h, self.game.ant.viewDistance)])
-        if not AI.shot_once and self.shot:
-            AI.shot_once = True
+        self.latest_pos[self.id] = (self.pos, self.game_round)
+        self.game_round += 1
+        self.life_cycle += 1
+        self.prev_round_resource = self.game.ant.currentResource.value
+        self.prev_hp = self.game.ant.health
+        self.prev_es = sum([self.map.nodes[v].enemy_soldiers for v in
+                          get_view_distance_neighbors(self.pos, self.w, self.h, self.game.ant.viewDistance)])
+        if not self.shot_once and self.shot:
+            self.shot_once = True
 
     # @time_measure
     def send_msg(self):
-        if AI.life_cycle > 1 and self.game.ant.antType == AntType.SARBAAZ.value and self.reached_sup_cell:
-            self.message = encode_support_cell(AI.id, self.pos, AI.w, AI.h, self.resource_count)
+        if self.life_cycle > 1 and self.game.ant.antType == AntType.SARBAAZ.value and self.reached_sup_cell:
+            self.message = encode_support_cell(self.id, self.pos, self.w, self.h, self.resource_count)
             self.value = VALUES["sup"]
-        elif AI.life_cycle > 1 and (not self.shot or self.value == VALUES["enemy_base"]):
+        elif self.life_cycle > 1 and (not self.shot or self.value == VALUES["enemy_base"]):
             if self.direction is None:
-                print_with_debug("turn", AI.game_round, "id", AI.id, "pos", self.pos,
-                                 "worker state", AI.worker_state,
-                                 "soldier state", AI.soldier_state,
+                print_with_debug("turn", self.game_round, "id", self.id, "pos", self.pos,
+                                 "worker state", self.worker_state,
+                                 "soldier state", self.soldier_state,
                                  "map value", self.value,
-                                 "enemy base pos", AI.map.enemy_base_pos, f=AI.out_file)
-            if AI.map is not None:
-                dis_list = get_view_distance_neighbors(self.pos, AI.w, AI.h, 4)
-                neighbors = {pos: n for pos, n in AI.map.nodes.items() if
-                             pos in dis_list}
+                                 "enemy base pos", self.map.enemy_base_pos, f=self.out_file)
+            if self.map is not None:
+                dis_list = get_view_distance_neighbors(self.pos, self.w, self.h, 4)
+                neighbors = {pos: self.map.nodes[pos] for pos in dis_list}
                 if self.reached_sup_cell:
                     neighbors = {pos: Node(n.pos, n.discovered, n.wall, n.swamp, n.trap, 0, 0, 0, 0, 0, n.enemy_soldiers) for pos, n in neighbors.items()}
                 self.encoded_neighbors = encode_graph_nodes(self.pos,
                                                             neighbors,
-                                                            AI.w, AI.h,
+                                                            self.w, self.h,
                                                             self.game.viewDistance,
-                                                            AI.id, self.direction,
+                                                            self.id, self.direction,
                                                             self.shot,
-                                                            AI.map.enemy_base_pos)
+                                                            self.map.enemy_base_pos)
 
                 self.message = self.encoded_neighbors
-        elif AI.life_cycle > 1 and self.shot and self.game.ant.antType == AntType.SARBAAZ.value and AI.soldier_state == SoldierState.Null:
-            possible_cells = get_view_distance_neighbors(AI.latest_pos[AI.id][0], AI.w,
-                                                         AI.h, 6, exact=True)
+        elif self.life_cycle > 1 and self.shot and self.game.ant.antType == AntType.SARBAAZ.value and self.soldier_state == SoldierState.Null:
+            possible_cells = get_view_distance_neighbors(self.latest_pos[self.id][0], self.w,
+                                                         self.h, 6, exact=True)
             possible_cells = [p for p in possible_cells if
-                              p not in AI.soldier_path_neighbors_history]
-            AI.possible_base_cells = list(set(AI.possible_base_cells).
+                              p not in self.soldier_path_neighbors_history]
+            self.possible_base_cells = list(set(self.possible_base_cells).
                                           intersection(possible_cells))
-            print_with_debug("tell them", AI.latest_pos[AI.id][0], possible_cells, AI.own_cells_history[-3],
-                             f=AI.out_file)
-            self.message = encode_possible_cells(AI.id, AI.latest_pos[AI.id][0],
-                                                 AI.own_cells_history[-3],
-                                                 AI.w, AI.h, possible_cells)
-            print_with_debug(self.message, f=AI.out_file)
-            self.direction = solve_bt(AI.map, self.pos, max_distance=5)
-            AI.soldier_state = SoldierState.HasBeenShot
+            print_with_debug("tell them", self.latest_pos[self.id][0], possible_cells, self.own_cells_history[-3],
+                             f=self.out_file)
+            self.message = encode_possible_cells(self.id, self.latest_pos[self.id][0],
+                                                 self.own_cells_history[-3],
+                                                 self.w, self.h, possible_cells)
+            print_with_debug(self.message, f=self.out_file)
+            self.direction = solve_bt(self.map, self.pos, max_distance=5, deadline=self.deadline)
+            self.soldier_state = SoldierState.HasBeenShot
             self.value = VALUES["shot"]
 
     def determine_worker_state(self):
         # TODO discuss the logic and improve
-        # AI.worker_state = WorkerState.Exploring
-        total_grass = sum([v.grass for k, v in AI.map.nodes.items()])
-        total_bread = sum([v.bread for k, v in AI.map.nodes.items()])
+        # self.worker_state = WorkerState.Exploring
+        total_grass = self.map.resource_sum('grass')
+        total_bread = self.map.resource_sum('bread')
         diff = total_grass - total_bread
         if -20 <= diff <= 20 or diff > 20 or total_bread == 0:
-            AI.worker_state = WorkerState.GrassOnly
+            self.worker_state = WorkerState.GrassOnly
         elif diff < -20 or total_grass == 0:
-            AI.worker_state = WorkerState.BreadOnly
+            self.worker_state = WorkerState.BreadOnly
         else:
-            AI.worker_state = WorkerState.Exploring
+            self.worker_state = WorkerState.Exploring
 
     def worker_explore(self):
         # third version (BT)
-        d = solve_bt(AI.map, self.pos)
+        d = solve_bt(self.map, self.pos, deadline=self.deadline)
         return d
 
         # second version
@@ -850,28 +911,28 @@ class AI:
         #
         # # right, up, left, down
         # scores = self.calculate_score(size)
-        # print_with_debug("scores, right up left down", scores, f=AI.out_file)
+        # print_with_debug("scores, right up left down", scores, f=self.out_file)
         # # TODO add the extra step when two sides have the same scores
         # d = [(1, 0), (0, -1), (-1, 0), (0, 1)]
-        # possible_pos = [fix(tuple(map(sum, zip(self.pos, dd))), AI.w, AI.h)
+        # possible_pos = [fix(tuple(map(sum, zip(self.pos, dd))), self.w, self.h)
         #                 for dd in d]
         # same_score_indices = [i + 1 for i, s in enumerate(scores)
         #                       if s == max(scores) and
-        #                       possible_pos[i] != AI.latest_pos[AI.id][0]]
+        #                       possible_pos[i] != self.latest_pos[self.id][0]]
         # return random.choice(same_score_indices) if same_score_indices else \
         #     scores.index(max(scores)) + 1
 
         # first version
         # # right -> up -> left -> down
-        # points = [fix((self.pos[0] + 1, self.pos[1]), AI.w, AI.h),
-        #           fix((self.pos[0], self.pos[1] + 1), AI.w, AI.h),
-        #           fix((self.pos[0] - 1, self.pos[1]), AI.w, AI.h),
-        #           fix((self.pos[0], self.pos[1] - 1), AI.w, AI.h)]
+        # points = [fix((self.pos[0] + 1, self.pos[1]), self.w, self.h),
+        #           fix((self.pos[0], self.pos[1] + 1), self.w, self.h),
+        #           fix((self.pos[0] - 1, self.pos[1]), self.w, self.h),
+        #           fix((self.pos[0], self.pos[1] - 1), self.w, self.h)]
         # num_non_discovered = []
         # for p in points:
-        #     new_positions = get_view_distance_neighbors(p, AI.w, AI.h, self.game.ant.viewDistance)
+        #     new_positions = get_view_distance_neighbors(p, self.w, self.h, self.game.ant.viewDistance)
         #     n = sum([pos for pos in new_positions if
-        #              not AI.map.nodes[pos].discovered])
+        #              not self.map.nodes[pos].discovered])
         #     num_non_discovered.append(n)
         #
         # if num_non_discovered.count(max(num_non_discovered)) == 1:
@@ -884,8 +945,8 @@ class AI:
         for i in range(self.pos[0] - size, self.pos[0] + size + 1):
             for j in range(self.pos[1] - size, self.pos[1] + size + 1):
                 pos = tuple(map(sum, zip(self.pos, (i, j))))
-                pos = fix(pos, AI.w, AI.h)
-                if not AI.map.nodes[pos].discovered:
+                pos = fix(pos, self.w, self.h)
+                if not self.map.nodes[pos].discovered:
                     return False
         return True
 
@@ -902,12 +963,12 @@ class AI:
             finish = tuple(map(sum, zip(self.pos, dd[1])))
             for i in range(start[0], finish[0] + 1):
                 for j in range(start[1], finish[1] + 1):
-                    pos = fix((i, j), AI.w, AI.h)
-                    if not AI.map.nodes[pos].discovered:
+                    pos = fix((i, j), self.w, self.h)
+                    if not self.map.nodes[pos].discovered:
                         scores[k] += 1
-                    if AI.map.nodes[pos].discovered and pos != self.pos:
+                    if self.map.nodes[pos].discovered and pos != self.pos:
                         scores[k] -= 1
-                        scores[k] -= int(AI.map.nodes[pos].ally_workers > 0)
+                        scores[k] -= int(self.map.nodes[pos].ally_workers > 0)
 
         # remove a direction's score if we are facing a wall
         # based on path existence (check 3 neighbor walls)
@@ -915,147 +976,144 @@ class AI:
         d = [(1, 0), (0, -1), (-1, 0), (0, 1)]
         for i, dd in enumerate(d):
             pos = tuple(map(sum, zip(self.pos, dd)))
-            pos = fix(pos, AI.w, AI.h)
-            if AI.map.nodes[pos].discovered and AI.map.nodes[pos].wall:
+            pos = fix(pos, self.w, self.h)
+            if self.map.nodes[pos].discovered and self.map.nodes[pos].wall:
                 scores[(i + 1) % 4] = scores[i] if scores[(i + 1) % 4] != -500 else -500
                 scores[(i + 3) % 4] = scores[i] if scores[(i + 3) % 4] != -500 else -500
                 scores[i] = -500
-            elif not AI.map.nodes[pos].discovered and AI.map.nodes[pos].wall:
-                print_with_debug("HUGE MOTHERFUCKING ERROR!", f=AI.out_file)
+            elif not self.map.nodes[pos].discovered and self.map.nodes[pos].wall:
+                print_with_debug("HUGE MOTHERFUCKING ERROR!", f=self.out_file)
 
         return scores
 
     # @time_measure
     def check_for_base(self):
         hp = self.game.ant.health
-        neighbors = get_view_distance_neighbors(AI.latest_pos[AI.id][0], AI.w, AI.h,
+        neighbors = get_view_distance_neighbors(self.latest_pos[self.id][0], self.w, self.h,
                                                 self.game.ant.viewDistance)
-        cond = (hp == AI.prev_hp - BASE_DMG and AI.prev_es == 0) or \
-               (hp == AI.prev_hp - BASE_DMG - SOLDIER_DMG and AI.prev_es == 1) or \
-               (hp == AI.prev_hp - BASE_DMG - 2 * SOLDIER_DMG and AI.prev_es == 2)
-        print_with_debug("HERE IS ES", [AI.map.nodes[v] for v in neighbors if AI.map.nodes[v].enemy_soldiers > 0],
-                         f=AI.out_file)
+        cond = (hp == self.prev_hp - BASE_DMG and self.prev_es == 0) or \
+               (hp == self.prev_hp - BASE_DMG - SOLDIER_DMG and self.prev_es == 1) or \
+               (hp == self.prev_hp - BASE_DMG - 2 * SOLDIER_DMG and self.prev_es == 2)
+        print_with_debug("HERE IS ES", [self.map.nodes[v] for v in neighbors if self.map.nodes[v].enemy_soldiers > 0],
+                         f=self.out_file)
         if cond:
-            print_with_debug("YESSSSS I GOT SHOTTTTTTTTTT", f=AI.out_file)
+            print_with_debug("YESSSSS I GOT SHOTTTTTTTTTT", f=self.out_file)
             self.shot = True
-            if AI.soldier_state == SoldierState.Null or AI.soldier_state == SoldierState.Explorer_Supporter:
-                AI.soldier_state = SoldierState.HasBeenShot
+            if self.soldier_state == SoldierState.Null or self.soldier_state == SoldierState.Explorer_Supporter:
+                self.soldier_state = SoldierState.HasBeenShot
 
     def find_possible_base_cells(self):
-        for target in AI.soldier_targets:
-            possible_cells = Utils.get_view_distance_neighbors(target, AI.w,
-                                                               AI.h, 6, True)
+        for target in self.soldier_targets:
+            possible_cells = Utils.get_view_distance_neighbors(target, self.w,
+                                                               self.h, 6, True)
             possible_cells = [p for p in possible_cells if
-                              not AI.map.nodes[p].discovered and
-                              not AI.map.nodes[p].wall]
-            AI.possible_base_cells = list(set(AI.possible_base_cells)
+                              not self.map.nodes[p].discovered and
+                              not self.map.nodes[p].wall]
+            self.possible_base_cells = list(set(self.possible_base_cells)
                                           .intersection(possible_cells))
-            if not AI.possible_base_cells:
-                print_with_debug("HUGE MOTHERFUCKING ERROR!", f=AI.out_file)
+            if not self.possible_base_cells:
+                print_with_debug("HUGE MOTHERFUCKING ERROR!", f=self.out_file)
 
     def chosse_best_target(self):
-        if len(AI.soldier_targets) == 1:
-            return AI.soldier_targets[0]
+        if len(self.soldier_targets) == 1:
+            return self.soldier_targets[0]
 
-        if AI.soldier_targets:
+        if self.soldier_targets:
             costs = []
-            for target in AI.soldier_targets:
-                costs.append(len(AI.map.get_path(AI.map.nodes[AI.map.base_pos], AI.map.nodes[target])))
-            min_i = AI.soldier_targets.index(min(costs))
-            return AI.soldier_targets[min_i]
+            for target in self.soldier_targets:
+                costs.append(len(self.map.get_path(self.map.nodes[self.map.base_pos], self.map.nodes[target], self.deadline)))
+            min_i = self.soldier_targets.index(min(costs))
+            return self.soldier_targets[min_i]
 
     # @time_measure
     def soldier_update_history(self):
         if not self.shot:
-            neighbors = get_view_distance_neighbors(AI.latest_pos[AI.id][0], AI.w, AI.h, 6)
-            new_neighbors = [p for p in neighbors if p not in AI.soldier_path_neighbors_history]
-            AI.soldier_path_neighbors_history += new_neighbors.copy()
+            neighbors = get_view_distance_neighbors(self.latest_pos[self.id][0], self.w, self.h, 6)
+            new_neighbors = [p for p in neighbors if p not in self.soldier_path_neighbors_history]
+            self.soldier_path_neighbors_history += new_neighbors.copy()
 
     # @time_measure
     def check_for_possible_base_cells(self):
-        possible_msgs = [msg.text for msg in
-                         self.game.chatBox.allChats[-MAX_MESSAGES_PER_TURN:] if
-                         msg.text.startswith("sh") and not msg.text.startswith("sc") and
-                         msg.turn == AI.game_round - 1]
-        if AI.life_cycle == 1:
-            possible_msgs = [msg.text for msg in self.game.chatBox.allChats if
-                             msg.text.startswith("sh") and not msg.text.startswith("sc")]
-
-        for m in possible_msgs:
-            print_with_debug("possible msg:", m)
-            ant_id, pos, prev_pos, possible_cells = decode_possible_cells(m, AI.w, AI.h)
-            if not AI.possible_base_cells:
-                AI.possible_base_cells = possible_cells
-            else:
-                AI.possible_base_cells = list(set(AI.possible_base_cells).
-                                              intersection(possible_cells))
-            if (prev_pos, pos) not in AI.near_base_safe_cells:
-                AI.near_base_safe_cells.append((prev_pos, pos))
+        if self.life_cycle == 1:
+            self.dispatch_chats("sh")
+        else:
+            self.dispatch_new_chats("sh")
+
+    def on_possible_cells_message(self, chat, payload):
+        print_with_debug("possible msg:", chat.text)
+        ant_id, pos, prev_pos, possible_cells = payload
+        if not self.possible_base_cells:
+            self.possible_base_cells = possible_cells
+        else:
+            self.possible_base_cells = list(set(self.possible_base_cells).
+                                          intersection(possible_cells))
+        if (prev_pos, pos) not in self.near_base_safe_cells:
+            self.near_base_safe_cells.append((prev_pos, pos))
 
     def get_soldier_first_move_to_discover(self, init=True):
         if init:
-            AI.latest_map.bfs(AI.map.nodes[self.pos])
-        move, AI.exploration_target = AI.latest_map.get_first_move_to_discover(
-            AI.map.nodes[self.pos], self.pos, len(AI.ids[self.game.ant.antType]), AI.id, AI.ids[self.game.ant.antType]
+            self.latest_map.bfs(self.map.nodes[self.pos], self.deadline)
+        move, self.exploration_target = self.latest_map.get_first_move_to_discover(
+            self.map.nodes[self.pos], self.pos, len(self.ids[self.game.ant.antType]), self.id, self.ids[self.game.ant.antType],
+            self.deadline, self.rng
         )
         return Direction.get_value(move)
 
     def get_soldier_first_node_to_support(self):
         return Direction.get_value(
-            AI.map.step(self.pos, AI.map.get_best_node_to_support(self.pos))
+            self.map.step(self.pos, self.map.get_best_node_to_support(self.pos))
         )
 
     def get_first_move_to_target(self, src, dest, unsafe_cells=None, name='soldier'):
-        print_with_debug(src, dest, f=AI.out_file)
-        print_with_debug(AI.map.get_path_with_non_discovered(AI.map.nodes[src], AI.map.nodes[dest], unsafe_cells),
-                         f=AI.out_file)
-        return Direction.get_value(
-            AI.map.step(
-                src, AI.map.get_path_with_non_discovered(AI.map.nodes[src], AI.map.nodes[dest], unsafe_cells, name)
-            )
-        )
+        print_with_debug(src, dest, f=self.out_file)
+        first_move = self.map.get_path_with_non_discovered(self.map.nodes[src], self.map.nodes[dest], unsafe_cells, name,
+                                                           deadline=self.deadline)
+        print_with_debug(first_move, f=self.out_file)
+        if first_move is None:
+            return Direction.CENTER.value
+        return Direction.get_value(self.map.step(src, first_move))
 
     # @time_measure
     def handle_base(self):
-        if AI.map.enemy_base_pos is not None and \
-                AI.soldier_state == SoldierState.Null:
-            AI.soldier_state = SoldierState.BK_GoingNearEnemyBase
+        if self.map.enemy_base_pos is not None and \
+                self.soldier_state == SoldierState.Null:
+            self.soldier_state = SoldierState.BK_GoingNearEnemyBase
             near_base_cells = get_view_distance_neighbors(
-                AI.map.enemy_base_pos, AI.w, AI.h, BASE_RANGE + 1, exact=True)
+                self.map.enemy_base_pos, self.w, self.h, BASE_RANGE + 1, exact=True)
             # TODO manhattan dist or bfs?
-            distances = [manhattan_dist(self.pos, p, AI.w, AI.h) for p in
+            distances = [manhattan_dist(self.pos, p, self.w, self.h) for p in
                          near_base_cells]
             candidates_idx = sorted(enumerate(distances), key=lambda x: x[1])[:5]
             # candidates_idx = self.remove_occupied_from_candidates(candidates_idx)
-            AI.chosen_near_base_cell_BK = near_base_cells[random.choice(candidates_idx)[0]]
+            self.chosen_near_base_cell_BK = near_base_cells[self.rng.choice(candidates_idx)[0]]
             print_with_debug("BASE WAS FOUND STATE",
                              "pos", self.pos,
                              "near base cells", near_base_cells,
                              "distances", distances,
-                             "chosen near cell BK", AI.chosen_near_base_cell_BK,
-                             f=AI.out_file)
+                             "chosen near cell BK", self.chosen_near_base_cell_BK,
+                             f=self.out_file)
 
         # going to the chosen cell near enemy base
-        if AI.soldier_state == SoldierState.BK_GoingNearEnemyBase:
-            if self.pos == AI.chosen_near_base_cell_BK:
-                AI.soldier_state = SoldierState.BK_StayingNearBase
-                AI.chosen_near_base_cell_BK = None
+        if self.soldier_state == SoldierState.BK_GoingNearEnemyBase:
+            if self.pos == self.chosen_near_base_cell_BK:
+                self.soldier_state = SoldierState.BK_StayingNearBase
+                self.chosen_near_base_cell_BK = None
                 print_with_debug("BK GOING NEAR ENEMY BASE STATE",
                                  "REACHED DEST",
                                  "pos", self.pos,
                                  "chosen near cell BK",
-                                 AI.chosen_near_base_cell_BK,
-                                 f=AI.out_file)
+                                 self.chosen_near_base_cell_BK,
+                                 f=self.out_file)
             else:
                 self.direction = self.get_first_move_to_target(self.pos,
-                                                               AI.chosen_near_base_cell_BK)
+                                                               self.chosen_near_base_cell_BK)
                 print_with_debug("BK GOING NEAR ENEMY BASE STATE",
                                  "pos", self.pos,
                                  "chosen near cell BK",
-                                 AI.chosen_near_base_cell_BK,
-                                 f=AI.out_file)
+                                 self.chosen_near_base_cell_BK,
+                                 f=self.out_file)
 
-        if AI.soldier_state == SoldierState.BK_StayingNearBase:
+        if self.soldier_state == SoldierState.BK_StayingNearBase:
             # TODO decide to either stay or attack
             # ATTACK
             self.direction = Direction.CENTER.value
@@ -1065,162 +1123,162 @@ class AI:
             print_with_debug("BK STAYING NEAR BASE STATE",
                              "pos", self.pos,
                              "allies", ally_s,
-                             f=AI.out_file)
+                             f=self.out_file)
             # TODO add other attacking conditions
             if ally_s >= ALLIES_REQUIRED_TO_ATTACK:
-                AI.soldier_state = SoldierState.AttackingBase
+                self.soldier_state = SoldierState.AttackingBase
 
     # @time_measure
     def handle_shot(self):
-        if AI.soldier_state == SoldierState.HasBeenShot:
-            self.direction = Direction.get_value(AI.map.step(AI.latest_pos[AI.id][0], self.pos))
-            if AI.latest_pos[AI.id][0] == self.pos:
-                self.direction = Direction.get_random_direction()
+        if self.soldier_state == SoldierState.HasBeenShot:
+            self.direction = Direction.get_value(self.map.step(self.latest_pos[self.id][0], self.pos))
+            if self.latest_pos[self.id][0] == self.pos:
+                self.direction = Direction.get_random_direction(self.rng)
             print_with_debug("GOT SHOT STATE",
-                             "prev pos", AI.latest_pos[AI.id][0],
+                             "prev pos", self.latest_pos[self.id][0],
                              "pos", self.pos,
                              "dir", self.direction,
-                             f=AI.out_file)
+                             f=self.out_file)
 
-        if AI.soldier_state == SoldierState.Null and AI.near_base_safe_cells:
-            AI.soldier_state = SoldierState.BU_GoingNearEnemyBase
+        if self.soldier_state == SoldierState.Null and self.near_base_safe_cells:
+            self.soldier_state = SoldierState.BU_GoingNearEnemyBase
             # TODO manhattan dist or bfs?
-            distances = [manhattan_dist(self.pos, p[0], AI.w, AI.h) for p in
-                         AI.near_base_safe_cells]
+            distances = [manhattan_dist(self.pos, p[0], self.w, self.h) for p in
+                         self.near_base_safe_cells]
             candidates_idx = sorted(enumerate(distances), key=lambda x: x[1])[:5]
             # candidates_idx = self.remove_occupied_from_candidates(candidates_idx)
-            AI.chosen_near_base_cell_BU = AI.near_base_safe_cells[random.choice(candidates_idx)[0]]
+            self.chosen_near_base_cell_BU = self.near_base_safe_cells[self.rng.choice(candidates_idx)[0]]
             print_with_debug("FOUND SHOT MSG STATE",
                              "pos", self.pos,
-                             "near base cells", AI.near_base_safe_cells,
+                             "near base cells", self.near_base_safe_cells,
                              "distances", distances,
                              "chosen cell BU",
-                             AI.chosen_near_base_cell_BU,
-                             f=AI.out_file)
+                             self.chosen_near_base_cell_BU,
+                             f=self.out_file)
 
-        if AI.soldier_state == SoldierState.BU_GoingNearEnemyBase:
-            if self.pos == AI.chosen_near_base_cell_BU[0]:
-                AI.soldier_state = SoldierState.BU_StayingNearBase
+        if self.soldier_state == SoldierState.BU_GoingNearEnemyBase:
+            if self.pos == self.chosen_near_base_cell_BU[0]:
+                self.soldier_state = SoldierState.BU_StayingNearBase
                 print_with_debug("BU GOING NEAR ENEMY BASE STATE",
                                  "REACHED DEST",
                                  "pos", self.pos,
                                  "chosen cell BU",
-                                 AI.chosen_near_base_cell_BU,
-                                 f=AI.out_file)
+                                 self.chosen_near_base_cell_BU,
+                                 f=self.out_file)
             else:
-                self.direction = self.get_first_move_to_target(self.pos, AI.chosen_near_base_cell_BU[0])
+                self.direction = self.get_first_move_to_target(self.pos, self.chosen_near_base_cell_BU[0])
                 print_with_debug("BU GOING NEAR ENEMY BASE STATE",
                                  "pos", self.pos,
                                  "dir", self.direction,
                                  "chosen cell BU",
-                                 AI.chosen_near_base_cell_BU,
-                                 f=AI.out_file)
+                                 self.chosen_near_base_cell_BU,
+                                 f=self.out_file)
 
-        if AI.soldier_state == SoldierState.BU_StayingNearBase:
+        if self.soldier_state == SoldierState.BU_StayingNearBase:
             self.direction = Direction.CENTER.value
             ally_s = len([a for a in self.game.ant.getMapRelativeCell(0, 0).ants if
                  a.antType == AntType.SARBAAZ.value and a.antTeam == AntTeam.ALLIED.value])
             print_with_debug("BU STAYING NEAR BASE STATE",
                              "pos", self.pos,
                              "allies", ally_s,
-                             f=AI.out_file)
+                             f=self.out_file)
             # TODO add other attacking conditions
             if ally_s >= ALLIES_REQUIRED_TO_ATTACK:
-                if AI.possible_base_cells:
-                    AI.attack_random_target = random.choice(AI.possible_base_cells)
+                if self.possible_base_cells:
+                    self.attack_random_target = self.rng.choice(self.possible_base_cells)
                 else:
                     # TODO what to do?
                     pass
-                AI.soldier_state = SoldierState.AttackingBase
+                self.soldier_state = SoldierState.AttackingBase
 
-        if AI.soldier_state == SoldierState.AttackingBase:
-            if AI.map.enemy_base_pos is not None:
-                if self.pos == AI.map.enemy_base_pos:
+        if self.soldier_state == SoldierState.AttackingBase:
+            if self.map.enemy_base_pos is not None:
+                if self.pos == self.map.enemy_base_pos:
                     self.direction = Direction.CENTER.value
                 else:
-                    self.direction = self.get_first_move_to_target(self.pos, AI.map.enemy_base_pos)
+                    self.direction = self.get_first_move_to_target(self.pos, self.map.enemy_base_pos)
                 print_with_debug("ATT BASE FOUND",
                                  "pos", self.pos,
-                                 "target", AI.map.enemy_base_pos,
+                                 "target", self.map.enemy_base_pos,
                                  "dir", self.direction,
-                                 f=AI.out_file)
+                                 f=self.out_file)
             else:
-                if AI.attack_random_target is not None:
-                    if self.pos != AI.attack_random_target:
-                        self.direction = self.get_first_move_to_target(self.pos, AI.attack_random_target)
+                if self.attack_random_target is not None:
+                    if self.pos != self.attack_random_target:
+                        self.direction = self.get_first_move_to_target(self.pos, self.attack_random_target)
                     else:
                         self.direction = Direction.CENTER.value
                     print_with_debug("ATT BASE NOT FOUND",
                                      "dir from random",
                                      "pos", self.pos,
-                                     "random target", AI.attack_random_target,
+                                     "random target", self.attack_random_target,
                                      "dir", self.direction,
-                                     f=AI.out_file)
+                                     f=self.out_file)
                 else:
                     pass
 
     def get_first_move_to_go(self):
         bread_number = 0
         grass_number = 0
-        AI.map.bfs(AI.map.nodes[self.pos])
-        distance_to_base = AI.map.bfs_info['dist'][AI.map.base_pos]
-        reachable_resource = AI.map.get_reachable_resource_from_base()
-        if distance_to_base < MIN_DIST_SUPPORT:
+        self.map.bfs(self.map.nodes[self.pos], self.deadline)
+        distance_to_base = self.map.bfs_info['dist'].get(self.map.base_pos)
+        reachable_resource = self.map.get_reachable_resource_from_base(self.deadline)
+        if distance_to_base is None or distance_to_base < MIN_DIST_SUPPORT:
             return self.discover_wrapper()
 
         for d in self.visible_bread:
             num, pos = d["number"], d["pos"]
-            if AI.map.bfs_info['dist'].get(pos) is not None and pos in reachable_resource:
+            if self.map.bfs_info['dist'].get(pos) is not None and pos in reachable_resource:
                 bread_number += num
 
         for d in self.visible_grass:
             num, pos = d["number"], d["pos"]
-            if AI.map.bfs_info['dist'].get(pos) is not None and pos in reachable_resource:
+            if self.map.bfs_info['dist'].get(pos) is not None and pos in reachable_resource:
                 grass_number += num
 
         best_dir = Direction.CENTER.value
 
         if self.get_value(bread_number, grass_number, distance_to_base) >= VALUE_TO_SUPPORT:
-            visible_cells = get_view_distance_neighbors(self.pos, *AI.map.dim, view=3, exact=False, sort=False)
+            visible_cells = get_view_distance_neighbors(self.pos, *self.map.dim, view=3, exact=False, sort=False)
             best_value = sum(
                 [
-                    (AI.map.nodes[cell].bread + AI.map.nodes[cell].grass) / (manhattan_dist(
-                        self.pos, cell, *AI.map.dim
-                    ) or 1) for cell in visible_cells if AI.map.nodes[cell].bread + AI.map.nodes[cell].grass > 0
+                    (self.map.nodes[cell].bread + self.map.nodes[cell].grass) / (manhattan_dist(
+                        self.pos, cell, *self.map.dim
+                    ) or 1) for cell in visible_cells if self.map.nodes[cell].bread + self.map.nodes[cell].grass > 0
                 ]
             )
-            AI.exploration_target = None
-            if self.pos not in AI.sup_cells:
-                AI.sup_cells.append(self.pos)
+            self.exploration_target = None
+            if self.pos not in self.sup_cells:
+                self.sup_cells.append(self.pos)
                 self.reached_sup_cell = True
                 self.resource_count = bread_number + grass_number
-            neighbors = AI.map.get_neighbors(self.pos)
+            neighbors = self.map.get_neighbors(self.pos)
 
             for neighbor in neighbors:
-                visible_cells = get_view_distance_neighbors(neighbor, *AI.map.dim, view=3, exact=False, sort=False)
+                visible_cells = get_view_distance_neighbors(neighbor, *self.map.dim, view=3, exact=False, sort=False)
                 number_of_resource = sum(
                     [
                         (
-                                AI.map.nodes[cell].bread + AI.map.nodes[cell].grass
-                        ) for cell in visible_cells if AI.map.nodes[cell].bread + AI.map.nodes[cell].grass > 0
+                                self.map.nodes[cell].bread + self.map.nodes[cell].grass
+                        ) for cell in visible_cells if self.map.nodes[cell].bread + self.map.nodes[cell].grass > 0
                     ]
                 )
                 if number_of_resource < bread_number + grass_number:
                     continue
                 value = sum(
                     [
-                        (AI.map.nodes[cell].bread + AI.map.nodes[cell].grass) / (manhattan_dist(
-                            neighbor, cell, *AI.map.dim
-                        ) or 1) for cell in visible_cells if AI.map.nodes[cell].bread + AI.map.nodes[cell].grass > 0
+                        (self.map.nodes[cell].bread + self.map.nodes[cell].grass) / (manhattan_dist(
+                            neighbor, cell, *self.map.dim
+                        ) or 1) for cell in visible_cells if self.map.nodes[cell].bread + self.map.nodes[cell].grass > 0
                     ]
                 )
                 if value > best_value:
                     best_value = value
-                    best_dir = Direction.get_value(AI.map.step(self.pos, neighbor))
+                    best_dir = Direction.get_value(self.map.step(self.pos, neighbor))
             return best_dir
 
-        if not AI.exploration_target and AI.sup_cells and self.pos not in AI.sup_cells:
-            AI.exploration_target = AI.sup_cells[-1]
+        if not self.exploration_target and self.sup_cells and self.pos not in self.sup_cells:
+            self.exploration_target = self.sup_cells[-1]
 
         return self.discover_wrapper()
 
@@ -1228,18 +1286,18 @@ class AI:
         return bread_number + grass_number + distance_to_base
 
     def discover_wrapper(self):
-        if AI.exploration_target is None:
+        if self.exploration_target is None:
             return self.get_soldier_first_move_to_discover()
         else:
-            if self.pos == AI.exploration_target:
-                AI.exploration_target = None
+            if self.pos == self.exploration_target:
+                self.exploration_target = None
                 return self.get_soldier_first_move_to_discover()
             else:
-                return self.get_first_move_to_target(self.pos, AI.exploration_target)
+                return self.get_first_move_to_target(self.pos, self.exploration_target)
 
     def remove_occupied_from_candidates(self, candidates_idx):
         temp = candidates_idx.copy()
-        for pos in [p[0] for p in AI.latest_pos.values()]:
+        for pos in [p[0] for p in self.latest_pos.values()]:
             if pos not in candidates_idx:
                 temp.append(pos)
         return temp
@@ -1,12 +1,14 @@
-import time
-
 from Model import Direction
+from deadline import NO_DEADLINE
 from Utils import get_view_distance_neighbors, time_measure
 
 
+BT_BUDGET = 0.08
+
+
 class BT:
-    def __init__(self, graph, cur, max_distance=10, start=None):
-        self.start = start or time.time()
+    def __init__(self, graph, cur, max_distance=10, deadline=None):
+        self.deadline = (deadline or NO_DEADLINE).within(BT_BUDGET)
         self.graph = graph
         self.best_path = None
         self.max_distance = max_distance
@@ -20,14 +22,11 @@ class BT:
                 self.visited.add(pos)
 
     def bt(self, cur, dist):
-        delay = time.time() - self.start
-        if delay > 0.08:
-            return
         now = len(self.visited)
         if not self.best or now > self.best:
             self.best_path = self.path.copy()
             self.best = now
-        if dist == self.max_distance:
+        if dist == self.max_distance or self.deadline.expired():
             return
 
         neighbors = self.graph.get_neighbors_with_not_discovered_nodes(cur)
@@ -41,8 +40,8 @@ class BT:
             self.visited = not_changed
 
 
-def solve_bt(graph, pos, max_distance=10, start=None):
-    self = BT(graph, pos, max_distance, start)
+def solve_bt(graph, pos, max_distance=10, deadline=None):
+    self = BT(graph, pos, max_distance, deadline)
     self.bt(pos, 0)
     self.best_path = [p for p in self.best_path if p != -1]
     if not self.best_path:
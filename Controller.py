@@ -1,13 +1,18 @@
 import os
-import sys
-import threading
-import traceback
-from queue import Queue
 from threading import Thread
 from AI import AI
-from Model import CurrentState, Direction, Game, GameConfig, ServerConstants
+from array_graph import GRAPH_BACKENDS
+from Model import AntType, CurrentState, GameConfig, ServerConstants
 from Network import Network
-import json
+from async_network import AsyncNetwork
+from codec import get_codec
+from deadline import Deadline
+from decision_worker import DecisionWorker
+from metrics import TurnMetrics
+from profiling import TurnProfiler
+from recorder import FrameRecorder
+from reply import TurnReply
+from watchdog import TurnWatchdog
 import time
 
 
@@ -17,7 +22,14 @@ class Controller:
         self.gameConfig = None
         self.conf = {}
         self.network = None
-        self.queue = Queue()
+        self.codec = None
+        self.turn_budget = None
+        self.watchdog = None
+        self.profiler = None
+        self.metrics = None
+        self.seed = None
+        self.graph_class = GRAPH_BACKENDS["dict"]
+        self.worker = DecisionWorker(self.launch_on_thread)
         self.client = AI()
         self.argNames = ["AICHostIP", "AICHostPort", "AICToken", "AICRetryDelay"]
         self.argDefaults = [
@@ -26,6 +38,27 @@ class Controller:
             "00000000000000000000000000000000",
             "1000",
         ]
+        self.optionalArgs = {
+            "AICTransport": "thread",
+            "AICCodec": "auto",
+            "AICRecordPath": "",
+            "AICTurnBudget": "900",
+            "AICSafetyMargin": "50",
+            "AICProfile": "",
+            "AICProfileTopN": "30",
+            "AICProfileThresholdMs": "200",
+            "AICProfileDir": "profiles",
+            "AICMetricsPath": "",
+            "AICMetricsFormat": "json",
+            "AICMetricsInterval": "5",
+            "AICSeed": "",
+            "AICSeedOffset": "",
+            "AICGraphBackend": "dict",
+        }
+        self.transports = {
+            "thread": Network,
+            "asyncio": AsyncNetwork,
+        }
         self.turn_num = 0
 
     def handle_message(self, message):
@@ -33,8 +66,12 @@ class Controller:
             self.handle_init_message(message[ServerConstants.KEY_INFO])
 
         elif message[ServerConstants.KEY_TYPE] == ServerConstants.MESSAGE_TYPE_TURN:
+            # the budget starts when the turn arrives, not when the worker picks it up
+            deadline = Deadline(self.turn_budget, start=self.network.received_at)
+            self.turn_num += 1
+            self.watchdog.arm(self.turn_num, deadline.start, self.client.fallback_direction)
             gameStatus = CurrentState(message[ServerConstants.KEY_INFO])
-            threading.Thread(target=self.launch_on_thread, args=([gameStatus])).start()
+            self.worker.push((gameStatus, deadline, self.turn_num))
 
         elif message[ServerConstants.KEY_TYPE] == ServerConstants.MESSAGE_TYPE_KILL:
             exit(4)
@@ -44,55 +81,85 @@ class Controller:
 
     def launch_on_thread(self, world):
         # try:
-        self.handle_turn_message(world)
+        if self.profiler is not None:
+            self.profiler.run(self.handle_turn_message, *world, turn=world[2])
+        else:
+            self.handle_turn_message(*world)
 
     # except Exception as e:
     #     print("Error in client:")
     #     print(e)
 
-    def send_direction_message(self, direction):
-        self.network.send({"type": 1, "info": {"direction": direction}})
-
-    def send_chat_message(self, chat, value):
-        self.network.send({"type": 2, "info": {"message": chat, "value": value}})
-
-    def send_end_message(self):
-        self.network.send({"type": 6, "info": {}})
-
-    def handle_turn_message(self, currentState):
-        self.client = AI()
-        game = Game()
-        game.initGameConfig(self.gameConfig)
-        game.setCurrentState(currentState)
-        self.client.game = game
-        start = time.time() * 1000
-        (message, value, direction) = self.client.turn()
-        diff = time.time() * 1000 - start
-        if diff > 2000:
-            pass
-        elif diff > 1000:
-            self.send_direction_message(Direction.CENTER.value)
-        else:
-            if direction is not None:
-                self.send_direction_message(direction)
-            if message is not None and value is not None:
-                self.send_chat_message(message, value)
-        self.send_end_message()
+    def handle_turn_message(self, currentState, deadline=None, turn=None):
+        self.client.set_current_state(currentState)
+        turn_start = time.monotonic()
+        (message, value, direction) = self.client.turn(deadline, turn)
+        turn_end = time.monotonic()
+        reply = TurnReply(self.codec)
+        if direction is not None:
+            reply.direction(direction)
+        if message is not None and value is not None:
+            reply.chat(message, value)
+        reply.end()
+        self.watchdog.reply(turn, reply.getvalue())
+        if self.metrics is not None:
+            self.record_metrics(deadline, turn_start, turn_end, time.monotonic())
+
+    def record_metrics(self, deadline, turn_start, turn_end, flushed):
+        ant, state = "unknown", "unknown"
+        if self.client.game is not None and self.client.game.ant is not None:
+            if self.client.game.ant.antType == AntType.SARBAAZ.value:
+                ant, state = AntType.SARBAAZ.name, self.client.soldier_state.name
+            else:
+                ant, state = AntType.KARGAR.name, self.client.worker_state.name
+        if deadline is not None:
+            # the state is decoded lazily inside the turn, so receiving and waiting for the worker are one stage
+            self.metrics.record("receive_to_turn", ant, state, turn_start - deadline.start)
+        self.metrics.record("turn", ant, state, turn_end - turn_start)
+        self.metrics.record("flush", ant, state, flushed - turn_end)
+        self.metrics.maybe_export()
 
     def handle_init_message(self, message):
         self.gameConfig = GameConfig(message)
+        self.client = AI(self.seed, self.graph_class)
+        self.client.init_game(self.gameConfig)
 
     def start(self):
         self.read_settings()
-        self.network = Network(
+        self.codec = get_codec(self.conf["AICCodec"])
+        self.turn_budget = float(self.conf["AICTurnBudget"]) / 1000
+        self.seed = self.ant_seed()
+        self.graph_class = GRAPH_BACKENDS[self.conf["AICGraphBackend"]]
+        if self.conf["AICProfile"]:
+            self.profiler = TurnProfiler(self.conf["AICProfileDir"], int(self.conf["AICProfileTopN"]),
+                                         float(self.conf["AICProfileThresholdMs"]))
+        if self.conf["AICMetricsPath"]:
+            self.metrics = TurnMetrics(self.conf["AICMetricsPath"], self.conf["AICMetricsFormat"],
+                                       float(self.conf["AICMetricsInterval"]))
+        transport = self.transports[self.conf["AICTransport"]]
+        self.network = transport(
             ip=self.conf[self.argNames[0]],
             port=int(self.conf[self.argNames[1]]),
             token=self.conf[self.argNames[2]],
             message_handler=self.handle_message,
+            codec=self.codec,
+            recorder=FrameRecorder(self.conf["AICRecordPath"]) if self.conf["AICRecordPath"] else None,
         )
+        self.watchdog = TurnWatchdog(self.network.send_frames, float(self.conf["AICSafetyMargin"]) / 1000)
         self.network.connect()
         Thread().start()
 
+    def ant_seed(self):
+        # ants born on the same round see the same chats, so with one shared seed they would draw the same id.
+        # a launcher running a replay gives every ant process its own offset, 0 when it gives none. without a seed
+        # every process seeds itself from the os
+        if not self.conf["AICSeed"]:
+            return None
+        offset = int(self.conf["AICSeedOffset"]) if self.conf["AICSeedOffset"] else 0
+        seed = int(self.conf["AICSeed"]) * 1000003 + offset
+        print("seed: {} (AICSeed={} AICSeedOffset={})".format(seed, self.conf["AICSeed"], offset))
+        return seed
+
     def read_settings(self):
         if os.environ.get(self.argNames[0]) is None:
             for i in range(len(self.argNames)):
@@ -100,10 +167,14 @@ class Controller:
         else:
             for i in range(len(self.argNames)):
                 self.conf[self.argNames[i]] = os.environ.get(self.argNames[i])
+        for name, default in self.optionalArgs.items():
+            self.conf[name] = os.environ.get(name, default)
 
     def terminate(self):
         print("finished!")
+        self.watchdog.stop()
         self.network.close()
+        self.worker.stop()
         self.sending_flag = False
 
 
@@ -1,10 +1,11 @@
 from enum import Enum
 from typing import *
 import random
-from datetime import datetime
 
 
 class Ant:
+    __slots__ = ("antType", "antTeam", "currentResource", "currentX", "currentY", "health", "visibleMap",
+                 "attackDistance", "viewDistance", "attacks")
     antType: int
     antTeam: int
     currentResource: "Resource"
@@ -70,6 +71,16 @@ class Ant:
             currentState.attacks,
         )
 
+    def __eq__(self, other):
+        if type(self) is type(other):
+            return all(getattr(self, name) == getattr(other, name) for name in Ant.__slots__)
+        return False
+
+    def __repr__(self):
+        # the visible map is left out, it is the whole view of the ant
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in Ant.__slots__ if name != "visibleMap")
+        return f"Ant({fields})"
+
     def getMapRelativeCell(self, x, y):
         return self.visibleMap.getRelativeCell(x, y)
 
@@ -81,7 +92,7 @@ class Ant:
 
 
 class Map:
-    cells: List[List["Cell"]]
+    cells: "VisibleCells"
     width: int
     height: int
     antCurrentX: int
@@ -89,19 +100,26 @@ class Map:
 
     def __init__(
         self,
-        cells: List["Cell"],
+        cells: "VisibleCells",
         width: int,
         height: int,
         currentX: int,
         currentY: int,
     ):
         super().__init__()
-        self.cells = cells
+        # either the cells or a function that builds them on first use
+        self._cells = cells
         self.width = width
         self.height = height
         self.antCurrentX = currentX
         self.antCurrentY = currentY
 
+    @property
+    def cells(self) -> "VisibleCells":
+        if callable(self._cells):
+            self._cells = self._cells()
+        return self._cells
+
     def getRelativeCell(self, dx: int, dy: int):
         x = (self.antCurrentX + dx) % self.width
         y = (self.antCurrentY + dy) % self.height
@@ -109,16 +127,17 @@ class Map:
             x += self.width
         if y < 0:
             y += self.height
-        return self.cells[x][y]
+        return self.cells.get(x, y)
 
 
 class Cell:
-    x = 0
-    y = 0
-    type = 0
-    resource_value = 0
-    resource_type = 0
-    ants = []
+    __slots__ = ("x", "y", "type", "resource_value", "resource_type", "ants")
+    x: int
+    y: int
+    type: int
+    resource_value: int
+    resource_type: int
+    ants: List["Ant"]
 
     def __init__(self, x, y, type, resource_value, resource_type):
         self.x = x
@@ -128,8 +147,18 @@ class Cell:
         self.resource_value = resource_value
         self.resource_type = resource_type
 
+    def __eq__(self, other):
+        if type(self) is type(other):
+            return (self.x, self.y, self.type, self.resource_value, self.resource_type, self.ants) == \
+                   (other.x, other.y, other.type, other.resource_value, other.resource_type, other.ants)
+        return False
+
+    def __repr__(self):
+        return f"Cell({self.x}, {self.y}, type={self.type}, resource=({self.resource_type}, {self.resource_value}))"
+
 
 class Resource:
+    __slots__ = ("type", "value")
     type: int
     value: int
 
@@ -138,6 +167,14 @@ class Resource:
         self.value = value
         self.type = type
 
+    def __eq__(self, other):
+        if type(self) is type(other):
+            return self.type == other.type and self.value == other.value
+        return False
+
+    def __repr__(self):
+        return f"Resource(type={self.type}, value={self.value})"
+
 
 class Message:
     def __init__(self, text: str, turn: int):
@@ -164,8 +201,63 @@ class GameConfig:
         self.__dict__ = message
 
 
+class VisibleCells:
+    # around_cells decoded once into parallel lists, one entry per visible cell
+    def __init__(self, around_cells):
+        self.x = []
+        self.y = []
+        self.type = []
+        self.resource_type = []
+        self.resource_value = []
+        self.ally_workers = []
+        self.ally_soldiers = []
+        self.enemy_workers = []
+        self.enemy_soldiers = []
+        self.ants = []
+        self.index = {}
+        for cel in around_cells or []:
+            x, y = cel["cell_x"], cel["cell_y"]
+            self.index[(x, y)] = len(self.x)
+            self.x.append(x)
+            self.y.append(y)
+            self.type.append(cel["cell_type"])
+            self.resource_type.append(cel["resource_type"])
+            self.resource_value.append(cel["resource_value"])
+            ants = cel["ants"]
+            self.ants.append(ants)
+            aw = ally_s = ew = es = 0
+            for a in ants:
+                if a["ant_team"] == AntTeam.ALLIED.value:
+                    if a["ant_type"] == AntType.KARGAR.value:
+                        aw += 1
+                    elif a["ant_type"] == AntType.SARBAAZ.value:
+                        ally_s += 1
+                else:
+                    if a["ant_type"] == AntType.KARGAR.value:
+                        ew += 1
+                    elif a["ant_type"] == AntType.SARBAAZ.value:
+                        es += 1
+            self.ally_workers.append(aw)
+            self.ally_soldiers.append(ally_s)
+            self.enemy_workers.append(ew)
+            self.enemy_soldiers.append(es)
+
+    def __len__(self):
+        return len(self.x)
+
+    def cell(self, i):
+        x, y = self.x[i], self.y[i]
+        cell = Cell(x, y, self.type[i], self.resource_value[i], self.resource_type[i])
+        cell.ants = [Ant.createAntXY(a["ant_type"], a["ant_team"], x, y) for a in self.ants[i]]
+        return cell
+
+    def get(self, x, y):
+        i = self.index.get((x, y))
+        return None if i is None else self.cell(i)
+
+
 class CurrentState:
-    around_cells: List["Cell"] = []
+    around_cells: List[dict] = []
     chat_box: List["Message"] = []
     current_x: int = -1
     current_y: int = -1
@@ -176,50 +268,20 @@ class CurrentState:
 
     def __init__(self, message):
         self.__dict__ = message
-        cells = []
-        for cel in self.around_cells:
-            cell_tmp = Cell(
-                cel["cell_x"],
-                cel["cell_y"],
-                cel["cell_type"],
-                cel["resource_value"],
-                cel["resource_type"],
-            )
-            cell_tmp.ants = cel["ants"]
-            cells.append(cell_tmp)
-        self.around_cells = cells
+        self.visible_cells = None
         attacks = []
         for attack in self.attacks:
             attacks.append(Attack(attack))
         self.attacks = attacks
 
     def getVisibleCells(self, height, width):
-        cells = [[None for i in range(height)] for j in range(width)]
-        if self.around_cells == None:
-            return cells
-        for clientCell in self.around_cells:
-            cell = Cell(
-                clientCell.x,
-                clientCell.y,
-                clientCell.type,
-                clientCell.resource_value,
-                clientCell.resource_type,
-            )
-            for clientAnt in clientCell.ants:
-                cell.ants.append(
-                    Ant.createAntXY(
-                        clientAnt["ant_type"],
-                        clientAnt["ant_team"],
-                        clientCell.x,
-                        clientCell.y,
-                    )
-                )
-            cells[cell.x][cell.y] = cell
-
-        return cells
+        if self.visible_cells is None:
+            self.visible_cells = VisibleCells(self.around_cells)
+        return self.visible_cells
 
 
 class Attack:
+    __slots__ = ("attacker_row", "attacker_col", "defender_row", "defender_col", "is_attacker_enemy")
     attacker_row: int
     attacker_col: int
     defender_row: int
@@ -227,7 +289,19 @@ class Attack:
     is_attacker_enemy: bool
 
     def __init__(self, message):
-        self.__dict__ = message
+        self.attacker_row = message.get("attacker_row")
+        self.attacker_col = message.get("attacker_col")
+        self.defender_row = message.get("defender_row")
+        self.defender_col = message.get("defender_col")
+        self.is_attacker_enemy = message.get("is_attacker_enemy")
+
+    def __eq__(self, other):
+        if type(self) is type(other):
+            return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+        return False
+
+    def __repr__(self):
+        return "Attack({})".format(", ".join("{}={}".format(name, getattr(self, name)) for name in self.__slots__))
 
 
 class  Game:
@@ -248,8 +322,10 @@ class  Game:
 
     def __init__(self):
         super().__init__()
-        self.ant = None
-        self.chatBox = None
+        self.currentState = None
+        self._ant = None
+        self._chatBox = ChatBox()
+        self._chatBoxSynced = True
         self.mapWidth = None
         self.mapHeight = None
         self.baseX = None
@@ -277,13 +353,27 @@ class  Game:
         self.rateDeathResource = gameConfig.rate_death_resource
 
     def setCurrentState(self, currentState: "CurrentState"):
-        self.chatBox = ChatBox(currentState.chat_box)
-        self.ant = self.initialAntState(currentState)
+        # the chat box, the ant and its visible map are only built when the turn first reads them
+        self.currentState = currentState
+        self._ant = None
+        self._chatBoxSynced = False
+
+    @property
+    def chatBox(self) -> "ChatBox":
+        if not self._chatBoxSynced:
+            self._chatBox.update(self.currentState.chat_box)
+            self._chatBoxSynced = True
+        return self._chatBox
+
+    @property
+    def ant(self) -> "Ant":
+        if self._ant is None and self.currentState is not None:
+            self._ant = self.initialAntState(self.currentState)
+        return self._ant
 
     def initialAntState(self, currentState: "CurrentState"):
-        cells = currentState.getVisibleCells(self.mapHeight, self.mapWidth)
         my_map = Map(
-            cells,
+            lambda: currentState.getVisibleCells(self.mapHeight, self.mapWidth),
             self.mapWidth,
             self.mapHeight,
             currentState.current_x,
@@ -302,15 +392,27 @@ class  Game:
 class ChatBox:
     allChats: List["Chat"]
 
-    def __init__(self, allChats):
+    def __init__(self, allChats=()):
         super().__init__()
-        chats = []
-        for chat in allChats:
-            chats.append(Chat(chat["text"], chat["turn"]))
-        self.allChats = chats
+        self.allChats = []
+        self.last_turn = None
+        self.update(allChats)
+
+    def update(self, allChats):
+        # the server resends the whole history every turn, only the tail newer than the last seen turn is new
+        start = len(allChats)
+        while start > 0 and (self.last_turn is None or allChats[start - 1]["turn"] > self.last_turn):
+            start -= 1
+        for chat in allChats[start:]:
+            self.add(Chat(chat["text"], chat["turn"]))
+
+    def add(self, chat):
+        self.allChats.append(chat)
+        self.last_turn = chat.turn
 
 
 class Chat:
+    __slots__ = ("text", "turn")
     text: str
     turn: int
 
@@ -319,6 +421,14 @@ class Chat:
         self.text = text
         self.turn = turn
 
+    def __eq__(self, other):
+        if type(self) is type(other):
+            return self.text == other.text and self.turn == other.turn
+        return False
+
+    def __repr__(self):
+        return f"Chat({self.text!r}, turn={self.turn})"
+
 
 class AntType(Enum):
     SARBAAZ = 0
@@ -355,9 +465,8 @@ class Direction(Enum):
         return None
 
     @staticmethod
-    def get_random_direction():
-        random.seed(datetime.now())
-        return random.randint(1, 4)
+    def get_random_direction(rng=None):
+        return (rng or random).randint(1, 4)
 
     @staticmethod
     def get_string(dir_val: int):
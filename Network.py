@@ -1,18 +1,24 @@
 import socket
-import json
 import time
+from collections import deque
 
 from Model import *
+from codec import get_codec
+from framing import FrameBuffer
 
 
 class Network():
-    def __init__(self, ip, port, token, message_handler):
+    def __init__(self, ip, port, token, message_handler, codec=None, recorder=None):
         self.receive_flag = True
         self.ip = ip
         self.port = port
         self.token = token
         self.message_handler = message_handler
-        self.result = b''
+        self.codec = codec or get_codec()
+        self.recorder = recorder
+        self.buffer = FrameBuffer()
+        self.frames = deque()
+        self.received_at = None
         self.s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
 
     def connect(self):
@@ -47,17 +53,22 @@ class Network():
             print('Cant connect to server, ERROR: {}'.format(error))
 
     def send(self, message):
-        j_obj = json.dumps(message, default = str)
-        self.s.send(j_obj.encode('UTF-8'))
-        self.s.send(b'\x00')
+        self.send_frames(self.codec.dumps(message) + b'\x00')
+
+    def send_frames(self, data):
+        if self.recorder is not None:
+            self.recorder.record_outbound(data)
+        self.s.sendall(data)
 
     def receive(self):
         while self.receive_flag:
-            self.result += self.s.recv(1024)
-            if b'\x00' in self.result:
-                ans = json.loads(self.result[:self.result.index(b'\x00')].decode('UTF-8'))
-                self.result = self.result[self.result.index(b'\x00') + 1:]
-                return ans
+            if self.frames:
+                return self.codec.loads(self.frames.popleft())
+            frames = self.buffer.read_from(self.s)
+            self.received_at = time.monotonic()
+            if self.recorder is not None:
+                self.recorder.record_inbound(frames)
+            self.frames.extend(frames)
 
     def start_receiving(self):
         import threading
@@ -80,3 +91,5 @@ class Network():
     def close(self):
         self.terminate()
         self.s.close()
+        if self.recorder is not None:
+            self.recorder.close()
@@ -1,6 +1,7 @@
 import time
 
 import Model
+from geometry import get_geometry
 
 
 def print_with_debug(*args, f=None, debug=False):
@@ -88,27 +89,16 @@ def get_next_move(cur, path):
 
 
 def fix(pos, w, h):
-    x = pos[0] % w if pos[0] % w >= 0 else (pos[0] % w) + w
-    y = pos[1] % h if pos[1] % h >= 0 else (pos[1] % h) + h
-    return x, y
+    return get_geometry(w, h).fix(pos[0], pos[1])
 
 
 def manhattan_dist(p, q, w, h) -> int:
-    x_diff = min(abs(p[0] - q[0]), w - abs(p[0] - q[0]))
-    y_diff = min(abs(p[1] - q[1]), h - abs(p[1] - q[1]))
-    return x_diff + y_diff
+    return get_geometry(w, h).distance(p, q)
 
 
 def get_view_distance_neighbors(pos, w, h, view: int, exact: bool = False, sort=True):
-    ret = []
-    for i in range(-view, view + 1):
-        for j in range(-view, view + 1):
-            p = fix((pos[0] + i, pos[1] + j), w, h)
-            if exact and manhattan_dist(pos, p, w, h) == view:
-                ret.append(p)
-            elif not exact and manhattan_dist(pos, p, w, h) <= view:
-                ret.append(p)
-    return sorted(ret) if sort else ret
+    # the lists are cached per map size, callers get their own copy
+    return list(get_geometry(w, h).view_cells(pos, view, exact, sort))
 
 
 def shortest_path(src, dest, w, h):
@@ -161,10 +151,7 @@ def time_measure(fn):
 
 
 def add_pos_dir(pos, direction, w, h):
-    temp = [(0, 0), (1, 0), (0, -1), (-1, 0), (0, 1)]
-    new_pos = tuple(map(sum, zip(pos, temp[direction])))
-    new_pos = fix(new_pos, w, h)
-    return new_pos
+    return get_geometry(w, h).move(pos, direction)
 
 
 def handle_exception(fn):
@@ -174,7 +161,7 @@ def handle_exception(fn):
         except Exception as e:
             # print_with_debug('ERROR ERROR ERROR')
             # print_with_debug(e)
-            res = '', -50000, Model.Direction.get_random_direction()
+            res = '', -50000, Model.Direction.get_random_direction(getattr(args[0], 'rng', None) if args else None)
             # todo: Raise Error
             # raise
 
@@ -0,0 +1,180 @@
+from array import array
+
+from geometry import get_geometry
+from graph import TERRAIN, Graph, Node
+
+FLAGS = ("discovered", "wall", "swamp", "trap")
+COUNTS = ("bread", "grass", "ally_workers", "ally_soldiers", "enemy_workers", "enemy_soldiers")
+SHARED = ("discovered", "wall", "swamp", "trap", "bread", "grass", "enemy_soldiers")
+
+
+def array_field(name, cast):
+    def get(self):
+        return cast(getattr(self.arrays, name)[self.i])
+
+    def set(self, value):
+        getattr(self.arrays, name)[self.i] = value
+
+    return property(get, set)
+
+
+class NodeView(Node):
+    # a Node that reads and writes one cell of a NodeArrays instead of holding its own fields
+    __slots__ = ("arrays", "i")
+
+    def __init__(self, arrays, i):
+        self.arrays = arrays
+        self.i = i
+
+    @property
+    def pos(self):
+        return self.arrays.positions[self.i]
+
+    def detach(self):
+        return Node(*self.fields())
+
+    def __copy__(self):
+        return self.detach()
+
+    def __deepcopy__(self, memo):
+        return self.detach()
+
+
+for name in FLAGS:
+    setattr(NodeView, name, array_field(name, bool))
+for name in COUNTS:
+    setattr(NodeView, name, array_field(name, int))
+
+
+class NodeArrays:
+    # the dict of nodes as one flat array per field, indexed by the geometry's cell ids
+    def __init__(self, w, h, source=None):
+        self.w = w
+        self.h = h
+        self.geometry = get_geometry(w, h)
+        self.positions = self.geometry.positions
+        self.neighbor_ids = self.geometry.neighbor_ids
+        if source is not None:
+            for name in FLAGS:
+                setattr(self, name, bytearray(getattr(source, name)))
+            for name in COUNTS:
+                setattr(self, name, array('i', getattr(source, name)))
+            return
+        size = w * h
+        for name in FLAGS:
+            setattr(self, name, bytearray(size))
+        for name in COUNTS:
+            setattr(self, name, array('i', bytes(4 * size)))
+
+    def index(self, pos):
+        return pos[1] * self.w + pos[0]
+
+    def copy(self):
+        return NodeArrays(self.w, self.h, source=self)
+
+    def __contains__(self, pos):
+        return 0 <= pos[0] < self.w and 0 <= pos[1] < self.h
+
+    def __getitem__(self, pos):
+        x, y = pos
+        if 0 <= x < self.w and 0 <= y < self.h:
+            return NodeView(self, y * self.w + x)
+        raise KeyError(pos)
+
+    def __setitem__(self, pos, node):
+        i = self.index(pos)
+        for name in FLAGS:
+            getattr(self, name)[i] = bool(getattr(node, name))
+        for name in COUNTS:
+            getattr(self, name)[i] = getattr(node, name)
+
+    def get(self, pos, default=None):
+        return self[pos] if pos in self else default
+
+    def __len__(self):
+        return len(self.positions)
+
+    # iteration keeps the column by column order of the dict built by Graph
+    def keys(self):
+        return self.geometry.cells.keys()
+
+    __iter__ = keys
+
+    def values(self):
+        return (self[pos] for pos in self.keys())
+
+    def items(self):
+        return ((pos, self[pos]) for pos in self.keys())
+
+
+class ArrayGraph(Graph):
+    # same queries as Graph, the searches read the arrays directly instead of going through Node objects
+
+    def make_nodes(self):
+        nodes = NodeArrays(*self.dim)
+        nodes.discovered[nodes.index(self.base_pos)] = True
+        return nodes
+
+    def update_from(self, graph):
+        if not isinstance(graph, ArrayGraph):
+            return super().update_from(graph)
+        if self.logs_changes():
+            changed = set()
+            for name in TERRAIN:
+                mine, theirs = getattr(self.nodes, name), getattr(graph.nodes, name)
+                if mine != theirs:
+                    changed.update(i for i, (a, b) in enumerate(zip(mine, theirs)) if a != b)
+            self.changes.extend(sorted(changed))
+        for name in SHARED:
+            getattr(self.nodes, name)[:] = getattr(graph.nodes, name)
+
+    def resource_sum(self, name_of_object):
+        return sum(getattr(self.nodes, name_of_object))
+
+    def resource_cells(self, name_of_object):
+        positions = self.nodes.positions
+        return sorted(positions[i] for i, amount in enumerate(getattr(self.nodes, name_of_object)) if amount > 0)
+
+    def field(self, name):
+        return getattr(self.nodes, name)
+
+    def get_neighbors(self, pos):
+        a = self.nodes
+        i = a.index(pos)
+        if a.wall[i] or not a.discovered[i]:
+            return []
+        return [a.positions[j] for j in a.neighbor_ids[i] if not a.wall[j]]
+
+    def get_neighbors_with_not_discovered_nodes(self, pos):
+        a = self.nodes
+        i = a.index(pos)
+        if a.wall[i] and a.discovered[i]:
+            return []
+        return [a.positions[j] for j in a.neighbor_ids[i] if not a.wall[j] or not a.discovered[j]]
+
+    def converted(self, walls):
+        converted_map = type(self)(self.dim, self.base_pos)
+        converted_map.nodes = nodes = self.nodes.copy()
+        for pos in walls:
+            i = nodes.index(pos)
+            for name in COUNTS:
+                getattr(nodes, name)[i] = 0
+            nodes.swamp[i] = nodes.trap[i] = False
+            nodes.wall[i] = nodes.discovered[i] = True
+        return converted_map
+
+    def convert_grass_cells_to_wall(self):
+        return self.converted([pos for pos, g in zip(self.nodes.positions, self.nodes.grass) if g > 0])
+
+    def convert_bread_cells_to_wall(self):
+        return self.converted([pos for pos, b in zip(self.nodes.positions, self.nodes.bread) if b > 0])
+
+    def convert_base_possible_cells_to_wall(self, base_possible_cells):
+        possible = {p[1] for p in base_possible_cells}
+        return self.converted([pos for pos in self.nodes.positions if pos in possible])
+
+
+GRAPH_BACKENDS = {
+    "dict": Graph,
+    "array": ArrayGraph,
+}
@@ -0,0 +1,107 @@
+import asyncio
+import threading
+import time
+
+from Model import *
+from codec import get_codec
+
+READ_LIMIT = 1 << 24
+
+
+class AsyncNetwork:
+    def __init__(self, ip, port, token, message_handler, codec=None, recorder=None):
+        self.receive_flag = True
+        self.ip = ip
+        self.port = port
+        self.token = token
+        self.message_handler = message_handler
+        self.codec = codec or get_codec()
+        self.recorder = recorder
+        self.loop = None
+        self.loop_thread = None
+        self.reader = None
+        self.writer = None
+        self.received_at = None
+
+    def connect(self):
+        asyncio.run(self.run())
+
+    async def run(self):
+        self.loop = asyncio.get_running_loop()
+        self.loop_thread = threading.get_ident()
+        connect_attempt = 1
+        error = None
+        while connect_attempt < 11:
+            try:
+                print("Trying to connect #{}".format(connect_attempt))
+                connect_attempt += 1
+                init = await self.open()
+            except Exception as e:
+                print("error while connecting to server", e)
+                error = e
+                await asyncio.sleep(2)
+                continue
+            print("connected to server!")
+            self.message_handler(init)
+            await self.receive_loop()
+            return
+        print('Cant connect to server, ERROR: {}'.format(error))
+
+    async def open(self):
+        self.reader, self.writer = await asyncio.open_connection(self.ip, self.port, limit=READ_LIMIT)
+        self.send({"type": ServerConstants.CONFIG_KEY_TOKEN,
+                   "turn": 0,
+                   "info": {ServerConstants.CONFIG_KEY_TOKEN: self.token}
+                   })
+        init = await self.receive()
+        if init[ServerConstants.KEY_TYPE] == "wrong token":
+            raise ConnectionRefusedError("wrong token")
+        elif not init[ServerConstants.KEY_TYPE] == ServerConstants.MESSAGE_TYPE_INIT:
+            self.close()
+            raise IOError("first message was not init")
+        return init
+
+    async def receive(self):
+        frame = (await self.reader.readuntil(b'\x00'))[:-1]
+        self.received_at = time.monotonic()
+        if self.recorder is not None:
+            self.recorder.record_inbound([frame])
+        return self.codec.loads(frame)
+
+    async def receive_loop(self):
+        while self.receive_flag:
+            try:
+                message = await self.receive()
+            except (ConnectionError, asyncio.IncompleteReadError):
+                print("disconnected from server!")
+                self.close()
+                break
+            self.message_handler(message)
+
+    def send(self, message):
+        self.send_frames(self.codec.dumps(message) + b'\x00')
+
+    def send_frames(self, data):
+        if self.recorder is not None:
+            self.recorder.record_outbound(data)
+        self.write(bytes(data))
+
+    def write(self, data):
+        if threading.get_ident() == self.loop_thread:
+            self.writer.write(data)
+        else:
+            self.loop.call_soon_threadsafe(self.writer.write, data)
+
+    def terminate(self):
+        self.receive_flag = False
+
+    def close(self):
+        self.terminate()
+        if self.recorder is not None:
+            self.recorder.close()
+        if self.writer is None:
+            return
+        if threading.get_ident() == self.loop_thread:
+            self.writer.close()
+        else:
+            self.loop.call_soon_threadsafe(self.writer.close)
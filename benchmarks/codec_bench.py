@@ -0,0 +1,74 @@
+# usage: python -m benchmarks.codec_bench [--turns N] [--repeat N] [--log FRAME_LOG ...]
+import argparse
+import time
+
+from Model import ServerConstants
+from codec import CODECS, JsonCodec
+from recorder import INBOUND, read_frames
+from synthetic_session import SyntheticSession
+
+MAP_SIZES = [(20, 20), (50, 50), (100, 100)]
+
+
+def recorded_turn_frames(width, height, turns):
+    session = SyntheticSession(width, height)
+    encoder = JsonCodec()
+    return [encoder.dumps(m) for m in session.messages(turns)][1:]
+
+
+def logged_turn_frames(path):
+    decoder = JsonCodec()
+    label = path
+    frames = []
+    for timestamp, direction, frame in read_frames(path):
+        if direction != INBOUND:
+            continue
+        message = decoder.loads(frame)
+        if message.get(ServerConstants.KEY_TYPE) == ServerConstants.MESSAGE_TYPE_INIT:
+            info = message[ServerConstants.KEY_INFO]
+            label = "{}x{}".format(info["map_width"], info["map_height"])
+        elif message.get(ServerConstants.KEY_TYPE) == ServerConstants.MESSAGE_TYPE_TURN:
+            frames.append(frame)
+    return label, frames
+
+
+def bench_codec(codec, frames, repeat):
+    messages = [codec.loads(f) for f in frames]
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for f in frames:
+            codec.loads(f)
+    loads = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for m in messages:
+            codec.dumps(m)
+    dumps = time.perf_counter() - start
+    n = repeat * len(frames)
+    return loads / n * 1e6, dumps / n * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--turns", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--log", nargs="*", default=[], help="frame logs written with AICRecordPath")
+    args = parser.parse_args()
+
+    if args.log:
+        samples = [logged_turn_frames(path) for path in args.log]
+    else:
+        samples = [("{}x{}".format(w, h), recorded_turn_frames(w, h, args.turns)) for w, h in MAP_SIZES]
+
+    print("{:>9} {:>8} {:>10} {:>12} {:>12}".format("map", "codec", "avg frame", "loads us", "dumps us"))
+    for label, frames in samples:
+        if not frames:
+            continue
+        avg = sum(len(f) for f in frames) // len(frames)
+        for name, codec in CODECS.items():
+            loads, dumps = bench_codec(codec(), frames, args.repeat)
+            print("{:>9} {:>8} {:>10} {:>12.1f} {:>12.1f}".format(label, name, avg, loads, dumps))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+# usage: python -m benchmarks.node_memory_bench [--size N ...]
+import argparse
+import tracemalloc
+
+from array_graph import ArrayGraph, NodeArrays
+from geometry import get_geometry
+from graph import Graph, Node
+
+
+class LegacyNode:
+    # the dict-backed Node the graph used before __slots__, kept here for comparison
+    def __init__(self, pos, discovered, wall=False, swamp=False, trap=False,
+                 bread=0, grass=0,
+                 ally_workers=0, ally_soldiers=0, enemy_workers=0,
+                 enemy_soldiers=0):
+        self.pos = pos
+        self.discovered = discovered
+        self.wall = wall
+        self.swamp = swamp
+        self.trap = trap
+        self.bread = bread
+        self.grass = grass
+        self.ally_workers = ally_workers
+        self.ally_soldiers = ally_soldiers
+        self.enemy_workers = enemy_workers
+        self.enemy_soldiers = enemy_soldiers
+
+
+def measure(build):
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    kept = build()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    size = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    return kept, size
+
+
+def build_nodes(cls, w, h):
+    return {(i, j): cls((i, j), False) for i in range(w) for j in range(h)}
+
+
+def build_graphs(cls, w, h):
+    # AI keeps map and latest_map alive, collect moves add one converted copy
+    base = (w // 2, h // 2)
+    graph = cls((w, h), base)
+    return [graph, cls((w, h), base), graph.convert_bread_cells_to_wall()]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, nargs="*", default=[30, 50, 100])
+    args = parser.parse_args()
+
+    print("{:>9} {:>12} {:>14} {:>14} {:>16}".format("map", "node", "bytes/node", "nodes total", "3 graphs total"))
+    for n in args.size:
+        cells = n * n
+        # the index tables are built once per map size, keep them out of the per graph numbers
+        get_geometry(n, n)
+        for name, build, graph_cls in [("legacy", lambda: build_nodes(LegacyNode, n, n), None),
+                                       ("slots", lambda: build_nodes(Node, n, n), Graph),
+                                       ("array", lambda: NodeArrays(n, n), ArrayGraph)]:
+            _, nodes_size = measure(build)
+            graphs = ""
+            if graph_cls is not None:
+                _, graphs_size = measure(lambda: build_graphs(graph_cls, n, n))
+                graphs = "{:.1f} KiB".format(graphs_size / 1024)
+            print("{:>9} {:>12} {:>14.1f} {:>14} {:>16}".format(
+                "{}x{}".format(n, n), name, nodes_size / cells, "{:.1f} KiB".format(nodes_size / 1024), graphs))
+
+
+if __name__ == "__main__":
+    main()
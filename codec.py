@@ -0,0 +1,43 @@
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class JsonCodec:
+    name = 'json'
+
+    def dumps(self, message):
+        return json.dumps(message, default=str).encode('UTF-8')
+
+    def loads(self, frame):
+        # json.loads detects the UTF encoding of bytes input itself
+        return json.loads(frame)
+
+
+class OrjsonCodec:
+    name = 'orjson'
+
+    def dumps(self, message):
+        return orjson.dumps(message, default=str)
+
+    def loads(self, frame):
+        return orjson.loads(frame)
+
+
+CODECS = {
+    JsonCodec.name: JsonCodec,
+}
+if orjson is not None:
+    CODECS[OrjsonCodec.name] = OrjsonCodec
+
+
+def get_codec(name='auto'):
+    if name == 'auto':
+        name = OrjsonCodec.name if OrjsonCodec.name in CODECS else JsonCodec.name
+    if name not in CODECS:
+        print("codec {} is not available, falling back to json".format(name))
+        name = JsonCodec.name
+    return CODECS[name]()
@@ -0,0 +1,28 @@
+import math
+import time
+
+TURN_TIMEOUT = 1.0
+
+
+class Deadline:
+    def __init__(self, budget=TURN_TIMEOUT, start=None):
+        self.start = time.monotonic() if start is None else start
+        self.end = self.start + budget
+
+    def remaining(self):
+        return self.end - time.monotonic()
+
+    def expired(self):
+        return time.monotonic() >= self.end
+
+    def within(self, budget):
+        # a sub-deadline for one planner, never later than this one
+        child = Deadline(budget)
+        child.end = min(child.end, self.end)
+        return child
+
+    def __repr__(self):
+        return f"Deadline(remaining={self.remaining():.3f})"
+
+
+NO_DEADLINE = Deadline(math.inf)
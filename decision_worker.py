@@ -0,0 +1,45 @@
+import threading
+import traceback
+from queue import Empty, Queue
+
+
+class DecisionWorker:
+    def __init__(self, handler):
+        self.handler = handler
+        self.queue = Queue(maxsize=1)
+        self.lock = threading.Lock()
+        self.busy = False
+        self.dropped = 0
+        self.overlapping = 0
+        self.thread = threading.Thread(target=self.run, name="decision", daemon=True)
+        self.thread.start()
+
+    def push(self, item):
+        with self.lock:
+            if self.busy:
+                self.overlapping += 1
+            try:
+                self.queue.get_nowait()
+                self.dropped += 1
+                print("dropped a stale turn, dropped: {} overlapping: {}".format(self.dropped, self.overlapping))
+            except Empty:
+                pass
+            self.queue.put_nowait(item)
+
+    def run(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                return
+            with self.lock:
+                self.busy = True
+            try:
+                self.handler(item)
+            except Exception:
+                traceback.print_exc()
+            finally:
+                with self.lock:
+                    self.busy = False
+
+    def stop(self):
+        self.push(None)
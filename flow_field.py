@@ -0,0 +1,171 @@
+import Utils
+from search import search
+
+
+def move_cost(node):
+    return int(node.swamp) * Utils.SWAMP_TURNS + 1
+
+
+def home_rules(carrying):
+    # get_first_move_to_base: only known open cells, and no traps while carrying resources
+    return (lambda node: node.discovered and not node.wall and not (carrying and node.trap),
+            lambda node: node.discovered and not node.wall)
+
+
+def resource_rules(name_of_other_object, carrying):
+    # get_shortest_path: unknown cells are fine, an empty ant keeps off the other resource and a carrying one off traps
+    def passable(node):
+        return not (node.discovered and node.wall) and not (node.trap if carrying else
+                                                            getattr(node, name_of_other_object) > 0)
+
+    def leave(node):
+        return not (node.discovered and node.wall) and (carrying or getattr(node, name_of_other_object) == 0)
+
+    return passable, leave
+
+
+class FlowField:
+    # cost of the way to the nearest source cell and the next cell on that way, for every cell under one set of
+    # move rules. built with one search backwards from the sources, then only repaired around the cells in the
+    # graph's change log
+    def __init__(self, graph, passable, leave):
+        self.graph = graph
+        # cells a path may go through, and cells a path may start from
+        self.passable = passable
+        self.leave = leave
+        self.ids = graph.geometry.ids
+        self.positions = graph.geometry.positions
+        self.neighbor_ids = graph.geometry.neighbor_ids
+        self.seen = len(graph.changes)
+        nodes = [graph.nodes[pos] for pos in self.positions]
+        self.open = bytearray(bool(passable(node)) for node in nodes)
+        self.costs = [move_cost(node) for node in nodes]
+        self.source = bytearray(bool(self.is_source(i, node)) for i, node in enumerate(nodes))
+        # dist: cost of the way to a source, paid on leaving each cell. parent: the next cell on that way
+        result = self.search([i for i, source in enumerate(self.source) if source])
+        self.dist, self.parent = result.dist, result.parent
+
+    def is_source(self, i, node):
+        raise NotImplementedError
+
+    def search(self, starts, dist=None, parent=None):
+        open, costs, source = self.open, self.costs, self.source
+        return search(
+            starts, self.neighbor_ids, blocked=lambda i: not open[i] or source[i],
+            weight=lambda i, j: costs[j], max_weight=Utils.SWAMP_TURNS + 1, dist=dist, parent=parent
+        )
+
+    def update(self):
+        changes = self.graph.changes
+        if self.seen == len(changes):
+            return
+        changed = set(changes[self.seen:])
+        self.seen = len(changes)
+
+        dist, parent, costs = self.dist, self.parent, self.costs
+        dropped = []
+        for i in changed:
+            node = self.graph.nodes[self.positions[i]]
+            passable, cost, source = bool(self.passable(node)), move_cost(node), bool(self.is_source(i, node))
+            worse = self.source[i] or not passable or cost > costs[i]
+            self.open[i], costs[i], self.source[i] = passable, cost, source
+            if source:
+                # a new source only makes the ways around it shorter, the search below spreads that
+                dist[i], parent[i] = 0, i
+            elif worse and dist[i] != -1:
+                dropped.extend(self.drop(i))
+
+        # everything left has a real way to a source, relabel the rest from their neighbors and spread from there
+        seeds = [i for i in changed if self.source[i]]
+        for i in changed.union(dropped):
+            if self.source[i] or not self.open[i]:
+                continue
+            for j in self.neighbor_ids[i]:
+                if dist[j] != -1 and (dist[i] == -1 or dist[j] + costs[i] < dist[i]):
+                    dist[i] = dist[j] + costs[i]
+                    parent[i] = j
+            if dist[i] != -1:
+                seeds.append(i)
+        if seeds:
+            self.search(seeds, dist, parent)
+
+    def drop(self, i):
+        # forget i and every cell whose way to a source goes through it
+        dist, parent = self.dist, self.parent
+        dist[i] = -1
+        dropped = [i]
+        for cur in dropped:
+            for j in self.neighbor_ids[cur]:
+                if dist[j] != -1 and parent[j] == cur:
+                    dist[j] = -1
+                    dropped.append(j)
+        for j in dropped:
+            parent[j] = -1
+        return dropped
+
+    def next_cell(self, pos):
+        # the id to step into from pos, None on a source or when there is no known way
+        i = self.ids[pos]
+        if self.source[i] or not self.leave(self.graph.nodes[pos]):
+            return None
+        if self.dist[i] != -1:
+            return self.parent[i]
+        # pos itself may not be passable, like a trap under a carrying ant, it can still be left
+        best = None
+        for j in self.neighbor_ids[i]:
+            if self.dist[j] != -1 and (best is None or self.dist[j] < self.dist[best]):
+                best = j
+        return best
+
+    def first_move(self, pos):
+        j = self.next_cell(pos)
+        return self.positions[j] if j is not None else None
+
+    def distance(self, pos):
+        # cost of the way from pos to the nearest source, None when there is no known way
+        i = self.ids[pos]
+        if self.source[i]:
+            return 0
+        j = self.next_cell(pos)
+        if j is None:
+            return None
+        return self.dist[j] + self.costs[i]
+
+
+class BaseField(FlowField):
+    # the ways to base, the base cell itself is taken to always be open
+    def __init__(self, graph, passable, leave):
+        self.base = graph.geometry.ids[graph.base_pos]
+        super().__init__(graph, passable, leave)
+
+    def is_source(self, i, node):
+        return i == self.base
+
+    def distance_from_base(self, pos):
+        # the same ways walked from the other end: the cost of pos is no longer paid, the cost of base is
+        i = self.ids[pos]
+        if i == self.base:
+            return 0
+        if self.dist[i] == -1 or not self.leave(self.graph.nodes[self.graph.base_pos]):
+            return None
+        return self.dist[i] - self.costs[i] + self.costs[self.base]
+
+
+class ResourceField(FlowField):
+    # the ways to the nearest cell holding some of one resource that the move rules let an ant reach
+    def __init__(self, graph, name_of_object, passable, leave):
+        self.name_of_object = name_of_object
+        super().__init__(graph, passable, leave)
+
+    def is_source(self, i, node):
+        return getattr(node, self.name_of_object) > 0 and self.passable(node)
+
+
+class DistancesFromBase:
+    # stands in for the 'dist' dict of a get_shortest_path from base
+    def __init__(self, field):
+        self.field = field
+
+    def get(self, pos, default=None):
+        distance = self.field.distance_from_base(pos)
+        return default if distance is None else distance
@@ -0,0 +1,67 @@
+FRAME_DELIM = 0
+READ_SIZE = 1 << 16
+MIN_READ = 1 << 12
+
+
+class FrameBuffer:
+    def __init__(self, size=READ_SIZE):
+        self.buf = bytearray(size)
+        self.view = memoryview(self.buf)
+        # unread data lives in buf[start:end], buf[start:scan] is known to have no delimiter
+        self.start = 0
+        self.scan = 0
+        self.end = 0
+
+    def pending(self):
+        return self.end - self.start
+
+    def make_room(self):
+        if self.start == self.end:
+            self.start = self.scan = self.end = 0
+            return
+        if len(self.buf) - self.end >= MIN_READ:
+            return
+        tail = self.end - self.start
+        if self.start > 0 and tail <= len(self.buf) // 2:
+            # the partial frame is moved once, only when the buffer runs out of space
+            self.buf[:tail] = self.view[self.start:self.end]
+        else:
+            new_buf = bytearray(max(len(self.buf) * 2, tail + READ_SIZE))
+            new_buf[:tail] = self.view[self.start:self.end]
+            self.view.release()
+            self.buf = new_buf
+            self.view = memoryview(self.buf)
+        self.scan -= self.start
+        self.start = 0
+        self.end = tail
+
+    def read_from(self, sock):
+        self.make_room()
+        n = sock.recv_into(self.view[self.end:])
+        if n == 0:
+            raise ConnectionResetError("connection closed by server")
+        self.end += n
+        return self.frames()
+
+    def feed(self, data):
+        data = memoryview(data)
+        while data:
+            self.make_room()
+            n = min(len(data), len(self.buf) - self.end)
+            self.buf[self.end:self.end + n] = data[:n]
+            self.end += n
+            data = data[n:]
+        return self.frames()
+
+    def frames(self):
+        frames = []
+        while True:
+            idx = self.buf.find(FRAME_DELIM, self.scan, self.end)
+            if idx == -1:
+                self.scan = self.end
+                break
+            frames.append(bytes(self.view[self.start:idx]))
+            self.start = self.scan = idx + 1
+        if self.start == self.end:
+            self.start = self.scan = self.end = 0
+        return frames
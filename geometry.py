@@ -0,0 +1,111 @@
+from array import array
+
+# indexed by Direction value: CENTER, RIGHT, UP, LEFT, DOWN
+MOVES = [(0, 0), (1, 0), (0, -1), (-1, 0), (0, 1)]
+# Graph.step checks right, left, up, down in this order, it decides for 1 or 2 wide maps
+STEP_ORDER = [1, 3, 2, 4]
+# per-position view lists and indexes kept by one geometry, and map sizes kept at once. the oldest goes first
+VIEW_CACHE_SIZE = 2048
+GEOMETRY_CACHE_SIZE = 4
+
+
+class Geometry:
+    def __init__(self, w, h):
+        self.w = w
+        self.h = h
+        # every position is one shared tuple, tables below only hold references to these
+        self.cells = {(x, y): (x, y) for x in range(w) for y in range(h)}
+        self.neighbors = {}
+        for (x, y), pos in self.cells.items():
+            # same order as Graph.get_neighbors: up, right, down, left
+            self.neighbors[pos] = (self.cells[(x, (y - 1) % h)], self.cells[((x + 1) % w, y)],
+                                   self.cells[(x, (y + 1) % h)], self.cells[((x - 1) % w, y)])
+        # cell ids: (x, y) is y * w + x
+        self.positions = [self.cells[(i % w, i // w)] for i in range(w * h)]
+        self.ids = {pos: i for i, pos in enumerate(self.positions)}
+        self.neighbor_ids = [tuple(self.ids[n] for n in self.neighbors[pos]) for pos in self.positions]
+        # next_ids[direction][id] is the cell one move away
+        self.next_ids = [array('i', (self.ids[self.fix(x + dx, y + dy)] for x, y in self.positions))
+                         for dx, dy in MOVES]
+        # directions[id][neighbor id] is the move between two adjacent cells
+        self.directions = [{} for _ in self.positions]
+        for direction in STEP_ORDER:
+            for i, j in enumerate(self.next_ids[direction]):
+                self.directions[i].setdefault(j, direction)
+        self.axis_distance = ([min(d, w - d) for d in range(w)], [min(d, h - d) for d in range(h)])
+        self.offsets = {}
+        self.views = {}
+        self.indexes = {}
+
+    def fix(self, x, y):
+        return self.cells[(x % self.w, y % self.h)]
+
+    def distance(self, p, q):
+        return self.axis_distance[0][abs(p[0] - q[0]) % self.w] + self.axis_distance[1][abs(p[1] - q[1]) % self.h]
+
+    def move(self, pos, direction):
+        dx, dy = MOVES[direction]
+        return self.fix(pos[0] + dx, pos[1] + dy)
+
+    def direction(self, p, q):
+        # None when q is not next to p
+        return self.directions[self.ids[p]].get(self.ids[q])
+
+    def view_offsets(self, view, exact=False):
+        key = (view, exact)
+        offsets = self.offsets.get(key)
+        if offsets is None:
+            # the torus distance of an offset does not depend on where it is applied
+            offsets = []
+            for i in range(-view, view + 1):
+                for j in range(-view, view + 1):
+                    dx, dy = i % self.w, j % self.h
+                    d = min(dx, self.w - dx) + min(dy, self.h - dy)
+                    if d == view if exact else d <= view:
+                        offsets.append((i, j))
+            self.offsets[key] = offsets
+        return offsets
+
+    def view_cells(self, pos, view, exact=False, sort=True):
+        key = (pos, view, exact, sort)
+        cells = self.views.get(key)
+        if cells is None:
+            cells = [self.fix(pos[0] + i, pos[1] + j) for i, j in self.view_offsets(view, exact)]
+            if sort:
+                cells.sort()
+            remember(self.views, key, cells, VIEW_CACHE_SIZE)
+        return cells
+
+    def view_index(self, pos, view):
+        # position -> index into the sorted view list, the numbering used by the map message codec
+        key = (pos, view)
+        index = self.indexes.get(key)
+        if index is None:
+            index = {}
+            for i, p in enumerate(self.view_cells(pos, view)):
+                index.setdefault(p, i)
+            remember(self.indexes, key, index, VIEW_CACHE_SIZE)
+        return index
+
+    def precompute(self, views):
+        # the offsets are the same for every cell, the lists for each cell are only built once it is looked at
+        for view in views:
+            self.view_offsets(view)
+            self.view_offsets(view, exact=True)
+
+
+def remember(cache, key, value, limit):
+    if len(cache) >= limit:
+        del cache[next(iter(cache))]
+    cache[key] = value
+
+
+geometries = {}
+
+
+def get_geometry(w, h):
+    geometry = geometries.get((w, h))
+    if geometry is None:
+        geometry = Geometry(w, h)
+        remember(geometries, (w, h), geometry, GEOMETRY_CACHE_SIZE)
+    return geometry
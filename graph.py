@@ -4,9 +4,20 @@ from itertools import chain
 
 import Utils
 from Model import Direction
+from flow_field import BaseField, DistancesFromBase, ResourceField, home_rules, resource_rules
+from geometry import get_geometry
+from regions import Regions
+from search import search
+
+
+# the node fields searches read, a change in any of them goes to Graph.changes
+TERRAIN = ("discovered", "wall", "swamp", "trap", "bread", "grass")
 
 
 class Node:
+    # REMEMBER to change the encode/decode function after adding attrs
+    __slots__ = ("pos", "discovered", "wall", "swamp", "trap", "bread", "grass",
+                 "ally_workers", "ally_soldiers", "enemy_workers", "enemy_soldiers")
     GRASS_WEIGHT = 1
     BREAD_WEIGHT = 1
     DISTANCE_WEIGH = 10
@@ -17,7 +28,6 @@ class Node:
                  bread=0, grass=0,
                  ally_workers=0, ally_soldiers=0, enemy_workers=0,
                  enemy_soldiers=0):
-        # REMEMBER to change the encode/decode function after adding attrs
         self.pos = pos
         self.discovered = discovered
         self.wall = wall
@@ -30,12 +40,16 @@ class Node:
         self.enemy_workers = enemy_workers
         self.enemy_soldiers = enemy_soldiers
 
+    def fields(self):
+        return (self.pos, self.discovered, self.wall, self.swamp, self.trap, self.bread, self.grass,
+                self.ally_workers, self.ally_soldiers, self.enemy_workers, self.enemy_soldiers)
+
     def __repr__(self):
-        return f"{self.__dict__}"
+        return f"{dict(zip(Node.__slots__, self.fields()))}"
 
     def __eq__(self, other):
-        if type(self) is type(other):
-            return self.__dict__ == other.__dict__
+        if isinstance(other, Node):
+            return self.fields() == other.fields()
         return False
 
     def get_distance(self, node):
@@ -60,26 +74,67 @@ class Graph:
     def __init__(self, dim, base_pos):
         self.base_pos = base_pos
         self.dim = dim  # width, height
+        self.geometry = get_geometry(*dim)
         self.enemy_base_pos = None
         self.nodes = {}
         self.bfs_info = {}
         self.edge_nodes = []
         self.shortest_path_info = {'bread': {}, 'grass': {}}
-        for i in range(dim[0]):
-            for j in range(dim[1]):
-                if (i, j) == base_pos:
-                    self.nodes[(i, j)] = Node(
+        self.nodes = self.make_nodes()
+        # flow fields by rule, the regions of explored cells, and the ids of cells changed since the first of them
+        self.flow_fields = {}
+        self.regions = None
+        self.changes = []
+
+    def make_nodes(self):
+        nodes = {}
+        for i in range(self.dim[0]):
+            for j in range(self.dim[1]):
+                if (i, j) == self.base_pos:
+                    nodes[(i, j)] = Node(
                         pos=(i, j),
                         discovered=True,
                         wall=False
                     )
                 else:
-                    self.nodes[(i, j)] = Node(
+                    nodes[(i, j)] = Node(
                         pos=(i, j),
                         discovered=False
                     )
+        return nodes
+
+    def update_node(self, pos, node):
+        # write cells through here, or the flow fields do not see the change
+        self.log_change(pos, node)
+        self.nodes[pos] = node
+
+    def logs_changes(self):
+        return bool(self.flow_fields) or self.regions is not None
+
+    def log_change(self, pos, node=None):
+        if not self.logs_changes():
+            return
+        old = self.nodes[pos]
+        if node is None or any(getattr(old, name) != getattr(node, name) for name in TERRAIN):
+            self.changes.append(self.geometry.ids[pos])
+
+    def update_from(self, graph):
+        # copies what other ants can know about a cell, the ant counts are left alone
+        for k, v in graph.nodes.items():
+            self.log_change(k, v)
+            node = self.nodes[k]
+            node.wall = v.wall
+            node.bread = v.bread
+            node.discovered = v.discovered
+            node.swamp = v.swamp
+            node.trap = v.trap
+            node.grass = v.grass
+            node.enemy_soldiers = v.enemy_soldiers
 
     def step(self, src, dest):
+        move = self.geometry.direction(src, dest)
+        if move is not None:
+            return Direction(move).name
         if dest[0] - src[0] in [1, -(self.dim[0] - 1)]:
             return "RIGHT"
         if dest[0] - src[0] in [-1, self.dim[0] - 1]:
@@ -89,54 +144,75 @@ class Graph:
         if dest[1] - src[1] in [1, -(self.dim[1] - 1)]:
             return "DOWN"
 
+    def resource_sum(self, name_of_object):
+        return sum(getattr(node, name_of_object) for node in self.nodes.values())
+
+    def resource_cells(self, name_of_object):
+        # cells holding some of the resource, in the order the nodes are iterated
+        return [pos for pos, node in self.nodes.items() if getattr(node, name_of_object) > 0]
+
+    def field(self, name):
+        # one value per cell id, the form the search kernel reads the map in
+        nodes = self.nodes
+        return [getattr(nodes[pos], name) for pos in self.geometry.positions]
+
+    def walls(self):
+        # cells known to be walls, no search goes into or out of them
+        return [wall and discovered for wall, discovered in zip(self.field('wall'), self.field('discovered'))]
+
+    def move_costs(self):
+        # turns it takes to leave each cell
+        return [swamp * Utils.SWAMP_TURNS + 1 for swamp in self.field('swamp')]
+
+    def nodes_of(self, ids):
+        positions = self.geometry.positions
+        return [self.nodes[positions[i]] for i in ids]
+
+    def search_info(self, result):
+        positions = self.geometry.positions
+        return {
+            'dist': {positions[i]: result.dist[i] for i in result.reached},
+            'parent': {positions[i]: positions[result.parent[i]] for i in result.reached},
+        }
+
+    def frontier(self, result, walls, discovered):
+        # explored cells next to a cell nobody has seen yet
+        positions, neighbor_ids = self.geometry.positions, self.geometry.neighbor_ids
+        return sorted(positions[i] for i in result.reached if result.settled[i] and not walls[i] and
+                      any(not discovered[j] for j in neighbor_ids[i]))
+
     # @Utils.time_measure
     def total_grass_number(self):
-        res = 0
-        for pos in self.nodes.keys():
-            if not self.nodes[pos].wall:
-                if self.nodes[pos].grass > 0:
-                    if self.get_path(self.nodes[pos], self.nodes[self.base_pos]) is not None:
-                        #     print(pos)
-                        res = res + self.nodes[pos].grass
-        return res
+        return self.total_resource_number('grass')
 
     # @Utils.time_measure
     def total_bread_number(self):
-        res = 0
-        # print("###########")
-        # print("total_bread_number:")
-        for pos in self.nodes.keys():
-            if not self.nodes[pos].wall:
-                if self.nodes[pos].bread > 0:
-                    if self.get_path(self.nodes[pos], self.nodes[self.base_pos]) is not None:
-                        #     print(pos)
-                        res = res + self.nodes[pos].bread
-        return res
+        return self.total_resource_number('bread')
+
+    def total_resource_number(self, name_of_object):
+        # a cell has a path to base when both sit in the same region of explored open cells
+        if self.regions is None:
+            self.regions = Regions(self)
+        return self.regions.reachable_from_base(name_of_object)
 
     # @Utils.time_measure
-    def shortest_path(self, src, dest):
-        q = [[src]]
-        visited = []
-
-        while q:
-            prev_path = q.pop(0)
-            node = prev_path[-1]
-            if node not in visited:
-                neighbors = self.get_neighbors(node)
-                for u in neighbors:
-                    path = list(prev_path)
-                    path.append(u)
-                    q.append(path)
-                    if u == dest:
-                        return path
-                visited.append(node)
-
-        return None
+    def shortest_path(self, src, dest, deadline=None):
+        wall, discovered = self.field('wall'), self.field('discovered')
+        target = self.geometry.ids[dest.pos]
+        result = search(
+            [self.geometry.ids[src.pos]], self.geometry.neighbor_ids,
+            passable=lambda i: discovered[i] and not wall[i], blocked=lambda i: wall[i],
+            early_exit=lambda i, d: i == target, deadline=deadline
+        )
+        path = result.path(target)
+        return [src] + self.nodes_of(path) if path else None
 
     def set_bread(self, pos, b):
+        self.log_change(pos)
         self.nodes[pos].bread = b
 
     def set_grass(self, pos, g):
+        self.log_change(pos)
         self.nodes[pos].grass = g
 
     def set_ally_workers(self, pos, aw):
@@ -152,44 +228,34 @@ class Graph:
         self.nodes[pos].enemy_soldiers = es
 
     def discover(self, pos, is_wall):
+        self.log_change(pos)
         self.nodes[pos].wall = is_wall
         self.nodes[pos].discovered = True
 
     def get_neighbors(self, pos):
         if self.nodes[pos].wall or not self.nodes[pos].discovered:
             return []
-        neighbors = [self.up(pos), self.right(pos), self.down(pos),
-                     self.left(pos)]
-        neighbors = [n for n in neighbors if not self.nodes[n].wall and
+        neighbors = [n for n in self.geometry.neighbors[pos] if not self.nodes[n].wall and
                      self.nodes[pos].discovered]
         return neighbors
 
     def get_neighbors_with_not_discovered_nodes(self, pos):
         if self.nodes[pos].wall and self.nodes[pos].discovered:
             return []
-        neighbors = [self.up(pos), self.right(pos), self.down(pos), self.left(pos)]
-        neighbors = [n for n in neighbors if not self.nodes[n].wall or not self.nodes[n].discovered]
+        neighbors = [n for n in self.geometry.neighbors[pos] if not self.nodes[n].wall or not self.nodes[n].discovered]
         return neighbors
 
     def right(self, pos):
-        if pos[0] == self.dim[0] - 1:
-            return 0, pos[1]
-        return pos[0] + 1, pos[1]
+        return self.geometry.move(pos, Direction.RIGHT.value)
 
     def left(self, pos):
-        if pos[0] == 0:
-            return self.dim[0] - 1, pos[1]
-        return pos[0] - 1, pos[1]
+        return self.geometry.move(pos, Direction.LEFT.value)
 
     def up(self, pos):
-        if pos[1] == 0:
-            return pos[0], self.dim[1] - 1
-        return pos[0], pos[1] - 1
+        return self.geometry.move(pos, Direction.UP.value)
 
     def down(self, pos):
-        if pos[1] == self.dim[1] - 1:
-            return pos[0], 0
-        return pos[0], pos[1] + 1
+        return self.geometry.move(pos, Direction.DOWN.value)
 
     def guess_node(self, node):
         # todo: make guessing better
@@ -209,74 +275,41 @@ class Graph:
     def get_node(self, pos):
         return self.nodes[pos] if self.nodes[pos].discovered else self.guess_node(self.nodes[pos])
 
-    def get_worker_weight(self, src, dest):
-        return int(src.swamp) * Utils.SWAMP_TURNS + 1
-
     # @Utils.time_measure
-    def get_shortest_path(self, src, name_of_other_object, number_of_object):
-        q = [src]
-        in_queue = {src.pos: True}
-        dist = {src.pos: 0}
-        parent = {src.pos: src.pos}
-
+    def get_shortest_path(self, src, name_of_other_object, number_of_object, deadline=None):
         if (src.discovered and src.wall) or (getattr(src, name_of_other_object) > 0 and number_of_object == 0):
             return {
-                'dist': dist,
-                'parent': parent,
+                'dist': {src.pos: 0},
+                'parent': {src.pos: src.pos},
             }
 
-        while q:
-            current_node = q.pop(0)
-            neighbors = self.get_neighbors_with_not_discovered_nodes(current_node.pos)
-            in_queue[current_node.pos] = False
-
-            for neighbor in neighbors:
-                next_node = self.nodes[neighbor]
-                if getattr(next_node, name_of_other_object) > 0 and number_of_object == 0:
-                    continue
-                if number_of_object and next_node.trap:
-                    continue
-
-                weight = self.get_worker_weight(current_node, next_node)
-                if dist.get(next_node.pos) is None or weight + dist[current_node.pos] < dist.get(next_node.pos):
-                    dist[next_node.pos] = weight + dist[current_node.pos]
-                    parent[next_node.pos] = current_node.pos
-                    if not in_queue.get(next_node.pos):
-                        in_queue[next_node.pos] = True
-                        q.append(next_node)
-        return {
-            'dist': dist,
-            'parent': parent,
-        }
+        walls, costs = self.walls(), self.move_costs()
+        other, trap = self.field(name_of_other_object), self.field('trap')
+        result = search(
+            [self.geometry.ids[src.pos]], self.geometry.neighbor_ids,
+            passable=lambda i: not walls[i],
+            blocked=lambda i: walls[i] or (other[i] > 0 and number_of_object == 0) or (number_of_object and trap[i]),
+            weight=lambda i, j: costs[i], max_weight=Utils.SWAMP_TURNS + 1, deadline=deadline
+        )
+        return self.search_info(result)
 
     # @Utils.time_measure
-    def get_path(self, src, dest):
-        q = [src]
-        parent = {src.pos: src.pos}
-
+    def get_path(self, src, dest, deadline=None):
         if src.wall:
             return None
 
-        while q:
-            current_node = q.pop(0)
-            neighbors = self.get_neighbors(current_node.pos)
-
-            for neighbor in neighbors:
-                next_node = self.nodes[neighbor]
-                if parent.get(next_node.pos) is None:
-                    parent[next_node.pos] = current_node.pos
-                    q.append(next_node)
-                    if next_node.pos == dest.pos:
-                        path = []
-                        last_node_pos = next_node.pos
-                        while last_node_pos != src.pos:
-                            path.append(self.nodes[last_node_pos])
-                            last_node_pos = parent[last_node_pos]
-                        return list(reversed(path))
-        return None
+        wall, discovered = self.field('wall'), self.field('discovered')
+        target = self.geometry.ids[dest.pos]
+        result = search(
+            [self.geometry.ids[src.pos]], self.geometry.neighbor_ids,
+            passable=lambda i: discovered[i] and not wall[i], blocked=lambda i: wall[i],
+            early_exit=lambda i, d: i == target, deadline=deadline
+        )
+        path = result.path(target)
+        return self.nodes_of(path) if path else None
 
     # @Utils.time_measure
-    def get_path_with_non_discovered(self, src, dest, unsafe_cells=None, name='soldier'):
+    def get_path_with_non_discovered(self, src, dest, unsafe_cells=None, name='soldier', deadline=None):
         if src == dest:
             # print('IM IN TARGET')
             raise
@@ -290,97 +323,65 @@ class Graph:
                 )
             )
 
-        q = [src]
-        in_queue = {src.pos: True}
-        dist = {src.pos: 0}
-        parent = {src.pos: src.pos}
-
         if src.wall:
             return None
 
-        while q:
-            current_node = q.pop(0)
-            in_queue[current_node.pos] = False
-            neighbors = self.get_neighbors_with_not_discovered_nodes(current_node.pos)
-
-            for neighbor in neighbors:
-                next_node = self.nodes[neighbor]
-                if next_node.pos in unsafe_pos:
-                    continue
-                if parent.get(next_node.pos) is None:
-                    parent[next_node.pos] = current_node.pos
-                    q.append(next_node)
-                    weight = getattr(self, f'get_{name}_weight')(current_node, next_node)
-                    if dist.get(next_node.pos) is None or weight + dist[current_node.pos] < dist.get(next_node.pos):
-                        dist[next_node.pos] = weight + dist[current_node.pos]
-                        parent[next_node.pos] = current_node.pos
-                        if not in_queue.get(next_node.pos):
-                            in_queue[next_node.pos] = True
-                            q.append(next_node)
-
-        return self.get_first_move_from_parent(parent, src.pos, dest.pos) if dist.get(dest.pos) else None
+        walls, costs, positions = self.walls(), self.move_costs(), self.geometry.positions
+        target = self.geometry.ids[dest.pos]
+        result = search(
+            [self.geometry.ids[src.pos]], self.geometry.neighbor_ids,
+            passable=lambda i: not walls[i], blocked=lambda i: walls[i] or positions[i] in unsafe_pos,
+            weight=lambda i, j: costs[i], max_weight=Utils.SWAMP_TURNS + 1,
+            early_exit=lambda i, d: i == target, deadline=deadline
+        )
+        move = result.first_move(target)
+        return positions[move] if move is not None else None
 
     # @Utils.time_measure
-    def get_path_with_max_length(self, src, dest, max_len):
-        q = [src]
-        parent = {src.pos: src.pos}
-
+    def get_path_with_max_length(self, src, dest, max_len, deadline=None):
         if src.wall:
             return None
 
-        while q:
-            current_node = q.pop(0)
-            neighbors = self.get_neighbors_with_not_discovered_nodes(current_node.pos)
-
-            for neighbor in neighbors:
-                next_node = self.nodes[neighbor]
-                if parent.get(next_node.pos) is None:
-                    parent[next_node.pos] = current_node.pos
-
-                    path = []
-                    last_node_pos = next_node.pos
-                    while last_node_pos != src.pos:
-                        path.append(self.nodes[last_node_pos])
-                        last_node_pos = parent[last_node_pos]
-                    if len(path) > max_len:
-                        return None
-
-                    q.append(next_node)
-                    if next_node.pos == dest.pos:
-                        path = []
-                        last_node_pos = next_node.pos
-
-                        while last_node_pos != src.pos:
-                            path.append(self.nodes[last_node_pos])
-                            last_node_pos = parent[last_node_pos]
-                        return list(reversed(path))
-        return None
+        walls = self.walls()
+        target = self.geometry.ids[dest.pos]
+        result = search(
+            [self.geometry.ids[src.pos]], self.geometry.neighbor_ids,
+            passable=lambda i: not walls[i], blocked=lambda i: walls[i],
+            early_exit=lambda i, d: i == target or d > max_len, deadline=deadline
+        )
+        path = result.path(target)
+        return self.nodes_of(path) if path and len(path) <= max_len else None
 
     def get_random_nodes(self):
         return {pos: self.get_node(pos) for pos in self.nodes.keys()}
 
     # @Utils.time_measure
-    def find_all_shortest_path(self, number_of_object, name_of_object, nodes):
+    def find_all_shortest_path(self, number_of_object, name_of_object, nodes, deadline=None):
         for node, is_dest in nodes:
             pos = node.pos
             key = pos
             if is_dest:
                 key = (pos, 1)
+            name_of_other_object = 'bread' if name_of_object == 'grass' else 'grass'
+            number = number_of_object.get(name_of_object, is_dest)
+            if is_dest and pos == self.base_pos:
+                # the base never moves, read its distances off the field kept across turns
+                field = self.base_field((name_of_other_object, bool(number)),
+                                        resource_rules(name_of_other_object, bool(number)))
+                self.shortest_path_info[name_of_object][key] = {'dist': DistancesFromBase(field), 'parent': {}}
+                continue
             self.shortest_path_info[name_of_object][key] = self.get_shortest_path(
-                node, 'bread' if name_of_object == 'grass' else 'grass',
-                number_of_object.get(name_of_object, is_dest)
+                node, name_of_other_object, number, deadline
             )
 
     # @Utils.time_measure
-    def get_nearest_grass_nodes(self, src, dest, number_of_object):
+    def get_nearest_grass_nodes(self, src, dest, number_of_object, deadline=None):
         number = number_of_object.get('grass', 0)
-        grass_nodes_temp = []
-        for node in self.nodes.values():
-            if node.grass > 0 and node.pos != src.pos and node.pos != dest.pos:
-                grass_nodes_temp.append(node)
+        grass_nodes_temp = [self.nodes[pos] for pos in self.resource_cells('grass')
+                            if pos != src.pos and pos != dest.pos]
 
         self.find_all_shortest_path(
-            number_of_object, 'grass', [(src, 0), (dest, 1)]
+            number_of_object, 'grass', [(src, 0), (dest, 1)], deadline
         )
 
         # print(grass_nodes_temp)
@@ -397,15 +398,13 @@ class Graph:
                :self.TSP_NODE_LIMIT]
 
     # @Utils.time_measure
-    def get_nearest_bread_nodes(self, src, dest, number_of_object):
+    def get_nearest_bread_nodes(self, src, dest, number_of_object, deadline=None):
         number = number_of_object.get('bread', 0)
-        bread_nodes_temp = []
-        for node in self.nodes.values():
-            if node.bread > 0 and node.pos != src.pos and node.pos != dest.pos:
-                bread_nodes_temp.append(node)
+        bread_nodes_temp = [self.nodes[pos] for pos in self.resource_cells('bread')
+                            if pos != src.pos and pos != dest.pos]
 
         self.find_all_shortest_path(
-            number_of_object, 'bread', [(src, 0), (dest, 1)]
+            number_of_object, 'bread', [(src, 0), (dest, 1)], deadline
         )
         # print(bread_nodes_temp)
         bread_nodes = []
@@ -430,7 +429,10 @@ class Graph:
 
     # @Utils.time_measure
     def get_shortest_path_from_shortest_path_info(self, src_pos, dest_pos, name_of_object):
-        parent = self.shortest_path_info[name_of_object][src_pos].get('parent', [])
+        parent = self.shortest_path_info[name_of_object][src_pos].get('parent', {})
+        if dest_pos not in parent:
+            # the search was cut short by its deadline before reaching dest
+            return []
         pos = dest_pos
         path = []
         while parent[pos] != pos:
@@ -439,52 +441,39 @@ class Graph:
         return list(reversed(path))
 
     # @Utils.time_measure
-    def get_first_move_to_enemy_base(self, src_pos):
+    def get_first_move_to_enemy_base(self, src_pos, deadline=None):
         our_base = self.base_pos
         their_base = self.enemy_base_pos or (self.dim[0] - 1 - our_base[0], self.dim[1] - 1 - our_base[1])
-        path = self.get_path(self.nodes[src_pos], self.nodes[their_base])
+        path = self.get_path(self.nodes[src_pos], self.nodes[their_base], deadline)
         return self.step(src_pos, path[0].pos) if path else "None"
 
     # @Utils.time_measure
-    def get_first_move_to_opposite_node(self, src_pos):
+    def get_first_move_to_opposite_node(self, src_pos, deadline=None):
         opposite_node_pos = (self.dim[0] - 1 - src_pos[0], self.dim[1] - 1 - src_pos[1])
-        path = self.get_path(self.nodes[src_pos], self.nodes[opposite_node_pos])
+        path = self.get_path(self.nodes[src_pos], self.nodes[opposite_node_pos], deadline)
         return self.step(src_pos, path[0].pos) if path else "None"
 
     # @Utils.time_measure
-    def get_edge_nodes(self, src):
-        q = [src]
-        parent = {src.pos: src.pos}
-        dist = {src.pos: 0}
-        edge_nodes = set()
-
+    def get_edge_nodes(self, src, deadline=None):
         if src.wall:
             return None
 
-        while q:
-            current_node = q.pop(0)
-            neighbors = self.get_neighbors_with_not_discovered_nodes(current_node.pos)
-
-            for neighbor in neighbors:
-                next_node = self.nodes[neighbor]
-                if not next_node.discovered:
-                    edge_nodes.add(current_node.pos)
-                    continue
-                if parent.get(next_node.pos) is None:
-                    parent[next_node.pos] = current_node.pos
-                    dist[next_node.pos] = dist[current_node.pos] + 1
-                    q.append(next_node)
-
+        walls, discovered = self.walls(), self.field('discovered')
+        result = search(
+            [self.geometry.ids[src.pos]], self.geometry.neighbor_ids,
+            passable=lambda i: not walls[i], blocked=lambda i: walls[i] or not discovered[i], deadline=deadline
+        )
+        info = self.search_info(result)
         return {
-            'edge_nodes': sorted(list(edge_nodes)),
-            'distance': dist,
-            'parent': parent,
+            'edge_nodes': self.frontier(result, walls, discovered),
+            'distance': info['dist'],
+            'parent': info['parent'],
         }
 
     # @Utils.time_measure
-    def get_best_list(self, src, each_list_max_size):
+    def get_best_list(self, src, each_list_max_size, deadline=None):
         if not self.edge_nodes:
-            self.bfs(src)
+            self.bfs(src, deadline)
         edge_nodes = self.edge_nodes
         distance = self.bfs_info.get('dist')
         parent = self.bfs_info.get('parent')
@@ -511,7 +500,7 @@ class Graph:
                 mn_idx = i
                 mn_value = value
 
-        return all_list[mn_idx], parent
+        return (all_list[mn_idx] if all_list else []), parent
 
     @staticmethod
     def get_value_of_list(list_of_candidate, dist):
@@ -521,12 +510,15 @@ class Graph:
         return value / len(list_of_candidate)
 
     # @Utils.time_measure
-    def get_first_move_to_discover(self, curr_pos, src_pos, each_list_max_size, my_id, all_ids):
+    def get_first_move_to_discover(self, curr_pos, src_pos, each_list_max_size, my_id, all_ids, deadline=None,
+                                   rng=None):
         src = self.nodes[src_pos]
         # print("FIRST MOVE EDGE NODES", self.edge_nodes)
-        best_list, parent = self.get_best_list(src, each_list_max_size)
+        best_list, parent = self.get_best_list(src, each_list_max_size, deadline)
         # print(best_list)
-        idx = random.randint(0, len(best_list) - 1)
+        if not best_list:
+            return "CENTER", None
+        idx = (rng or random).randint(0, len(best_list) - 1)
         ids = all_ids[-each_list_max_size:]
 
         for i in range(len(ids)):
@@ -551,43 +543,17 @@ class Graph:
         return last
 
     # @Utils.time_measure
-    def bfs(self, src):
-        self.edge_nodes = []
-        q = [src]
-        in_queue = {src.pos: True}
-        dist = {src.pos: 0}
-        parent = {src.pos: src.pos}
-
-        while q:
-            current_node = q.pop(0)
-            neighbors = self.get_neighbors_with_not_discovered_nodes(current_node.pos)
-            in_queue[current_node.pos] = False
-
-            for neighbor in neighbors:
-                next_node = self.nodes[neighbor]
-                if not next_node.discovered:
-                    self.edge_nodes.append(current_node.pos)
-                    continue
-                weight = self.get_soldier_weight(current_node, next_node)
-                if dist.get(next_node.pos) is None or weight + dist[current_node.pos] < dist.get(next_node.pos):
-                    dist[next_node.pos] = weight + dist[current_node.pos]
-                    parent[next_node.pos] = current_node.pos
-                    if not in_queue.get(next_node.pos):
-                        in_queue[next_node.pos] = True
-                        q.append(next_node)
-
-        # print("EDGE NODES", self.edge_nodes)
-        self.edge_nodes = list(set(self.edge_nodes))
-        self.edge_nodes.sort()
-        self.bfs_info = {
-            'dist': dist,
-            'parent': parent,
-        }
+    def bfs(self, src, deadline=None):
+        walls, discovered, costs = self.walls(), self.field('discovered'), self.move_costs()
+        result = search(
+            [self.geometry.ids[src.pos]], self.geometry.neighbor_ids,
+            passable=lambda i: not walls[i], blocked=lambda i: walls[i] or not discovered[i],
+            weight=lambda i, j: costs[i], max_weight=Utils.SWAMP_TURNS + 1, deadline=deadline
+        )
+        self.edge_nodes = self.frontier(result, walls, discovered)
+        self.bfs_info = self.search_info(result)
         return self.bfs_info
 
-    def get_soldier_weight(self, src, dest):
-        return int(src.swamp) * Utils.SWAMP_TURNS + 1
-
     # @Utils.time_measure
     def get_best_node_to_support(self, src_pos, grass_weight=1, bread_weight=1, distance_weight=1):
         src = self.nodes[src_pos]
@@ -614,29 +580,31 @@ class Graph:
         return self.get_first_move_from_parent(parent, src.pos, best_pos)
 
     # @Utils.time_measure
-    def get_resource_best_move(self, src_pos, dest_pos, name_of_object, limit, number_of_object):
+    def get_resource_best_move(self, src_pos, dest_pos, name_of_object, limit, number_of_object, deadline=None):
         best_nodes = getattr(
             self, f'get_nearest_{name_of_object}_nodes'
-        )(self.nodes[src_pos], self.nodes[dest_pos], number_of_object)
+        )(self.nodes[src_pos], self.nodes[dest_pos], number_of_object, deadline)
         number_of_bread_need = max(0, limit[name_of_object]['min'] - number_of_object.get(name_of_object, 0))
         if number_of_bread_need == 0:
-            return Direction.get_value(self.step(
-                src_pos, self.get_shortest_path_from_shortest_path_info(src_pos, self.base_pos, name_of_object)[0])
-            ), name_of_object, self.get_shortest_distance(
+            path = self.get_shortest_path_from_shortest_path_info(src_pos, self.base_pos, name_of_object)
+            if not path:
+                return None, None, math.inf
+            return Direction.get_value(self.step(src_pos, path[0])), name_of_object, self.get_shortest_distance(
                 self.nodes[src_pos], self.nodes[self.base_pos], name_of_object
             )
         if not best_nodes:
             return None, None, math.inf
 
-        return Direction.get_value(self.step(
-            src_pos, self.get_shortest_path_from_shortest_path_info(src_pos, best_nodes[0].pos, name_of_object)[0])
-        ), name_of_object, self.get_shortest_distance(
+        path = self.get_shortest_path_from_shortest_path_info(src_pos, best_nodes[0].pos, name_of_object)
+        if not path:
+            return None, None, math.inf
+        return Direction.get_value(self.step(src_pos, path[0])), name_of_object, self.get_shortest_distance(
             self.nodes[src_pos], self.nodes[best_nodes[0].pos], name_of_object, default=math.inf
         )
 
     # @Utils.time_measure
     def convert_grass_cells_to_wall(self):
-        converted_map = Graph((self.dim[0], self.dim[1]), self.base_pos)
+        converted_map = type(self)((self.dim[0], self.dim[1]), self.base_pos)
         for pos in self.nodes.keys():
             if self.nodes[pos].grass > 0:
                 converted_map.nodes[pos] = Node(
@@ -650,7 +618,7 @@ class Graph:
 
     # @Utils.time_measure
     def convert_bread_cells_to_wall(self):
-        converted_map = Graph((self.dim[0], self.dim[1]), self.base_pos)
+        converted_map = type(self)((self.dim[0], self.dim[1]), self.base_pos)
         for pos in self.nodes.keys():
             if self.nodes[pos].bread > 0:
                 converted_map.nodes[pos] = Node(
@@ -663,7 +631,7 @@ class Graph:
         return converted_map
 
     def convert_base_possible_cells_to_wall(self, base_possible_cells):
-        converted_map = Graph((self.dim[0], self.dim[1]), self.base_pos)
+        converted_map = type(self)((self.dim[0], self.dim[1]), self.base_pos)
         possible_list = [p[1] for p in base_possible_cells]
         for pos in self.nodes.keys():
             if pos in possible_list:
@@ -676,60 +644,50 @@ class Graph:
                 converted_map.nodes[pos] = self.nodes[pos]
         return converted_map
 
-    def get_first_move_to_base(self, src, number_of_object):
-        dest = self.nodes[self.base_pos]
+    def get_first_move_to_base(self, src, number_of_object, deadline=None):
         resource_number = number_of_object.get('bread', 0) + number_of_object.get('grass', 0)
-        if src.pos == dest.pos:
+        if src.pos == self.base_pos:
             # print('IM IN base')
             return None
 
-        q = [src]
-        in_queue = {src.pos: True}
-        dist = {src.pos: 0}
-        parent = {src.pos: src.pos}
-
         if src.wall:
             return None
 
-        while q:
-            current_node = q.pop(0)
-            in_queue[current_node.pos] = False
-            neighbors = self.get_neighbors(current_node.pos)
-
-            for neighbor in neighbors:
-                next_node = self.nodes[neighbor]
-                if int(next_node.trap) * resource_number:
-                    continue
-                if parent.get(next_node.pos) is None:
-                    parent[next_node.pos] = current_node.pos
-                    q.append(next_node)
-                    weight = self.get_worker_weight(current_node, next_node)
-                    if dist.get(next_node.pos) is None or weight + dist[current_node.pos] < dist.get(next_node.pos):
-                        dist[next_node.pos] = weight + dist[current_node.pos]
-                        parent[next_node.pos] = current_node.pos
-                        if not in_queue.get(next_node.pos):
-                            in_queue[next_node.pos] = True
-                            q.append(next_node)
-
-        return Direction.get_value(
-            self.step(src.pos, self.get_first_move_from_parent(parent, src.pos, dest.pos))
-        ) if dist.get(dest.pos) else None
-
-    def get_reachable_resource_from_base(self):
-        reachable_resource = set()
-        q = [self.nodes[self.base_pos]]
-        parent = {self.base_pos: self.base_pos}
-
-        while q:
-            current_node = q.pop(0)
-            if current_node.bread + current_node.grass > 0:
-                reachable_resource.add(current_node.pos)
-            neighbors = self.get_neighbors(current_node.pos)
-
-            for neighbor in neighbors:
-                next_node = self.nodes[neighbor]
-                if not next_node.trap and parent.get(next_node.pos) is None:
-                    parent[next_node.pos] = current_node.pos
-                    q.append(next_node)
-
-        return reachable_resource
+        carrying = resource_number != 0
+        move = self.base_field(('home', carrying), home_rules(carrying)).first_move(src.pos)
+        return Direction.get_value(self.step(src.pos, move)) if move is not None else None
+
+    def get_move_to_nearest_resource(self, src, name_of_object, number_of_object):
+        # one step down the field of the nearest cell with this resource, and the cost of the whole way there
+        field = self.resource_field(name_of_object, number_of_object.get(name_of_object, 0) != 0)
+        move, distance = field.first_move(src.pos), field.distance(src.pos)
+        if move is None:
+            return None, None, math.inf
+        return Direction.get_value(self.step(src.pos, move)), name_of_object, distance
+
+    def base_field(self, key, rules):
+        return self.flow_field(key, lambda: BaseField(self, *rules))
+
+    def resource_field(self, name_of_object, carrying):
+        name_of_other_object = 'bread' if name_of_object == 'grass' else 'grass'
+        return self.flow_field(('nearest', name_of_object, carrying), lambda: ResourceField(
+            self, name_of_object, *resource_rules(name_of_other_object, carrying)
+        ))
+
+    def flow_field(self, key, make):
+        field = self.flow_fields.get(key)
+        if field is None:
+            field = self.flow_fields[key] = make()
+        else:
+            field.update()
+        return field
+
+    def get_reachable_resource_from_base(self, deadline=None):
+        wall, discovered, trap = self.field('wall'), self.field('discovered'), self.field('trap')
+        bread, grass = self.field('bread'), self.field('grass')
+        result = search(
+            [self.geometry.ids[self.base_pos]], self.geometry.neighbor_ids,
+            passable=lambda i: discovered[i] and not wall[i], blocked=lambda i: wall[i] or trap[i], deadline=deadline
+        )
+        positions = self.geometry.positions
+        return {positions[i] for i in result.reached if result.settled[i] and bread[i] + grass[i] > 0}
@@ -0,0 +1,9 @@
+PREFIX = "id"
+
+
+def encode_id(ant_type, ant_id):
+    return PREFIX + str(ant_type) + str(ant_id)
+
+
+def decode_id(s):
+    return int(s[2]), int(s[3:])
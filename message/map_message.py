@@ -1,6 +1,7 @@
 from copy import deepcopy
 
-from Utils import get_view_distance_neighbors, time_measure
+from Utils import time_measure
+from geometry import get_geometry
 from graph import Node
 
 MESSAGE_VALUE = {
@@ -49,33 +50,33 @@ def encode_graph_nodes(pos, nodes: dict, w, h, view, ant_id, direction,
     # id 1c, pos 2c (14b), walls w*1c, swamps s*1c, traps s*1c
     # breads b*2c, grasses g*2c, ally soldiers as*1c,
     # enemy soldiers es*1c, status 1c
-    neighbors = get_view_distance_neighbors(pos, w, h, view)
+    index = get_geometry(w, h).view_index(pos, view)
     arr = [[], [], []]  # for the values (b, g, as, es)
     s = chr(ant_id + CONSTANT) + pos_str(pos, w, h)
     for p, n in nodes.items():
         if n.wall:
-            s += chr(neighbors.index(p) + CONSTANT)
+            s += chr(index[p] + CONSTANT)
     s += DELIM
     
     for p, n in nodes.items():
         if n.swamp:
-            s += chr(neighbors.index(p) + CONSTANT)
+            s += chr(index[p] + CONSTANT)
     s += DELIM
     
     for p, n in nodes.items():
         if n.trap:
-            s += chr(neighbors.index(p) + CONSTANT)
+            s += chr(index[p] + CONSTANT)
     s += DELIM
     
     for p, n in nodes.items():
-        values = [list(n.__dict__.values())[5], list(n.__dict__.values())[6], list(n.__dict__.values())[10]]
+        values = [n.bread, n.grass, n.enemy_soldiers]
         for i, v in enumerate(values):
             if v > 0:
                 if i < 2:
-                    arr[i].append(chr(neighbors.index(p) + CONSTANT))
+                    arr[i].append(chr(index[p] + CONSTANT))
                     arr[i].append(chr(min(v, 220) + CONSTANT))
                 else:
-                    pos_cnt = f'{neighbors.index(p):06b}' + unit_count_enc(v)
+                    pos_cnt = f'{index[p]:06b}' + unit_count_enc(v)
                     arr[i].append(chr(int(pos_cnt, 2) + CONSTANT))
     
     status = direction_enc(direction) + str(int(shot)) + '0000'
@@ -94,7 +95,7 @@ def decode_nodes(nodes_str: str, w, h, view):
     ant_id = ord(nodes_str[0]) - CONSTANT
     pos = str_pos(nodes_str[1:3], w, h)
     nodes_str = nodes_str[3:]
-    neighbors = get_view_distance_neighbors(pos, w, h, view)
+    neighbors = get_geometry(w, h).view_cells(pos, view)
     direction = direction_dec('000')
     shot = False
     enemy_base_pos = None
@@ -186,7 +187,7 @@ def decode_nodes(nodes_str: str, w, h, view):
         if i == 7 and len(part) > 0:  # enemy base pos
             enemy_base_pos = str_pos(part, w, h)
     
-    for i in get_view_distance_neighbors(pos, w, h, view):
+    for i in neighbors:
         if i not in non_empties:
             ret[i] = Node(i, True, False)
     
@@ -0,0 +1,69 @@
+from bisect import bisect_left
+
+from message.id_message import decode_id
+from message.map_message import DELIM, decode_nodes
+from message.possible_base_message import decode_possible_cells
+from message.support_cell_message import decode_support_cell
+
+
+class ChatKind:
+    def __init__(self, name, prefix, decode, handler, match=None):
+        self.name = name
+        self.prefix = prefix
+        self.decode = decode
+        self.handler = handler
+        self.match = match or (lambda text: text.startswith(prefix))
+
+
+# checked in order, the first kind that matches a message owns it
+# to add a message type: write its codec in message/ and register it here with the name of its AI handler
+CHAT_KINDS = [
+    ChatKind("sc", "sc", lambda text, w, h, view: decode_support_cell(text, w, h), "on_support_cell_message"),
+    ChatKind("sh", "sh", lambda text, w, h, view: decode_possible_cells(text, w, h), "on_possible_cells_message"),
+    ChatKind("map", None, decode_nodes, "on_map_message", match=lambda text: DELIM in text),
+    ChatKind("id", "id", lambda text, w, h, view: decode_id(text), "on_id_message"),
+]
+KINDS_BY_NAME = {kind.name: kind for kind in CHAT_KINDS}
+
+
+def kind_of(text):
+    for kind in CHAT_KINDS:
+        if kind.match(text):
+            return kind
+    return None
+
+
+class ChatRouter:
+    def __init__(self, w, h, view):
+        self.w = w
+        self.h = h
+        self.view = view
+        self.seen = 0
+        # kind name -> positions in the chat box, and (kind name, turn) -> positions
+        self.by_kind = {kind.name: [] for kind in CHAT_KINDS}
+        self.by_turn = {}
+
+    def route(self, chat_box):
+        # one pass over the messages that arrived since the last call
+        chats = chat_box.allChats
+        for position in range(self.seen, len(chats)):
+            kind = kind_of(chats[position].text)
+            if kind is not None:
+                self.by_kind[kind.name].append(position)
+                self.by_turn.setdefault((kind.name, chats[position].turn), []).append(position)
+        self.seen = len(chats)
+
+    def select(self, name, turn=None, last=None, since=None):
+        positions = self.by_kind[name] if turn is None else self.by_turn.get((name, turn), [])
+        if last is not None:
+            positions = positions[bisect_left(positions, self.seen - last):]
+        if since is not None:
+            positions = positions[bisect_left(positions, since):]
+        return positions
+
+    def dispatch(self, chat_box, target, name, turn=None, last=None, since=None):
+        kind = KINDS_BY_NAME[name]
+        handler = getattr(target, kind.handler)
+        for position in self.select(name, turn, last, since):
+            chat = chat_box.allChats[position]
+            handler(chat, kind.decode(chat.text, self.w, self.h, self.view))
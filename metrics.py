@@ -0,0 +1,115 @@
+import atexit
+import json
+import os
+import threading
+import time
+
+STAGES = ["receive_to_turn", "turn", "flush"]
+PERCENTILES = [50, 90, 99, 99.9]
+
+
+class Histogram:
+    # log-linear buckets in microseconds: every power of two is split into 2 ** sub_bucket_bits
+    # linear buckets, so a recorded value is off by at most 1 / 2 ** sub_bucket_bits
+    def __init__(self, sub_bucket_bits=5):
+        self.bits = sub_bucket_bits + 1
+        self.half = 1 << sub_bucket_bits
+        self.counts = {}
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+
+    def index(self, value):
+        magnitude = value.bit_length() - self.bits
+        if magnitude <= 0:
+            return value
+        return magnitude * self.half + (value >> magnitude)
+
+    def highest_value(self, index):
+        if index < 2 * self.half:
+            return index
+        magnitude = index // self.half - 1
+        top = index - magnitude * self.half
+        return ((top + 1) << magnitude) - 1
+
+    def record(self, seconds):
+        value = max(0, int(seconds * 1e6))
+        i = self.index(value)
+        self.counts[i] = self.counts.get(i, 0) + 1
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def percentile(self, p):
+        if not self.count:
+            return None
+        rank = max(1, int(round(p / 100 * self.count)))
+        seen = 0
+        for i in sorted(self.counts):
+            seen += self.counts[i]
+            if seen >= rank:
+                return min(self.highest_value(i), self.max)
+        return self.max
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "sum_us": self.total,
+            "min_us": self.min,
+            "max_us": self.max,
+            "percentiles_us": {str(p): self.percentile(p) for p in PERCENTILES},
+        }
+
+
+class TurnMetrics:
+    def __init__(self, path, fmt="json", interval=5.0):
+        self.path = path
+        self.fmt = fmt
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.histograms = {}
+        self.last_export = time.monotonic()
+        atexit.register(self.export)
+
+    def record(self, stage, ant, state, seconds):
+        key = (stage, ant, state)
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.record(seconds)
+
+    def maybe_export(self):
+        if time.monotonic() - self.last_export >= self.interval:
+            self.export()
+
+    def export(self):
+        with self.lock:
+            self.last_export = time.monotonic()
+            text = self.prometheus() if self.fmt == "prometheus" else self.json()
+        # written next to the target and renamed so readers never see half a file
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            f.write(text)
+        os.replace(tmp, self.path)
+
+    def json(self):
+        series = []
+        for (stage, ant, state), histogram in sorted(self.histograms.items()):
+            series.append(dict(stage=stage, ant=ant, state=state, **histogram.summary()))
+        return json.dumps({"time": time.time(), "series": series}, indent=1)
+
+    def prometheus(self):
+        lines = ["# TYPE aic_turn_stage_seconds summary"]
+        for (stage, ant, state), histogram in sorted(self.histograms.items()):
+            labels = 'stage="{}",ant="{}",state="{}"'.format(stage, ant, state)
+            for p in PERCENTILES:
+                lines.append('aic_turn_stage_seconds{{{},quantile="{:g}"}} {}'.format(
+                    labels, p / 100, histogram.percentile(p) / 1e6))
+            lines.append('aic_turn_stage_seconds_sum{{{}}} {}'.format(labels, histogram.total / 1e6))
+            lines.append('aic_turn_stage_seconds_count{{{}}} {}'.format(labels, histogram.count))
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,61 @@
+import atexit
+import cProfile
+import os
+import pstats
+import threading
+import time
+
+
+class TurnProfiler:
+    def __init__(self, out_dir="profiles", top_n=30, threshold_ms=200.0):
+        self.out_dir = out_dir
+        self.top_n = top_n
+        self.threshold_ms = threshold_ms
+        self.lock = threading.Lock()
+        self.stats = None
+        self.turn_times = []
+        self.written = False
+        os.makedirs(out_dir, exist_ok=True)
+        atexit.register(self.write_report)
+
+    def run(self, fn, *args, turn=None):
+        profile = cProfile.Profile()
+        start = time.perf_counter()
+        profile.enable()
+        try:
+            return fn(*args)
+        finally:
+            profile.disable()
+            self.add(profile, (time.perf_counter() - start) * 1000, turn)
+
+    def add(self, profile, elapsed_ms, turn):
+        with self.lock:
+            self.turn_times.append((turn, elapsed_ms))
+            if self.stats is None:
+                self.stats = pstats.Stats(profile)
+            else:
+                self.stats.add(profile)
+        if elapsed_ms > self.threshold_ms:
+            # slow turns keep their full profile, open them with pstats or snakeviz
+            profile.dump_stats(os.path.join(self.out_dir, "turn_{}_{:.0f}ms.prof".format(turn, elapsed_ms)))
+
+    def write_report(self):
+        with self.lock:
+            if self.written or self.stats is None:
+                return
+            self.written = True
+            self.stats.dump_stats(os.path.join(self.out_dir, "all_turns.prof"))
+            times = [t for _, t in self.turn_times]
+            slowest = sorted(self.turn_times, key=lambda x: x[1], reverse=True)[:10]
+            with open(os.path.join(self.out_dir, "report.txt"), "w") as f:
+                f.write("turns: {} total: {:.1f} ms mean: {:.2f} ms max: {:.2f} ms over {:.0f} ms: {}\n".format(
+                    len(times), sum(times), sum(times) / len(times), max(times), self.threshold_ms,
+                    len([t for t in times if t > self.threshold_ms])))
+                f.write("slowest turns: {}\n\n".format(
+                    ", ".join("{} ({:.1f} ms)".format(turn, t) for turn, t in slowest)))
+                self.stats.stream = f
+                f.write("==== top {} by cumulative time ====\n".format(self.top_n))
+                self.stats.sort_stats("cumulative").print_stats(self.top_n)
+                f.write("==== top {} by self time ====\n".format(self.top_n))
+                self.stats.sort_stats("tottime").print_stats(self.top_n)
+        print("profile report written to", os.path.join(self.out_dir, "report.txt"))
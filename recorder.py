@@ -0,0 +1,56 @@
+import atexit
+import struct
+import threading
+import time
+
+MAGIC = b'AICREC1\n'
+RECORD_HEADER = struct.Struct('<dcI')  # monotonic timestamp, direction tag, frame length
+INBOUND = b'I'
+OUTBOUND = b'O'
+
+
+class FrameRecorder:
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.file = open(path, 'ab')
+        if self.file.tell() == 0:
+            self.file.write(MAGIC)
+        atexit.register(self.close)
+
+    def record(self, direction, frame):
+        with self.lock:
+            if self.file.closed:
+                return
+            self.file.write(RECORD_HEADER.pack(time.monotonic(), direction, len(frame)))
+            self.file.write(frame)
+
+    def record_inbound(self, frames):
+        for frame in frames:
+            self.record(INBOUND, frame)
+
+    def record_outbound(self, data):
+        # outgoing buffers may hold several frames, each one is logged on its own
+        for frame in bytes(data).split(b'\x00'):
+            if frame:
+                self.record(OUTBOUND, frame)
+
+    def close(self):
+        with self.lock:
+            if not self.file.closed:
+                self.file.close()
+
+
+def read_frames(path):
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise IOError("{} is not a frame log".format(path))
+        while True:
+            header = f.read(RECORD_HEADER.size)
+            if len(header) < RECORD_HEADER.size:
+                return
+            timestamp, direction, length = RECORD_HEADER.unpack(header)
+            frame = f.read(length)
+            if len(frame) < length:
+                return
+            yield timestamp, direction, frame
@@ -0,0 +1,79 @@
+RESOURCES = ("bread", "grass")
+
+
+class Regions:
+    # explored open cells joined into regions that reach each other, a union-find with the resources of every region
+    # kept on its root. explored cells only ever open up, so regions only ever merge while reading the graph's change
+    # log. a cell that is closed again, which the game itself never does, rebuilds everything
+    def __init__(self, graph):
+        self.graph = graph
+        self.neighbor_ids = graph.geometry.neighbor_ids
+        self.base = graph.geometry.ids[graph.base_pos]
+        self.build()
+
+    def build(self):
+        graph, size = self.graph, len(self.neighbor_ids)
+        self.seen = len(graph.changes)
+        self.root = list(range(size))
+        self.size = [1] * size
+        self.open = bytearray(size)
+        # amounts: what each open cell holds. sums: what each region holds, on its root
+        self.amounts = {name: [0] * size for name in RESOURCES}
+        self.sums = {name: [0] * size for name in RESOURCES}
+        wall, discovered = graph.field('wall'), graph.field('discovered')
+        fields = {name: graph.field(name) for name in RESOURCES}
+        for i in range(size):
+            if discovered[i] and not wall[i]:
+                self.add(i, {name: fields[name][i] for name in RESOURCES})
+
+    def find(self, i):
+        root = self.root
+        while root[i] != i:
+            root[i] = root[root[i]]
+            i = root[i]
+        return i
+
+    def union(self, i, j):
+        i, j = self.find(i), self.find(j)
+        if i == j:
+            return
+        if self.size[i] < self.size[j]:
+            i, j = j, i
+        self.root[j] = i
+        self.size[i] += self.size[j]
+        for name in RESOURCES:
+            self.sums[name][i] += self.sums[name][j]
+
+    def add(self, i, amounts):
+        self.open[i] = True
+        for name in RESOURCES:
+            self.amounts[name][i] = self.sums[name][i] = amounts[name]
+        for j in self.neighbor_ids[i]:
+            if self.open[j]:
+                self.union(i, j)
+
+    def update(self):
+        changes = self.graph.changes
+        if self.seen == len(changes):
+            return
+        changed = set(changes[self.seen:])
+        self.seen = len(changes)
+
+        for i in changed:
+            node = self.graph.nodes[self.graph.geometry.positions[i]]
+            amounts = {name: getattr(node, name) for name in RESOURCES}
+            if not node.discovered or node.wall:
+                if self.open[i]:
+                    return self.build()
+            elif not self.open[i]:
+                self.add(i, amounts)
+            else:
+                root = self.find(i)
+                for name in RESOURCES:
+                    self.sums[name][root] += amounts[name] - self.amounts[name][i]
+                    self.amounts[name][i] = amounts[name]
+
+    def reachable_from_base(self, name_of_object):
+        # resources in every cell with a path to base, the base itself never had a path to itself
+        self.update()
+        return self.sums[name_of_object][self.find(self.base)] - self.amounts[name_of_object][self.base]
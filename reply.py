@@ -0,0 +1,39 @@
+import json
+
+from Model import Direction
+
+FRAME_END = b'\x00'
+
+
+def encode_frame(message):
+    return json.dumps(message, default=str).encode('UTF-8') + FRAME_END
+
+
+DIRECTION_FRAMES = {d.value: encode_frame({"type": 1, "info": {"direction": d.value}}) for d in Direction}
+END_FRAME = encode_frame({"type": 6, "info": {}})
+
+
+class TurnReply:
+    def __init__(self, codec=None):
+        self.codec = codec
+        self.buf = bytearray()
+
+    def direction(self, direction):
+        frame = DIRECTION_FRAMES.get(direction)
+        if frame is None:
+            frame = encode_frame({"type": 1, "info": {"direction": direction}})
+        self.buf += frame
+
+    def chat(self, message, value):
+        message = {"type": 2, "info": {"message": message, "value": value}}
+        if self.codec is None:
+            self.buf += encode_frame(message)
+        else:
+            self.buf += self.codec.dumps(message)
+            self.buf += FRAME_END
+
+    def end(self):
+        self.buf += END_FRAME
+
+    def getvalue(self):
+        return bytes(self.buf)
@@ -0,0 +1,90 @@
+from deadline import NO_DEADLINE
+
+
+class SearchResult:
+    def __init__(self, starts, dist, parent, reached, settled):
+        self.starts = starts
+        self.dist = dist
+        self.parent = parent
+        # cell ids in the order they were first labeled, and a flag per id once a cell's distance is final
+        self.reached = reached
+        self.settled = settled
+
+    def path(self, target):
+        # ids from the first move to target, [] when target is a start or was not reached
+        if self.dist[target] == -1:
+            return []
+        path = []
+        while self.parent[target] != target:
+            path.append(target)
+            target = self.parent[target]
+        return list(reversed(path))
+
+    def first_move(self, target):
+        path = self.path(target)
+        return path[0] if path else None
+
+
+def search(starts, neighbor_ids, passable=None, blocked=None, weight=None, max_weight=1, early_exit=None,
+           deadline=None, dist=None, parent=None):
+    # Dial's algorithm over cell ids, every graph search is this with its own rules:
+    # passable(cell): whether the edges out of a cell are followed, every cell when None
+    # blocked(cell): whether a cell can not be entered, no cell when None
+    # weight(cell, next_cell): cost of one move, an int from 1 to max_weight, 1 when None
+    # early_exit(cell, distance): stop once this returns True for a settled cell
+    # dist and parent continue an earlier search in place, its labels only ever improve and
+    # the starts are the cells to go on from, at the distance they already have
+    size = len(neighbor_ids)
+    reached = []
+    if dist is None:
+        dist = [-1] * size
+        parent = [-1] * size
+        for start in starts:
+            if dist[start] == -1:
+                dist[start] = 0
+                parent[start] = start
+                reached.append(start)
+    settled = bytearray(size)
+    waiting = sorted((dist[start], start) for start in set(starts) if dist[start] != -1)
+    # distances are only ever max_weight ahead of the current one, so that many buckets are reused in turn
+    buckets = [[] for _ in range(max_weight + 1)]
+    pending = 0
+
+    deadline = deadline or NO_DEADLINE
+    d = waiting[0][0] if waiting else 0
+    k = 0
+    while pending or k < len(waiting):
+        if not pending:
+            d = max(d, waiting[k][0])
+        while k < len(waiting) and waiting[k][0] <= d:
+            if dist[waiting[k][1]] == d:
+                buckets[d % len(buckets)].append(waiting[k][1])
+                pending += 1
+            k += 1
+        i = d % len(buckets)
+        bucket = buckets[i]
+        buckets[i] = []
+        pending -= len(bucket)
+        for cur in bucket:
+            if deadline.expired():
+                return SearchResult(starts, dist, parent, reached, settled)
+            if settled[cur] or dist[cur] != d:
+                continue
+            settled[cur] = True
+            if early_exit is not None and early_exit(cur, d):
+                return SearchResult(starts, dist, parent, reached, settled)
+            if passable is not None and not passable(cur):
+                continue
+            for nxt in neighbor_ids[cur]:
+                if settled[nxt] or (blocked is not None and blocked(nxt)):
+                    continue
+                nd = d + (weight(cur, nxt) if weight is not None else 1)
+                if dist[nxt] == -1 or nd < dist[nxt]:
+                    if dist[nxt] == -1:
+                        reached.append(nxt)
+                    dist[nxt] = nd
+                    parent[nxt] = cur
+                    buckets[nd % len(buckets)].append(nxt)
+                    pending += 1
+        d += 1
+    return SearchResult(starts, dist, parent, reached, settled)
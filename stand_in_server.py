@@ -0,0 +1,215 @@
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+from Model import ServerConstants
+from codec import get_codec
+from framing import FrameBuffer
+from recorder import INBOUND, read_frames
+from synthetic_session import SyntheticSession
+
+CHAT_MESSAGE_TYPE = 2
+END_MESSAGE_TYPE = 6
+DEFAULT_TOKEN = "00000000000000000000000000000000"
+
+
+def percentile(values, p):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+
+class RecordedSession:
+    def __init__(self, path, codec=None):
+        self.codec = codec or get_codec()
+        self.init = None
+        self.turns = []
+        for timestamp, direction, frame in read_frames(path):
+            if direction != INBOUND:
+                continue
+            message = self.codec.loads(frame)
+            if message.get(ServerConstants.KEY_TYPE) == ServerConstants.MESSAGE_TYPE_INIT and self.init is None:
+                self.init = message
+            elif message.get(ServerConstants.KEY_TYPE) == ServerConstants.MESSAGE_TYPE_TURN:
+                # turn frames are kept raw and decoded only when they are replayed
+                self.turns.append(frame)
+        if self.init is None:
+            raise IOError("{} has no init message".format(path))
+
+    def init_message(self):
+        return self.init
+
+    def turn_message(self, turn):
+        return self.codec.loads(self.turns[turn - 1])
+
+
+class StandInServer:
+    def __init__(self, session, turns, host="127.0.0.1", port=7099, token=DEFAULT_TOKEN, rate=10.0, codec=None):
+        self.session = session
+        self.turns = turns
+        self.host = host
+        self.port = port
+        self.token = token
+        self.period = 1 / rate
+        self.codec = codec or get_codec()
+        self.listener = None
+        self.replies = []
+        self.replies_lock = threading.Lock()
+        self.report = None
+        self.current_turn = 0
+
+    def listen(self):
+        self.listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.listener.bind((self.host, self.port))
+        self.listener.listen(1)
+        self.port = self.listener.getsockname()[1]
+
+    def send(self, conn, message):
+        conn.sendall(self.codec.dumps(message) + b'\x00')
+
+    def handshake(self, conn, buffer):
+        frames = []
+        while not frames:
+            frames = buffer.read_from(conn)
+        hello = self.codec.loads(frames[0])
+        info = hello.get(ServerConstants.KEY_INFO) or {}
+        if hello.get(ServerConstants.KEY_TYPE) != ServerConstants.CONFIG_KEY_TOKEN or \
+                info.get(ServerConstants.CONFIG_KEY_TOKEN) != self.token:
+            self.send(conn, {ServerConstants.KEY_TYPE: "wrong token", ServerConstants.KEY_INFO: {}})
+            return False
+        return True
+
+    def collect(self, conn, buffer):
+        while True:
+            try:
+                frames = buffer.read_from(conn)
+            except OSError:
+                return
+            now = time.monotonic()
+            with self.replies_lock:
+                for f in frames:
+                    reply = self.codec.loads(f)
+                    self.replies.append((now, reply))
+                    if reply.get(ServerConstants.KEY_TYPE) == CHAT_MESSAGE_TYPE and hasattr(self.session, "add_chat"):
+                        # the real server echoes every chat message back to the team on the next turn
+                        self.session.add_chat(reply[ServerConstants.KEY_INFO]["message"], self.current_turn)
+
+    def serve(self):
+        if self.listener is None:
+            self.listen()
+        conn, _ = self.listener.accept()
+        conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        buffer = FrameBuffer()
+        sent_at = []
+        try:
+            if not self.handshake(conn, buffer):
+                print("stand-in: client sent a wrong token")
+                return None
+            self.send(conn, self.session.init_message())
+            collector = threading.Thread(target=self.collect, args=(conn, buffer), daemon=True)
+            collector.start()
+
+            next_at = time.monotonic()
+            for turn in range(1, self.turns + 1):
+                time.sleep(max(0.0, next_at - time.monotonic()))
+                with self.replies_lock:
+                    self.current_turn = turn
+                    message = self.session.turn_message(turn)
+                sent_at.append((turn, time.monotonic()))
+                self.send(conn, message)
+                next_at = sent_at[-1][1] + self.period
+            time.sleep(max(0.0, next_at - time.monotonic()))
+            self.send(conn, {ServerConstants.KEY_TYPE: ServerConstants.MESSAGE_TYPE_KILL, ServerConstants.KEY_INFO: {}})
+        except OSError as e:
+            print("stand-in: connection lost", e)
+        finally:
+            conn.close()
+            self.listener.close()
+        self.report = self.make_report(sent_at)
+        return self.report
+
+    def make_report(self, sent_at):
+        with self.replies_lock:
+            replies = list(self.replies)
+        turns = []
+        for i, (turn, start) in enumerate(sent_at):
+            end = sent_at[i + 1][1] if i + 1 < len(sent_at) else start + self.period
+            window = [(t, r) for t, r in replies if start <= t < end]
+            ends = [t for t, r in window if r.get(ServerConstants.KEY_TYPE) == END_MESSAGE_TYPE]
+            turns.append({
+                "turn": turn,
+                "latency_ms": (ends[0] - start) * 1000 if ends else None,
+                "frames": len(window),
+            })
+        latencies = [t["latency_ms"] for t in turns if t["latency_ms"] is not None]
+        return {
+            "turns": turns,
+            "answered": len(latencies),
+            "missed": len(turns) - len(latencies),
+            "p50_ms": percentile(latencies, 50),
+            "p90_ms": percentile(latencies, 90),
+            "p99_ms": percentile(latencies, 99),
+            "max_ms": max(latencies) if latencies else None,
+        }
+
+
+def print_report(report):
+    if report is None:
+        return
+    for t in report["turns"]:
+        latency = "missed" if t["latency_ms"] is None else "{:.2f} ms".format(t["latency_ms"])
+        print("turn {:>4}: {} ({} frames)".format(t["turn"], latency, t["frames"]))
+    print("answered {} missed {}".format(report["answered"], report["missed"]))
+    for key in ["p50_ms", "p90_ms", "p99_ms", "max_ms"]:
+        if report[key] is not None:
+            print("{}: {:.2f}".format(key, report[key]))
+
+
+def spawn_client(port, token):
+    env = dict(os.environ)
+    env.update({
+        "AICHostIP": "127.0.0.1",
+        "AICHostPort": str(port),
+        "AICToken": token,
+        "AICRetryDelay": "1000",
+    })
+    return subprocess.Popen([sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "Controller.py")],
+                            env=env)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=7099)
+    parser.add_argument("--token", default=DEFAULT_TOKEN)
+    parser.add_argument("--rate", type=float, default=10.0, help="turns per second")
+    parser.add_argument("--turns", type=int, default=200)
+    parser.add_argument("--width", type=int, default=50)
+    parser.add_argument("--height", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--replay", help="frame log written with AICRecordPath")
+    parser.add_argument("--spawn-client", action="store_true")
+    args = parser.parse_args()
+
+    turns = args.turns
+    if args.replay:
+        session = RecordedSession(args.replay)
+        turns = min(turns, len(session.turns))
+    else:
+        session = SyntheticSession(args.width, args.height, seed=args.seed)
+    server = StandInServer(session, turns, args.host, args.port, args.token, args.rate)
+    server.listen()
+    client = spawn_client(server.port, args.token) if args.spawn_client else None
+    print_report(server.serve())
+    if client is not None:
+        client.wait(timeout=10)
+
+
+if __name__ == "__main__":
+    main()
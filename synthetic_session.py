@@ -0,0 +1,137 @@
+import random
+
+from Model import AntTeam, AntType, CellType, ResourceType, ServerConstants
+from Utils import MAX_MESSAGES_PER_TURN, fix, get_view_distance_neighbors
+from graph import Node
+from message.map_message import encode_graph_nodes
+
+NO_RESOURCE = 2
+MOVES = [(0, 0), (1, 0), (0, -1), (-1, 0), (0, 1)]
+
+
+class SyntheticSession:
+    def __init__(self, width, height, seed=0, view_distance=4, ant_type=AntType.KARGAR.value, ants=5):
+        self.rng = random.Random(seed)
+        self.width = width
+        self.height = height
+        self.view_distance = view_distance
+        self.ant_type = ant_type
+        self.base = (self.rng.randrange(width), self.rng.randrange(height))
+        self.enemy_base = (width - 1 - self.base[0], height - 1 - self.base[1])
+        self.cells = {}
+        for i in range(width):
+            for j in range(height):
+                self.cells[(i, j)] = self.random_cell()
+        self.cells[self.base] = (CellType.BASE.value, NO_RESOURCE, 0)
+        self.cells[self.enemy_base] = (CellType.BASE.value, NO_RESOURCE, 0)
+        self.pos = self.base
+        self.ants = {ant_id: self.base for ant_id in range(1, ants + 1)}
+        self.chat_box = []
+
+    def random_cell(self):
+        r = self.rng.random()
+        if r < 0.1:
+            return CellType.WALL.value, NO_RESOURCE, 0
+        if r < 0.15:
+            return CellType.SWAMP.value, NO_RESOURCE, 0
+        if r < 0.18:
+            return CellType.TRAP.value, NO_RESOURCE, 0
+        if r < 0.28:
+            return CellType.EMPTY.value, self.rng.choice([ResourceType.BREAD.value, ResourceType.GRASS.value]), \
+                   self.rng.randint(1, 40)
+        return CellType.EMPTY.value, NO_RESOURCE, 0
+
+    def init_message(self):
+        return {
+            ServerConstants.KEY_TYPE: ServerConstants.MESSAGE_TYPE_INIT,
+            ServerConstants.KEY_TURN: 0,
+            ServerConstants.KEY_INFO: {
+                "map_width": self.width,
+                "map_height": self.height,
+                "ant_type": self.ant_type,
+                "base_x": self.base[0],
+                "base_y": self.base[1],
+                "health_kargar": 6,
+                "health_sarbaaz": 8,
+                "attack_distance": 5,
+                "view_distance": self.view_distance,
+                "generate_kargar": 10,
+                "generate_sarbaaz": 10,
+                "rate_death_resource": 2,
+            },
+        }
+
+    def step(self, pos):
+        move = MOVES[self.rng.randrange(len(MOVES))]
+        nxt = fix((pos[0] + move[0], pos[1] + move[1]), self.width, self.height)
+        return pos if self.cells[nxt][0] == CellType.WALL.value else nxt
+
+    def visible_nodes(self, pos):
+        nodes = {}
+        for p in get_view_distance_neighbors(pos, self.width, self.height, self.view_distance):
+            cell_type, res_type, res_value = self.cells[p]
+            nodes[p] = Node(p, True,
+                            wall=cell_type == CellType.WALL.value,
+                            swamp=cell_type == CellType.SWAMP.value,
+                            trap=cell_type == CellType.TRAP.value,
+                            bread=res_value if res_type == ResourceType.BREAD.value else 0,
+                            grass=res_value if res_type == ResourceType.GRASS.value else 0)
+        return nodes
+
+    def around_cells(self, pos):
+        cells = []
+        for p in get_view_distance_neighbors(pos, self.width, self.height, self.view_distance):
+            cell_type, res_type, res_value = self.cells[p]
+            ants = []
+            if p == pos:
+                ants.append({"ant_type": self.ant_type, "ant_team": AntTeam.ALLIED.value})
+            if self.rng.random() < 0.05:
+                ants.append({"ant_type": self.rng.choice([AntType.SARBAAZ.value, AntType.KARGAR.value]),
+                             "ant_team": self.rng.choice([AntTeam.ALLIED.value, AntTeam.ENEMY.value])})
+            cells.append({
+                "cell_x": p[0],
+                "cell_y": p[1],
+                "cell_type": cell_type,
+                "resource_value": res_value,
+                "resource_type": res_type,
+                "ants": ants,
+            })
+        return cells
+
+    def chat_round(self, turn):
+        for ant_id in list(self.ants)[:MAX_MESSAGES_PER_TURN]:
+            if turn <= 2:
+                text = "id" + str(AntType.KARGAR.value) + str(ant_id)
+            else:
+                self.ants[ant_id] = self.step(self.ants[ant_id])
+                text = encode_graph_nodes(self.ants[ant_id], self.visible_nodes(self.ants[ant_id]),
+                                          self.width, self.height, self.view_distance, ant_id,
+                                          self.rng.randint(1, 4), False)
+            self.chat_box.append({"text": text, "turn": turn})
+
+    def add_chat(self, text, turn):
+        self.chat_box.append({"text": text, "turn": turn})
+
+    def turn_message(self, turn):
+        if turn > 1:
+            self.chat_round(turn - 1)
+        self.pos = self.step(self.pos)
+        return {
+            ServerConstants.KEY_TYPE: ServerConstants.MESSAGE_TYPE_TURN,
+            ServerConstants.KEY_TURN: turn,
+            ServerConstants.KEY_INFO: {
+                "around_cells": self.around_cells(self.pos),
+                "chat_box": list(self.chat_box),
+                "current_x": self.pos[0],
+                "current_y": self.pos[1],
+                "current_resource_type": NO_RESOURCE,
+                "current_resource_value": 0,
+                "health": 6,
+                "attacks": [],
+            },
+        }
+
+    def messages(self, turns):
+        yield self.init_message()
+        for turn in range(1, turns + 1):
+            yield self.turn_message(turn)
@@ -0,0 +1,65 @@
+import threading
+import time
+
+from AI import AI
+from Model import CurrentState, GameConfig, ServerConstants
+from decision_worker import DecisionWorker
+from synthetic_session import SyntheticSession
+
+
+def play(turns, dropped=()):
+    session = SyntheticSession(20, 20, seed=3)
+    messages = session.messages(turns)
+    ai = AI(seed=1)
+    ai.init_game(GameConfig(next(messages)[ServerConstants.KEY_INFO]))
+    applied = []
+    ai.on_map_message = lambda chat, payload: applied.append(chat.turn)
+    rounds = {}
+    for turn, message in enumerate(messages, 1):
+        if turn in dropped:
+            continue
+        ai.set_current_state(CurrentState(message[ServerConstants.KEY_INFO]))
+        message, value, direction = ai.turn(turn=turn)
+        if message:
+            session.add_chat(message, turn)
+        rounds[turn] = ai.game_round - 1
+    return rounds, applied
+
+
+def wait_for(condition, timeout=5):
+    end = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < end
+        time.sleep(0.001)
+
+
+def test_rounds_follow_the_server_turn_after_a_drop():
+    rounds, _ = play(10, dropped={5})
+    assert rounds == {turn: turn for turn in range(1, 11) if turn != 5}
+
+
+def test_chats_are_still_routed_after_a_drop():
+    _, applied = play(10, dropped={5})
+    # every turn reads the map messages sent on the turn before it
+    assert {5, 6, 7, 8, 9} <= set(applied)
+
+
+def test_worker_keeps_only_the_newest_turn():
+    release = threading.Event()
+    handled = []
+
+    def handle(item):
+        release.wait()
+        handled.append(item)
+
+    worker = DecisionWorker(handle)
+    worker.push(1)
+    wait_for(lambda: worker.busy)
+    worker.push(2)
+    worker.push(3)
+    release.set()
+    wait_for(lambda: len(handled) == 2)
+    worker.stop()
+    worker.thread.join(timeout=5)
+    assert handled == [1, 3]
+    assert worker.dropped == 1
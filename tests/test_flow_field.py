@@ -0,0 +1,146 @@
+import random
+from types import SimpleNamespace
+
+import pytest
+
+import Utils
+from AI import AI
+from Model import Direction
+from array_graph import ArrayGraph
+from flow_field import BaseField, ResourceField, home_rules, resource_rules
+from graph import Graph, Node
+
+BACKENDS = [Graph, ArrayGraph]
+SEEDS = range(8)
+
+
+def random_node(rng, pos):
+    return Node(pos, rng.random() < 0.8, wall=rng.random() < 0.2, swamp=rng.random() < 0.15,
+                trap=rng.random() < 0.1, bread=rng.choice([0, 0, 0, 3]), grass=rng.choice([0, 0, 0, 2]))
+
+
+def random_graph(cls, rng):
+    w, h = rng.randint(3, 12), rng.randint(3, 12)
+    graph = cls((w, h), (rng.randrange(w), rng.randrange(h)))
+    for pos in graph.geometry.positions:
+        if pos != graph.base_pos:
+            graph.update_node(pos, random_node(rng, pos))
+    return graph
+
+
+def change_cells(graph, rng):
+    # what a turn does to the map, plus cells that get worse, which the game itself never does
+    for _ in range(rng.randint(1, 6)):
+        pos = rng.choice(graph.geometry.positions)
+        if pos == graph.base_pos:
+            continue
+        r = rng.random()
+        if r < 0.3:
+            graph.update_node(pos, random_node(rng, pos))
+        elif r < 0.5:
+            graph.set_bread(pos, rng.choice([0, 3]))
+        elif r < 0.7:
+            graph.set_grass(pos, rng.choice([0, 2]))
+        elif r < 0.85:
+            graph.discover(pos, rng.random() < 0.3)
+        else:
+            graph.update_node(pos, Node(pos, True, False, swamp=rng.random() < 0.5))
+
+
+BASE_KEYS = [(('home', carrying), home_rules(carrying)) for carrying in (False, True)] + \
+            [((other, carrying), resource_rules(other, carrying)) for other in ('bread', 'grass')
+             for carrying in (False, True)]
+
+
+@pytest.mark.parametrize("cls", BACKENDS)
+@pytest.mark.parametrize("seed", SEEDS)
+def test_base_field_matches_a_fresh_one(cls, seed):
+    rng = random.Random(seed)
+    graph = random_graph(cls, rng)
+    for key, rules in BASE_KEYS:
+        graph.base_field(key, rules)
+    for _ in range(10):
+        change_cells(graph, rng)
+        for key, rules in BASE_KEYS:
+            assert graph.base_field(key, rules).dist == BaseField(graph, *rules).dist
+
+
+@pytest.mark.parametrize("cls", BACKENDS)
+@pytest.mark.parametrize("seed", SEEDS)
+def test_distance_from_base_matches_get_shortest_path(cls, seed):
+    rng = random.Random(seed)
+    graph = random_graph(cls, rng)
+    base = graph.nodes[graph.base_pos]
+    for _ in range(5):
+        change_cells(graph, rng)
+        for other in ('bread', 'grass'):
+            for number in (0, 2):
+                field = graph.base_field((other, bool(number)), resource_rules(other, bool(number)))
+                distances = {pos: field.distance_from_base(pos) for pos in graph.geometry.positions}
+                expected = graph.get_shortest_path(base, other, number)['dist']
+                assert {pos: d for pos, d in distances.items() if d is not None} == expected
+
+
+@pytest.mark.parametrize("cls", BACKENDS)
+@pytest.mark.parametrize("seed", SEEDS)
+def test_base_field_moves_follow_its_distances(cls, seed):
+    rng = random.Random(seed)
+    graph = random_graph(cls, rng)
+    for _ in range(5):
+        change_cells(graph, rng)
+        for key, rules in BASE_KEYS:
+            field = graph.base_field(key, rules)
+            for pos in graph.geometry.positions:
+                distance, move = field.distance(pos), field.first_move(pos)
+                if distance in (None, 0):
+                    assert move is None
+                else:
+                    assert move in graph.geometry.neighbors[pos]
+                    assert field.distance(move) + field.costs[graph.geometry.ids[pos]] == distance
+
+
+RESOURCE_KEYS = [(name, carrying) for name in ('bread', 'grass') for carrying in (False, True)]
+
+
+@pytest.mark.parametrize("cls", BACKENDS)
+@pytest.mark.parametrize("seed", SEEDS)
+def test_resource_field_matches_a_fresh_one(cls, seed):
+    rng = random.Random(seed)
+    graph = random_graph(cls, rng)
+    for name, carrying in RESOURCE_KEYS:
+        graph.resource_field(name, carrying)
+    for _ in range(10):
+        change_cells(graph, rng)
+        for name, carrying in RESOURCE_KEYS:
+            other = 'bread' if name == 'grass' else 'grass'
+            field = graph.resource_field(name, carrying)
+            fresh = ResourceField(graph, name, *resource_rules(other, carrying))
+            assert field.dist == fresh.dist and field.source == fresh.source
+
+
+@pytest.mark.parametrize("cls", BACKENDS)
+@pytest.mark.parametrize("seed", SEEDS)
+def test_resource_field_distance_matches_get_shortest_path(cls, seed):
+    rng = random.Random(seed)
+    graph = random_graph(cls, rng)
+    for _ in range(3):
+        change_cells(graph, rng)
+        for name, carrying in RESOURCE_KEYS:
+            other = 'bread' if name == 'grass' else 'grass'
+            field = graph.resource_field(name, carrying)
+            for pos in graph.geometry.positions:
+                dist = graph.get_shortest_path(graph.nodes[pos], other, 2 if carrying else 0)['dist']
+                reached = [d for cell, d in dist.items() if field.source[graph.geometry.ids[cell]]]
+                assert field.distance(pos) == (min(reached) if reached else None)
+
+
+@pytest.mark.parametrize("ant_id, direction", [(2, Direction.LEFT.value), (Utils.GRASS_ONLY_ID, Direction.RIGHT.value)])
+def test_field_move_of_the_grass_only_ant(ant_id, direction):
+    # bread two cells to the left, grass three cells to the right
+    graph = Graph((7, 1), (0, 0))
+    for x in range(1, 7):
+        graph.update_node((x, 0), Node((x, 0), True, False, bread=3 if x == 1 else 0, grass=2 if x == 6 else 0))
+    ai = AI(seed=1)
+    ai.id, ai.map = ant_id, graph
+    ai.game = SimpleNamespace(ant=SimpleNamespace(currentResource=SimpleNamespace(type=2, value=0)))
+    assert ai.get_field_move((3, 0)) == direction
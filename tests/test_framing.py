@@ -0,0 +1,50 @@
+import random
+
+import pytest
+
+from framing import FrameBuffer
+
+
+def test_frames_split_at_any_point_come_out_whole():
+    rng = random.Random(1)
+    for _ in range(200):
+        frames = [bytes(rng.randrange(1, 256) for _ in range(rng.randrange(0, 300))) for _ in range(rng.randrange(1, 20))]
+        stream = b"".join(frame + b"\0" for frame in frames)
+        buffer = FrameBuffer(size=rng.choice([16, 64, 1 << 16]))
+        received = []
+        i = 0
+        while i < len(stream):
+            n = rng.randrange(1, 100)
+            received.extend(buffer.feed(stream[i:i + n]))
+            i += n
+        assert received == frames
+        assert buffer.pending() == 0
+
+
+def test_frames_larger_than_the_buffer_grow_it():
+    frame = bytes(range(1, 256)) * 1000
+    buffer = FrameBuffer(size=1024)
+    assert buffer.feed(frame[:1000]) == []
+    assert buffer.feed(frame[1000:] + b"\0abc") == [frame]
+    assert buffer.pending() == 3
+
+
+class FakeSocket:
+    def __init__(self, chunks):
+        self.chunks = list(chunks)
+
+    def recv_into(self, view):
+        if not self.chunks:
+            return 0
+        chunk = self.chunks.pop(0)
+        view[:len(chunk)] = chunk
+        return len(chunk)
+
+
+def test_read_from_a_socket():
+    buffer = FrameBuffer()
+    sock = FakeSocket([b"ab", b"c\0de\0f"])
+    assert buffer.read_from(sock) == []
+    assert buffer.read_from(sock) == [b"abc", b"de"]
+    with pytest.raises(ConnectionResetError):
+        buffer.read_from(sock)
@@ -0,0 +1,25 @@
+import geometry
+from Utils import get_view_distance_neighbors
+
+
+def test_view_index_numbers_the_sorted_view():
+    g = geometry.Geometry(9, 7)
+    for pos in [(0, 0), (4, 3), (8, 6)]:
+        cells = get_view_distance_neighbors(pos, 9, 7, 4)
+        index = g.view_index(pos, 4)
+        assert all(cells[index[p]] == p for p in cells)
+
+
+def test_view_caches_are_bounded():
+    g = geometry.Geometry(100, 100)
+    g.precompute({4, 6})
+    assert not g.views and not g.indexes
+    for pos in g.positions:
+        g.view_index(pos, 4)
+    assert len(g.indexes) == len(g.views) == geometry.VIEW_CACHE_SIZE
+
+
+def test_only_a_few_map_sizes_are_kept():
+    for n in range(3, 3 + 2 * geometry.GEOMETRY_CACHE_SIZE):
+        geometry.get_geometry(n, n)
+    assert len(geometry.geometries) == geometry.GEOMETRY_CACHE_SIZE
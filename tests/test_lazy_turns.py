@@ -0,0 +1,30 @@
+from AI import AI
+from Model import CurrentState, GameConfig, ResourceType, ServerConstants
+from Utils import WORKER_MAX_CARRYING_RESOURCE_AMOUNT
+from synthetic_session import SyntheticSession
+
+
+def test_worker_heading_home_leaves_the_chats_for_later():
+    session = SyntheticSession(20, 20, seed=5)
+    messages = session.messages(10)
+    ai = AI(seed=1)
+    ai.init_game(GameConfig(next(messages)[ServerConstants.KEY_INFO]))
+    applied = []
+    ai.on_map_message = lambda chat, payload: applied.append(chat.turn)
+    for turn, message in enumerate(messages, 1):
+        info = message[ServerConstants.KEY_INFO]
+        loaded = turn in (7, 8)
+        if loaded:
+            info["current_resource_type"] = ResourceType.BREAD.value
+            info["current_resource_value"] = WORKER_MAX_CARRYING_RESOURCE_AMOUNT
+        ai.set_current_state(CurrentState(info))
+        del applied[:]
+        message, value, direction = ai.turn(turn=turn)
+        if message:
+            session.add_chat(message, turn)
+        assert ai.game._chatBoxSynced == (not loaded)
+        if turn == 9:
+            # the rounds skipped while loaded are read on the next turn that plans
+            assert set(applied) == {6, 7, 8}
+        elif not loaded and turn > 3:
+            assert set(applied) == {turn - 1}
@@ -0,0 +1,18 @@
+from Model import Ant, Cell, Resource
+
+
+def make_cell(ants):
+    cell = Cell(1, 2, 1, 5, 0)
+    cell.ants = ants
+    return cell
+
+
+def test_cells_with_equal_ants_are_equal():
+    assert make_cell([Ant.createAntXY(1, 0, 1, 2)]) == make_cell([Ant.createAntXY(1, 0, 1, 2)])
+    assert make_cell([Ant.createAntXY(1, 0, 1, 2)]) != make_cell([Ant.createAntXY(0, 0, 1, 2)])
+
+
+def test_ant_repr_shows_its_fields():
+    ant = Ant(1, 0, Resource(0, 3), 4, 5, 6, None, 2, 3, [])
+    assert repr(ant) == ("Ant(antType=1, antTeam=0, currentResource=Resource(type=0, value=3), currentX=4, "
+                         "currentY=5, health=6, attackDistance=2, viewDistance=3, attacks=[])")
@@ -0,0 +1,81 @@
+import random
+
+import pytest
+
+from array_graph import ArrayGraph
+from flow_field import home_rules
+from graph import Graph, Node
+from search import search
+
+BACKENDS = [Graph, ArrayGraph]
+SEEDS = range(20)
+
+
+def reachable_from_base(graph, name_of_object):
+    # what get_path to base used to find, one search out of base over explored open cells
+    wall, discovered, amounts = graph.field('wall'), graph.field('discovered'), graph.field(name_of_object)
+    base = graph.geometry.ids[graph.base_pos]
+    result = search([base], graph.geometry.neighbor_ids, passable=lambda i: discovered[i] and not wall[i],
+                    blocked=lambda i: wall[i] or not discovered[i])
+    return sum(amounts[i] for i in result.reached if i != base)
+
+
+def random_node(rng, pos):
+    return Node(pos, rng.random() < 0.7, wall=rng.random() < 0.25, swamp=rng.random() < 0.15,
+                bread=rng.choice([0, 0, 0, 3]), grass=rng.choice([0, 0, 0, 2]))
+
+
+def change_cells(graph, rng):
+    # cells opening up and resources being taken, and now and then a cell that closes again or a whole other map
+    # copied in
+    w, h = graph.dim
+    for _ in range(rng.randint(1, 8)):
+        pos = rng.choice(graph.geometry.positions)
+        r = rng.random()
+        if r < 0.3:
+            graph.discover(pos, rng.random() < 0.3)
+        elif r < 0.5:
+            graph.set_bread(pos, rng.choice([0, 3, 5]))
+        elif r < 0.7:
+            graph.set_grass(pos, rng.choice([0, 2]))
+        elif r < 0.8 and pos != graph.base_pos:
+            graph.update_node(pos, random_node(rng, pos))
+        elif r < 0.9:
+            other = type(graph)((w, h), graph.base_pos)
+            for cell in other.geometry.positions:
+                if cell != graph.base_pos and rng.random() < 0.2:
+                    other.update_node(cell, random_node(rng, cell))
+            graph.update_from(other)
+
+
+@pytest.mark.parametrize("cls", BACKENDS)
+@pytest.mark.parametrize("seed", SEEDS)
+def test_total_resource_number_matches_a_search(cls, seed):
+    rng = random.Random(seed)
+    w, h = rng.randint(2, 12), rng.randint(2, 12)
+    graph = cls((w, h), (rng.randrange(w), rng.randrange(h)))
+    if rng.random() < 0.5:
+        for pos in graph.geometry.positions:
+            if pos != graph.base_pos and rng.random() < 0.3:
+                graph.update_node(pos, random_node(rng, pos))
+    graph.total_bread_number()
+    if rng.random() < 0.5:
+        graph.base_field(('home', False), home_rules(False))
+    for _ in range(15):
+        change_cells(graph, rng)
+        assert graph.total_bread_number() == reachable_from_base(graph, 'bread')
+        assert graph.total_grass_number() == reachable_from_base(graph, 'grass')
+
+
+def test_closing_a_cell_splits_its_region():
+    # the map wraps around, the wall at the far end keeps it a line
+    graph = Graph((5, 1), (0, 0))
+    for x in range(1, 4):
+        graph.update_node((x, 0), Node((x, 0), True, bread=x))
+    graph.discover((4, 0), True)
+    assert graph.total_bread_number() == 6
+    graph.discover((2, 0), True)
+    assert graph.total_bread_number() == 1
+    graph.discover((2, 0), False)
+    graph.set_bread((3, 0), 0)
+    assert graph.total_bread_number() == 3
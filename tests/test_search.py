@@ -0,0 +1,334 @@
+import heapq
+import math
+import random
+
+import pytest
+
+import Utils
+from array_graph import ArrayGraph
+from deadline import Deadline
+from graph import Graph, Node
+from search import search
+from tsp_generator import get_limit
+
+BACKENDS = [Graph, ArrayGraph]
+SEEDS = range(12)
+
+
+def random_graph(cls, seed, discovered=0.85):
+    rng = random.Random(seed)
+    w, h = rng.randint(4, 11), rng.randint(4, 11)
+    base = (rng.randrange(w), rng.randrange(h))
+    graph = cls((w, h), base)
+    for pos in graph.geometry.positions:
+        if pos == base:
+            continue
+        resource = rng.random()
+        graph.update_node(pos, Node(pos, rng.random() < discovered, wall=rng.random() < 0.2,
+                                    swamp=rng.random() < 0.15, trap=rng.random() < 0.1,
+                                    bread=rng.randint(1, 9) if resource < 0.12 else 0,
+                                    grass=rng.randint(1, 9) if 0.12 <= resource < 0.24 else 0))
+    return graph, rng
+
+
+def cost(graph, pos):
+    return Utils.SWAMP_TURNS + 1 if graph.nodes[pos].swamp else 1
+
+
+def reference(graph, src, expand, enter, weighted=True):
+    # plain Dijkstra over positions, the cost of a move is paid on leaving a cell
+    dist = {src: 0}
+    heap = [(0, src)]
+    done = set()
+    while heap:
+        d, pos = heapq.heappop(heap)
+        if pos in done:
+            continue
+        done.add(pos)
+        if not expand(pos):
+            continue
+        for nxt in graph.geometry.neighbors[pos]:
+            if not enter(nxt):
+                continue
+            nd = d + (cost(graph, pos) if weighted else 1)
+            if nd < dist.get(nxt, math.inf):
+                dist[nxt] = nd
+                heapq.heappush(heap, (nd, nxt))
+    return dist
+
+
+def known_wall(graph, pos):
+    node = graph.nodes[pos]
+    return node.discovered and node.wall
+
+
+def resource_reference(graph, src, other, number):
+    node = graph.nodes[src]
+    if known_wall(graph, src) or (getattr(node, other) > 0 and number == 0):
+        return {src: 0}
+    return reference(
+        graph, src, lambda p: not known_wall(graph, p),
+        lambda p: not known_wall(graph, p) and not (getattr(graph.nodes[p], other) > 0 and number == 0)
+        and not (number and graph.nodes[p].trap)
+    )
+
+
+def home_reference(graph, src, carrying):
+    def is_open(p):
+        node = graph.nodes[p]
+        return node.discovered and not node.wall
+
+    return reference(graph, src, is_open, lambda p: is_open(p) and not (carrying and graph.nodes[p].trap))
+
+
+def open_cells(graph):
+    return [pos for pos in graph.geometry.positions if not graph.nodes[pos].wall]
+
+
+def assert_parents_follow_distances(graph, info):
+    for pos, parent in info['parent'].items():
+        if parent == pos:
+            assert info['dist'][pos] == 0
+        else:
+            assert pos in graph.geometry.neighbors[parent]
+            assert info['dist'][pos] == info['dist'][parent] + cost(graph, parent)
+
+
+@pytest.mark.parametrize("cls", BACKENDS)
+@pytest.mark.parametrize("seed", SEEDS)
+def test_get_shortest_path(cls, seed):
+    graph, rng = random_graph(cls, seed)
+    for _ in range(6):
+        src = rng.choice(graph.geometry.positions)
+        other, number = rng.choice(['bread', 'grass']), rng.choice([0, 3])
+        info = graph.get_shortest_path(graph.nodes[src], other, number)
+        assert info['dist'] == resource_reference(graph, src, other, number)
+        assert_parents_follow_distances(graph, info)
+
+
+@pytest.mark.parametrize("cls", BACKENDS)
+@pytest.mark.parametrize("seed", SEEDS)
+def test_find_all_shortest_path(cls, seed):
+    graph, rng = random_graph(cls, seed)
+    base = graph.base_pos
+    for name, other in (('grass', 'bread'), ('bread', 'grass')):
+        for number_of_object in ({}, {name: 4}):
+            src = rng.choice(graph.geometry.positions)
+            graph.find_all_shortest_path(number_of_object, name, [(graph.nodes[src], 0), (graph.nodes[base], 1)])
+            info = graph.shortest_path_info[name]
+            assert info[src]['dist'] == resource_reference(graph, src, other, number_of_object.get(name, 0))
+            # the base is read off its field, compare every cell
+            expected = resource_reference(graph, base, other, number_of_object.get(name, 1))
+            for pos in graph.geometry.positions:
+                assert info[(base, 1)]['dist'].get(pos) == expected.get(pos)
+
+
+@pytest.mark.parametrize("cls", BACKENDS)
+@pytest.mark.parametrize("seed", SEEDS)
+def test_get_path_and_shortest_path(cls, seed):
+    graph, rng = random_graph(cls, seed)
+
+    def expand(p):
+        node = graph.nodes[p]
+        return node.discovered and not node.wall
+
+    cells = open_cells(graph)
+    for _ in range(6):
+        src, dest = rng.choice(cells), rng.choice(cells)
+        expected = reference(graph, src, expand, lambda p: not graph.nodes[p].wall, weighted=False)
+        path = graph.get_path(graph.nodes[src], graph.nodes[dest])
+        full = graph.shortest_path(graph.nodes[src], graph.nodes[dest])
+        if dest == src or dest not in expected:
+            assert path is None and full is None
+            continue
+        assert len(path) == expected[dest]
+        assert path[-1].pos == dest
+        assert [node.pos for node in full] == [src] + [node.pos for node in path]
+        for a, b in zip(full, full[1:]):
+            assert b.pos in graph.geometry.neighbors[a.pos]
+
+
+@pytest.mark.parametrize("cls", BACKENDS)
+@pytest.mark.parametrize("seed", SEEDS)
+def test_get_path_with_max_length(cls, seed):
+    graph, rng = random_graph(cls, seed)
+    cells = open_cells(graph)
+    for _ in range(6):
+        src, dest = rng.choice(cells), rng.choice(cells)
+        max_len = rng.randint(1, 6)
+        expected = reference(graph, src, lambda p: not known_wall(graph, p), lambda p: not known_wall(graph, p),
+                             weighted=False)
+        path = graph.get_path_with_max_length(graph.nodes[src], graph.nodes[dest], max_len)
+        if dest == src or expected.get(dest, math.inf) > max_len:
+            assert path is None
+        else:
+            assert len(path) == expected[dest] and path[-1].pos == dest
+
+
+@pytest.mark.parametrize("cls", BACKENDS)
+@pytest.mark.parametrize("seed", SEEDS)
+def test_get_path_with_non_discovered(cls, seed):
+    graph, rng = random_graph(cls, seed)
+    cells = open_cells(graph)
+    for _ in range(6):
+        src, dest = rng.sample(cells, 2)
+
+        def expand(p):
+            return not known_wall(graph, p)
+
+        move = graph.get_path_with_non_discovered(graph.nodes[src], graph.nodes[dest])
+        expected = reference(graph, src, expand, expand)
+        if dest not in expected:
+            assert move is None
+            continue
+        # the first move is on a cheapest way to dest
+        assert move in graph.geometry.neighbors[src]
+        assert cost(graph, src) + reference(graph, move, expand, expand)[dest] == expected[dest]
+
+
+@pytest.mark.parametrize("cls", BACKENDS)
+@pytest.mark.parametrize("seed", SEEDS)
+def test_edge_nodes_and_bfs(cls, seed):
+    graph, rng = random_graph(cls, seed, discovered=0.6)
+    for _ in range(4):
+        src = rng.choice(open_cells(graph))
+
+        def expand(p):
+            return not known_wall(graph, p)
+
+        def enter(p):
+            return not known_wall(graph, p) and graph.nodes[p].discovered
+
+        def frontier(dist):
+            return sorted(p for p in dist if not known_wall(graph, p) and
+                          any(not graph.nodes[n].discovered for n in graph.geometry.neighbors[p]))
+
+        expected = reference(graph, src, expand, enter, weighted=False)
+        edges = graph.get_edge_nodes(graph.nodes[src])
+        assert edges['distance'] == expected
+        assert edges['edge_nodes'] == frontier(expected)
+
+        expected = reference(graph, src, expand, enter)
+        info = graph.bfs(graph.nodes[src])
+        assert info['dist'] == expected
+        assert graph.edge_nodes == frontier(expected)
+        assert_parents_follow_distances(graph, info)
+
+
+@pytest.mark.parametrize("cls", BACKENDS)
+@pytest.mark.parametrize("seed", SEEDS)
+def test_get_first_move_to_base(cls, seed):
+    graph, rng = random_graph(cls, seed)
+    base = graph.base_pos
+    for src in open_cells(graph):
+        carrying = rng.random() < 0.5
+        move = graph.get_first_move_to_base(graph.nodes[src], {'bread': 3} if carrying else {})
+        expected = home_reference(graph, src, carrying)
+        node = graph.nodes[src]
+        if src == base or not node.discovered or base not in expected:
+            assert move is None
+            continue
+        nxt = graph.geometry.move(src, move)
+        assert cost(graph, src) + home_reference(graph, nxt, carrying)[base] == expected[base]
+
+
+def reference_candidates(graph, src, name, number_of_object):
+    # get_nearest_*_nodes worked out from the reference distances
+    other = 'bread' if name == 'grass' else 'grass'
+    base = graph.base_pos
+    number = number_of_object.get(name, 0)
+    from_src = resource_reference(graph, src, other, number)
+    from_base = resource_reference(graph, base, other, number_of_object.get(name, 1))
+    weight = Node.GRASS_WEIGHT if name == 'grass' else Node.BREAD_WEIGHT
+    candidates = [pos for pos in sorted(graph.geometry.positions) if getattr(graph.nodes[pos], name) > 0 and
+                  pos not in (src, base) and pos in from_src and pos in from_base]
+    candidates.sort(key=lambda p: -(from_src[p] + from_base[p]) * Node.DISTANCE_WEIGH +
+                    getattr(graph.nodes[p], name) + number * weight, reverse=True)
+    return candidates[:Graph.TSP_NODE_LIMIT], from_src
+
+
+@pytest.mark.parametrize("cls", BACKENDS)
+@pytest.mark.parametrize("seed", SEEDS)
+def test_resource_searches(cls, seed):
+    graph, rng = random_graph(cls, seed)
+    for _ in range(4):
+        src = rng.choice(open_cells(graph))
+        for name in ('grass', 'bread'):
+            number_of_object = rng.choice([{}, {name: 2}])
+            nearest = getattr(graph, f'get_nearest_{name}_nodes')(graph.nodes[src], graph.nodes[graph.base_pos],
+                                                                 number_of_object)
+            expected, from_src = reference_candidates(graph, src, name, number_of_object)
+            assert [node.pos for node in nearest] == expected
+
+            limit = get_limit(bread_min=10, grass_min=10)
+            move, _, distance = graph.get_resource_best_move(src, graph.base_pos, name, limit, number_of_object)
+            if not expected:
+                assert move is None and distance == math.inf
+                continue
+            assert distance == from_src[expected[0]]
+            other = 'bread' if name == 'grass' else 'grass'
+            nxt = graph.geometry.move(src, move)
+            number = number_of_object.get(name, 0)
+            assert cost(graph, src) + resource_reference(graph, nxt, other, number)[expected[0]] == distance
+
+
+@pytest.mark.parametrize("cls", BACKENDS)
+@pytest.mark.parametrize("seed", SEEDS)
+def test_total_resource_number(cls, seed):
+    graph, _ = random_graph(cls, seed)
+    base = graph.base_pos
+
+    def is_open(p):
+        node = graph.nodes[p]
+        return node.discovered and not node.wall
+
+    reached = reference(graph, base, is_open, is_open, weighted=False)
+    for name in ('bread', 'grass'):
+        assert graph.total_resource_number(name) == sum(getattr(graph.nodes[p], name) for p in reached if p != base)
+
+
+class ExpiresAfter:
+    def __init__(self, calls):
+        self.calls = calls
+
+    def expired(self):
+        self.calls -= 1
+        return self.calls < 0
+
+
+def line(n):
+    return [tuple(j for j in (i - 1, i + 1) if 0 <= j < n) for i in range(n)]
+
+
+def test_search_weights_and_blocked_cells():
+    costs = [1, 4, 1, 1, 4, 1]
+    result = search([0], line(6), blocked=lambda i: i == 5, weight=lambda i, j: costs[i], max_weight=4)
+    assert result.dist == [0, 1, 5, 6, 7, -1]
+    assert result.path(4) == [1, 2, 3, 4]
+    assert result.first_move(4) == 1
+
+
+def test_search_stops_early():
+    result = search([0], line(50), early_exit=lambda i, d: i == 10)
+    assert result.dist[10] == 10
+    assert result.settled[10] and not result.settled[11]
+    assert sum(result.settled) == 11
+
+
+def test_search_stops_at_the_deadline():
+    result = search([0], line(50), deadline=ExpiresAfter(5))
+    assert sum(result.settled) == 5
+    # what was reached keeps a valid way back to the start
+    for i in result.reached:
+        assert result.path(i) == list(range(1, i + 1))
+
+    result = search([0], line(50), deadline=Deadline(0))
+    assert result.reached == [0] and not any(result.settled)
+
+
+@pytest.mark.parametrize("cls", BACKENDS)
+def test_wrappers_stop_at_the_deadline(cls):
+    graph, _ = random_graph(cls, 1)
+    src = graph.nodes[graph.base_pos]
+    assert graph.get_shortest_path(src, 'bread', 0, Deadline(0))['dist'] == {src.pos: 0}
+    assert graph.bfs(src, Deadline(0))['dist'] == {src.pos: 0}
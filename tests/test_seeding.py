@@ -0,0 +1,28 @@
+from AI import AI
+from Controller import Controller
+
+
+def seed(conf):
+    controller = Controller()
+    controller.conf = conf
+    return controller.ant_seed()
+
+
+def test_no_seed_by_default():
+    assert seed({"AICSeed": "", "AICSeedOffset": ""}) is None
+
+
+def test_ants_sharing_a_seed_draw_different_ids():
+    seeds = [seed({"AICSeed": "7", "AICSeedOffset": str(offset)}) for offset in range(5)]
+    assert seed({"AICSeed": "7", "AICSeedOffset": "3"}) == seeds[3]
+    ids = set()
+    for ant_seed in seeds:
+        ai = AI(ant_seed)
+        ai.make_id()
+        ids.add(ai.id)
+    assert len(ids) == len(seeds)
+
+
+
+def test_a_seed_without_an_offset_replays_the_same_stream():
+    assert seed({"AICSeed": "7", "AICSeedOffset": ""}) == seed({"AICSeed": "7", "AICSeedOffset": "0"})
@@ -0,0 +1,79 @@
+import math
+import random
+
+import pytest
+
+from deadline import Deadline
+from graph import Graph, Node
+from tsp_generator import get_limit, get_tsp_first_move, solve_tsp
+
+
+class ExpiresAfter:
+    def __init__(self, calls):
+        self.calls = calls
+
+    def expired(self):
+        self.calls -= 1
+        return self.calls < 0
+
+
+def random_dist(rng, n):
+    # values of every leg, the higher the better like the node values, some legs can not be walked
+    return [[-math.inf if rng.random() < 0.1 else -rng.randint(1, 50) for _ in range(n)] for _ in range(n)]
+
+
+def walk(dp_path, mask, last):
+    # the vertices of the walk ending at last, back to src
+    vertices = []
+    while dp_path[mask][last] != last:
+        vertices.append(last)
+        mask, last = mask - (1 << last), dp_path[mask][last]
+    assert mask == 1 and last == 0
+    return [last] + list(reversed(vertices))
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_a_cut_dp_still_has_tours_to_dest(seed):
+    rng = random.Random(seed)
+    n = rng.randint(3, 7)
+    dist = random_dist(rng, n)
+    full, _ = solve_tsp(dist)
+    dest = n - 1
+    for calls in range(0, 1 << n, 7):
+        dp, dp_path = solve_tsp(dist, ExpiresAfter(calls))
+        for mask in range(1 << n):
+            if dp[mask][dest] == -math.inf:
+                continue
+            vertices = walk(dp_path, mask, dest)
+            assert sum(1 << j for j in vertices) == mask
+            assert dp[mask][dest] == sum(dist[a][b] for a, b in zip(vertices, vertices[1:]))
+            assert dp[mask][dest] <= full[mask][dest]
+
+
+def test_out_of_time_before_the_first_mask():
+    # the nearest neighbour tour still goes through every vertex, best leg first
+    dist = [[-abs(a - b) * 10 - b for b in range(6)] for a in range(6)]
+    dp, dp_path = solve_tsp(dist, Deadline(0))
+    assert walk(dp_path, (1 << 6) - 1, 5) == [0, 1, 2, 3, 4, 5]
+
+
+def grass_map():
+    # base in the corner, grass spread over an open 8x8 map
+    graph = Graph((8, 8), (0, 0))
+    grass = {(2, 0): 2, (5, 1): 3, (1, 4): 2, (6, 6): 4, (3, 3): 1, (7, 2): 2}
+    for pos in graph.geometry.positions:
+        if pos != graph.base_pos:
+            graph.update_node(pos, Node(pos, True, grass=grass.get(pos, 0)))
+    return graph
+
+
+def test_first_move_with_an_expired_deadline():
+    graph = grass_map()
+    move, name = get_tsp_first_move((4, 4), graph.base_pos, graph, 'grass', get_limit(grass_min=5), {}, Deadline(0))
+    assert move is not None
+    assert (move, name) == graph.get_move_to_nearest_resource(graph.nodes[(4, 4)], 'grass', {})[:2]
+
+    move, name = get_tsp_first_move((4, 4), graph.base_pos, graph, 'grass', get_limit(grass_min=5),
+                                    {'grass': 5}, Deadline(0))
+    assert move is not None
+    assert move == graph.get_first_move_to_base(graph.nodes[(4, 4)], {'grass': 5})
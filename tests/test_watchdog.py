@@ -0,0 +1,59 @@
+import threading
+import time
+
+from reply import DIRECTION_FRAMES, END_FRAME
+from watchdog import TurnWatchdog
+
+
+def wait_for(condition, timeout=5):
+    end = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < end
+        time.sleep(0.001)
+
+
+def test_fallback_is_sent_when_the_turn_runs_out():
+    sent = []
+    watchdog = TurnWatchdog(sent.append, margin=0, timeout=0.01)
+    watchdog.arm(1, time.monotonic(), 1)
+    wait_for(lambda: sent)
+    assert sent == [DIRECTION_FRAMES[1] + END_FRAME]
+    # the real reply comes too late and is dropped
+    assert not watchdog.reply(1, b"late")
+    assert sent == [DIRECTION_FRAMES[1] + END_FRAME]
+    assert (watchdog.fired, watchdog.late) == (1, 1)
+
+
+def test_reply_in_time_cancels_the_fallback():
+    sent = []
+    watchdog = TurnWatchdog(sent.append, margin=0, timeout=0.05)
+    watchdog.arm(1, time.monotonic(), 1)
+    assert watchdog.reply(1, b"reply")
+    time.sleep(0.1)
+    assert sent == [b"reply"]
+    assert watchdog.fired == 0
+
+
+def test_reply_for_an_older_turn_is_dropped():
+    sent = []
+    watchdog = TurnWatchdog(sent.append, margin=0, timeout=5)
+    watchdog.arm(1, time.monotonic(), 1)
+    watchdog.arm(2, time.monotonic(), 1)
+    assert not watchdog.reply(1, b"old")
+    assert watchdog.reply(2, b"new")
+    watchdog.stop()
+    assert sent == [b"new"]
+
+
+def test_one_thread_watches_every_turn():
+    sent = []
+    watchdog = TurnWatchdog(sent.append, margin=0, timeout=0.01)
+    threads = threading.active_count()
+    for turn in range(1, 4):
+        watchdog.arm(turn, time.monotonic(), 1)
+        wait_for(lambda: len(sent) == turn)
+        assert threading.active_count() == threads
+    watchdog.stop()
+    watchdog.thread.join(1)
+    assert not watchdog.thread.is_alive()
+    assert watchdog.fired == 3
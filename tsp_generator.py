@@ -3,11 +3,12 @@ from itertools import chain, groupby
 
 from Model import Direction, ResourceType
 from Utils import time_measure
+from deadline import NO_DEADLINE
 
 
-def get_tsp(src_pos, dest_pos, graph, number_of_object, name_of_object):
+def get_tsp(src_pos, dest_pos, graph, number_of_object, name_of_object, deadline=None):
     tsp = make_tsp(
-        graph.nodes[src_pos], graph.nodes[dest_pos], name_of_object, graph, number_of_object
+        graph.nodes[src_pos], graph.nodes[dest_pos], name_of_object, graph, number_of_object, deadline
     )
     # print(tsp)
     if not tsp:
@@ -37,8 +38,9 @@ def make_dist_graph(src, dest, name_of_node_object, graph, dist_nodes, number_of
     return dist
 
 
-def make_tsp(src, dest, name_of_node_object, graph, number_of_object):
-    dist_nodes = getattr(graph, f'get_nearest_{name_of_node_object}_nodes')(src, dest, number_of_object)
+def make_tsp(src, dest, name_of_node_object, graph, number_of_object, deadline=None):
+    deadline = deadline or NO_DEADLINE
+    dist_nodes = getattr(graph, f'get_nearest_{name_of_node_object}_nodes')(src, dest, number_of_object, deadline)
     number_of_object = number_of_object.get(name_of_node_object, 0)
     dist = make_dist_graph(src, dest, name_of_node_object, graph, dist_nodes, number_of_object)
 
@@ -47,12 +49,29 @@ def make_tsp(src, dest, name_of_node_object, graph, number_of_object):
     if number_of_dist_vertex == 2:
         return None
 
+    dp, dp_path = solve_tsp(dist, deadline)
+
+    return {
+        'dp': dp,
+        'dp_path': dp_path,
+        'dist_nodes': list(chain([src], dist_nodes, [dest])),
+    }
+
+
+def solve_tsp(dist, deadline=None):
+    # best value of a walk from src over each mask of vertices, ending at each vertex of it
+    deadline = deadline or NO_DEADLINE
+    number_of_dist_vertex = len(dist)
     dp = [number_of_dist_vertex * [-math.inf] for _ in range(1 << number_of_dist_vertex)]
     dp_path = [number_of_dist_vertex * [-1] for _ in range(1 << number_of_dist_vertex)]
 
     dist_src = 0
 
     for i in range(1 << number_of_dist_vertex):
+        if deadline.expired():
+            # the masks below i are solved, a nearest neighbour tour stands in for the ones left
+            add_nearest_neighbour_tour(dp, dp_path, dist)
+            break
         vertices = []
         for j in range(number_of_dist_vertex):
             if i & (1 << j):
@@ -71,20 +90,37 @@ def make_tsp(src, dest, name_of_node_object, graph, number_of_object):
                     dp[i][j] = value
                     dp_path[i][j] = k
 
-    return {
-        'dp': dp,
-        'dp_path': dp_path,
-        'dist_nodes': list(chain([src], dist_nodes, [dest])),
-    }
-
-
-def get_tsp_path(src_pos, dest_pos, graph, limit, number_of_object, name_of_object):
+    return dp, dp_path
+
+
+def add_nearest_neighbour_tour(dp, dp_path, dist):
+    # the masks along one greedy tour from src, each of them also closed at dest. an entry is only written when it
+    # beats what the dp already has, so every dp_path chain still leads back to src
+    number_of_dist_vertex = len(dist)
+    dist_src, dist_dest = 0, number_of_dist_vertex - 1
+    mask, last = 1 << dist_src, dist_src
+    dp[mask][last], dp_path[mask][last] = 0, dist_src
+    left = set(range(1, dist_dest))
+    while True:
+        nearest = max(left, key=lambda k: dist[last][k]) if left else None
+        for j in [dist_dest] if nearest is None else [dist_dest, nearest]:
+            value = dp[mask][last] + dist[last][j]
+            if dp[mask | (1 << j)][j] < value:
+                dp[mask | (1 << j)][j] = value
+                dp_path[mask | (1 << j)][j] = last
+        if nearest is None:
+            return
+        left.remove(nearest)
+        mask, last = mask | (1 << nearest), nearest
+
+
+def get_tsp_path(src_pos, dest_pos, graph, limit, number_of_object, name_of_object, deadline=None):
     number_of_objs = number_of_object.get(name_of_object, 0)
 
     if number_of_objs >= limit.get(name_of_object).get('min'):
         res = {
             'path': graph.get_path(
-                graph.nodes[src_pos], graph.nodes[dest_pos]
+                graph.nodes[src_pos], graph.nodes[dest_pos], deadline
             ),
             'value': math.inf
         }
@@ -92,7 +128,7 @@ def get_tsp_path(src_pos, dest_pos, graph, limit, number_of_object, name_of_obje
             f'{name_of_object}_path_from_tsp_info': res
         }
 
-    tsp_info = get_tsp(src_pos, dest_pos, graph, number_of_object, name_of_object)
+    tsp_info = get_tsp(src_pos, dest_pos, graph, number_of_object, name_of_object, deadline)
     path_from_tsp_info = get_path_from_tsp_info(tsp_info, name_of_object, graph, limit, number_of_objs)
 
     return {
@@ -116,7 +152,7 @@ def get_path_from_tsp_info(tsp_info, name_of_node_object, graph, limit, number_o
         mask = (i << 1) | 1 | (1 << (number_of_dist_vertex - 1))
         number_of_obj = number_of_object
         value = dp[mask][number_of_dist_vertex - 1]
-        if best_mask and value < best_value:
+        if value == -math.inf or best_mask and value < best_value:
             continue
         for j in range(number_of_dist_vertex):
             if mask & (1 << j):
@@ -159,7 +195,7 @@ def get_path_from_tsp_info(tsp_info, name_of_node_object, graph, limit, number_o
 
 
 # @time_measure
-def get_tsp_first_move(src_pos, dest_pos, graph, name_of_object, limit=None, number_of_object=None):
+def get_tsp_first_move(src_pos, dest_pos, graph, name_of_object, limit=None, number_of_object=None, deadline=None):
     number_of_object = number_of_object or {}
     if not limit:
         limit = {
@@ -175,10 +211,17 @@ def get_tsp_first_move(src_pos, dest_pos, graph, name_of_object, limit=None, num
     if not limit.get('grass'):
         limit['grass'] = {'min': 1}
 
-    all_tsp = get_tsp_path(src_pos, dest_pos, graph, limit, number_of_object, name_of_object)
+    all_tsp = get_tsp_path(src_pos, dest_pos, graph, limit, number_of_object, name_of_object, deadline)
     tsp_path = all_tsp.get(f'{name_of_object}_path_from_tsp_info')
 
     if not tsp_path or not tsp_path.get('path'):
+        if deadline is not None and deadline.expired():
+            # ran out of time before any tour, step down the fields the map keeps across turns instead
+            src = graph.nodes[src_pos]
+            if number_of_object.get(name_of_object, 0) >= limit[name_of_object]['min'] and dest_pos == graph.base_pos:
+                return graph.get_first_move_to_base(src, number_of_object), name_of_object
+            move, name, _ = graph.get_move_to_nearest_resource(src, name_of_object, number_of_object)
+            return move, name
         return Direction.get_value('None'), None
     # print([p.pos for p in tsp_path.get('path')])
     return Direction.get_value(graph.step(src_pos, tsp_path.get('path')[0].pos)), name_of_object
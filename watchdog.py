@@ -0,0 +1,67 @@
+import threading
+import time
+
+from deadline import TURN_TIMEOUT
+from reply import DIRECTION_FRAMES, END_FRAME
+
+
+class TurnWatchdog:
+    # one thread for the whole game, it sleeps until the armed turn runs out and sends the fallback move when
+    # no reply came for it by then
+    def __init__(self, send, margin=0.05, timeout=TURN_TIMEOUT):
+        self.send = send
+        self.margin = margin
+        self.timeout = timeout
+        self.condition = threading.Condition()
+        self.turn = None
+        self.replied = True
+        self.due = None
+        self.fallback = None
+        self.stopped = False
+        self.fired = 0
+        self.late = 0
+        self.thread = threading.Thread(target=self.run, name="watchdog", daemon=True)
+        self.thread.start()
+
+    def arm(self, turn, arrived, fallback_direction):
+        fallback = DIRECTION_FRAMES.get(fallback_direction, b'') + END_FRAME
+        with self.condition:
+            self.turn = turn
+            self.replied = False
+            self.due = arrived + self.timeout - self.margin
+            self.fallback = fallback
+            self.condition.notify()
+
+    def run(self):
+        with self.condition:
+            while not self.stopped:
+                if self.replied:
+                    self.condition.wait()
+                    continue
+                left = self.due - time.monotonic()
+                if left > 0:
+                    self.condition.wait(left)
+                    continue
+                self.replied = True
+                self.fired += 1
+                print("turn {} was not decided in time, sent the fallback move, fallbacks: {}".format(
+                    self.turn, self.fired))
+                self.send(self.fallback)
+
+    def reply(self, turn, data):
+        with self.condition:
+            if self.turn != turn or self.replied:
+                # the fallback (or a newer turn) already answered for this one
+                self.late += 1
+                print("discarded a late reply for turn {}, late replies: {}".format(turn, self.late))
+                return False
+            self.replied = True
+            self.condition.notify()
+            self.send(data)
+            return True
+
+    def stop(self):
+        with self.condition:
+            self.replied = True
+            self.stopped = True
+            self.condition.notify()